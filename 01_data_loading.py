@@ -9,6 +9,8 @@ import os
 import shutil
 from pathlib import Path
 import kagglehub
+from features import gap_report
+from validation import validate_frame, print_report, REPORT_PATH, QUARANTINE_PATH
 
 # Project data path
 PROJECT_DATA_PATH = "data"
@@ -107,18 +109,35 @@ def explore_data(df):
     
     return df
 
-def prepare_data(df):
-    """Prepare data for analysis"""
+def prepare_data(df, validate=True, output_dir=PROJECT_DATA_PATH):
+    """
+    Prepare data for analysis
+    validate: run the validation rules first (validation.py); rows breaking a
+              hard rule go to quarantine.csv instead of the prepared data
+    output_dir: folder for validation_report.json and quarantine.csv
+    """
     print("\n" + "="*60)
     print("DATA PREPARATION")
     print("="*60)
     
+    if validate and 'Date' in df.columns:
+        df, report = validate_frame(
+            df, report_path=os.path.join(output_dir, os.path.basename(REPORT_PATH)),
+            quarantine_path=os.path.join(output_dir, os.path.basename(QUARANTINE_PATH)))
+        print_report(report)
+    
     # Convert date column
     if 'Date' in df.columns:
         df['Date'] = pd.to_datetime(df['Date'])
         df = df.sort_values('Date')
         df.set_index('Date', inplace=True)
         print("[OK] Converted Date column and set as index")
+        
+        # Gaps are kept as-is; the feature engine aligns lags on a daily calendar
+        gaps = gap_report(df).iloc[0]
+        print(f"[OK] Calendar coverage {gaps['coverage']:.1%}: {gaps['missing_days']} missing days "
+              f"in {gaps['gaps']} gaps (longest {gaps['longest_gap']}), "
+              f"{gaps['duplicate_dates']} duplicate dates")
     
     # Handle missing values
     if df.isnull().sum().sum() > 0:
@@ -10,6 +10,7 @@ import seaborn as sns
 from pathlib import Path
 import os
 import warnings
+from density_plot import plot_line, plot_density, DENSITY_THRESHOLD
 warnings.filterwarnings('ignore')
 
 # Set style
@@ -33,7 +34,8 @@ def plot_demand_over_time(df, output_dir):
     print("Creating: Demand over time plot...")
     
     fig, ax = plt.subplots(figsize=(14, 6))
-    ax.plot(df.index, df['demand'], linewidth=1.5, alpha=0.8, color='#2E86AB')
+    # Past one point per pixel column this draws the min/max envelope instead
+    plot_line(ax, df.index, df['demand'], dpi=300, linewidth=1.5, alpha=0.8, color='#2E86AB')
     ax.set_title('Andhra Pradesh Electricity Demand Over Time (2015-2023)', 
                  fontsize=16, fontweight='bold', pad=20)
     ax.set_xlabel('Date', fontsize=12)
@@ -131,9 +133,15 @@ def plot_temperature_correlation(df, output_dir):
     
     if 'temp' in df.columns:
         fig, ax = plt.subplots(figsize=(10, 6))
-        scatter = ax.scatter(df['temp'], df['demand'], 
-                           alpha=0.5, s=20, c=df['demand'], 
-                           cmap='viridis', edgecolors='black', linewidth=0.5)
+        if len(df) > DENSITY_THRESHOLD:
+            # Too many points to stroke one by one: show point density instead
+            scatter = plot_density(ax, df['temp'], df['demand'])
+            colorbar_label = 'Days per cell'
+        else:
+            scatter = ax.scatter(df['temp'], df['demand'], 
+                               alpha=0.5, s=20, c=df['demand'], 
+                               cmap='viridis', edgecolors='black', linewidth=0.5)
+            colorbar_label = 'Demand (MU)'
         
         # Calculate correlation
         correlation = df['temp'].corr(df['demand'])
@@ -144,7 +152,7 @@ def plot_temperature_correlation(df, output_dir):
         ax.set_ylabel('Energy Required (MU)', fontsize=12)
         ax.grid(True, alpha=0.3)
         
-        plt.colorbar(scatter, ax=ax, label='Demand (MU)')
+        plt.colorbar(scatter, ax=ax, label=colorbar_label)
         
         plt.tight_layout()
         plt.savefig(f"{output_dir}/05_temperature_correlation.png", dpi=300, bbox_inches='tight')
@@ -246,20 +254,8 @@ def generate_summary_statistics(df, output_dir):
     print("[OK] Saved: summary_statistics.txt")
     return stats
 
-if __name__ == "__main__":
-    import os
-    
-    print("="*60)
-    print("AP ELECTRICITY DEMAND - EXPLORATORY DATA ANALYSIS")
-    print("="*60)
-    
-    # Load data
-    df = load_prepared_data()
-    
-    # Create output directory
-    output_dir = create_output_dir()
-    
-    # Generate all visualizations
+def create_all_visualizations(df, output_dir):
+    """Generate every EDA chart and the summary statistics report into output_dir"""
     print("\n" + "="*60)
     print("GENERATING VISUALIZATIONS")
     print("="*60 + "\n")
@@ -276,7 +272,23 @@ if __name__ == "__main__":
     print("\n" + "="*60)
     print("GENERATING SUMMARY STATISTICS")
     print("="*60 + "\n")
-    stats = generate_summary_statistics(df, output_dir)
+    return generate_summary_statistics(df, output_dir)
+
+if __name__ == "__main__":
+    import os
+    
+    print("="*60)
+    print("AP ELECTRICITY DEMAND - EXPLORATORY DATA ANALYSIS")
+    print("="*60)
+    
+    # Load data
+    df = load_prepared_data()
+    
+    # Create output directory
+    output_dir = create_output_dir()
+    
+    # Generate all visualizations
+    stats = create_all_visualizations(df, output_dir)
     
     print("\n" + "="*60)
     print("EDA COMPLETE!")
@@ -1,14 +1,27 @@
 """
 Machine Learning Forecasting for AP Electricity Demand
-Implements Prophet and XGBoost models for time-series forecasting
+Implements Prophet and XGBoost models for time-series forecasting, with a
+tier of vectorized baselines (baselines.py) to screen series cheaply first
 """
 
+import os
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import warnings
+from features import create_lag_features, recursive_forecast
+from scenarios import build_climatology, climatology_for_dates
+from calendar_index import load_calendar, proximity_features, CALENDAR_FEATURES
+import forecast_store
+from baselines import forecast_panel, screen, FORECAST_COLUMNS
+from reconcile import reconcile_forecasts, HIERARCHY_LEVELS
+from prophet_fast import extract_params, save_params, fast_predict, PARAMS_PATH
+from weather_features import load_or_build, future_weather
 warnings.filterwarnings('ignore')
 
+# Fitted models and scoring parameters; stages pass a staging folder instead
+MODEL_DIR = "models"
+
 try:
     from prophet import Prophet
     PROPHET_AVAILABLE = True
@@ -17,8 +30,12 @@ except ImportError:
     print("[WARNING] Prophet not installed. Install with: pip install prophet")
 
 try:
-    from xgboost import XGBRegressor
     from sklearn.metrics import mean_absolute_error, mean_squared_error
+    from xgboost_incremental import (fit_full, fit_or_update, save_model, load_meta,
+                                     MODEL_PATH, META_PATH)
+    from xgboost_attributions import load_or_explain, attribution_calendar, ATTRIBUTION_PATH
+    from xgboost_intervals import (fit_quantile_model, quantile_forecast,
+                                   blend_forecasts, inverse_mae_weights)
     XGBOOST_AVAILABLE = True
 except ImportError:
     XGBOOST_AVAILABLE = False
@@ -31,10 +48,19 @@ def load_prepared_data(file_path="data/prepared_data.csv"):
     print(f"[OK] Loaded {len(df)} rows")
     return df
 
-def prophet_forecast(df, periods=365):
+def prophet_forecast(df, periods=365, fast=True, calendar=None, weather=False,
+                     params_path=PARAMS_PATH):
     """
     Forecast using Facebook Prophet
     periods: number of days to forecast ahead
+    fast: score with the extracted coefficients (prophet_fast.py) and analytic
+          intervals instead of model.predict's uncertainty sampling
+    calendar: optional holiday calendar (calendar_index.py) extending past the
+              forecast end; adds holiday-proximity regressors
+    weather: add the weather feature store's degree-day, heat and rain
+             regressors (weather_features.py); future days follow climatology.
+             A dict instead of True is passed on to load_or_build
+    params_path: where the extracted scoring parameters are saved
     """
     if not PROPHET_AVAILABLE:
         print("[WARNING] Prophet not available. Skipping Prophet forecast.")
@@ -67,6 +93,25 @@ def prophet_forecast(df, periods=365):
         model.add_regressor('temp')
         print("[OK] Added temperature as external regressor")
     
+    if calendar is not None:
+        prophet_df = prophet_df.join(
+            proximity_features(calendar, prophet_df['ds']).reset_index(drop=True))
+        for col in CALENDAR_FEATURES:
+            model.add_regressor(col)
+        print("[OK] Added holiday proximity regressors")
+    
+    if weather:
+        weather_frame = load_or_build(df, **(weather if isinstance(weather, dict) else {}))
+        weather_frame = weather_frame[~weather_frame.index.duplicated()]
+        # Regressors must vary; e.g. heating degree days can be zero all year
+        weather_columns = [c for c in weather_frame.columns if weather_frame[c].nunique() > 1]
+        # Days before the first full window borrow the first complete value
+        weather_frame = weather_frame[weather_columns].bfill()
+        prophet_df = prophet_df.join(weather_frame, on='ds')
+        for col in weather_columns:
+            model.add_regressor(col)
+        print(f"[OK] Added {len(weather_columns)} weather regressors")
+    
     model.fit(prophet_df)
     print("[OK] Model trained successfully")
     
@@ -75,14 +120,31 @@ def prophet_forecast(df, periods=365):
     
     # Add temperature to future if available
     if 'temp' in df.columns:
-        # Use last known temperature or average for future dates
-        last_temp = df['temp'].iloc[-1]
+        # Use the seasonal temperature climatology for future dates
         future = future.merge(temp_data, on='ds', how='left')
-        future['temp'] = future['temp'].fillna(last_temp)
+        missing = future['temp'].isna()
+        future.loc[missing, 'temp'] = climatology_for_dates(
+            build_climatology(df), future.loc[missing, 'ds'])
+    
+    if calendar is not None:
+        future = future.join(proximity_features(calendar, future['ds']).reset_index(drop=True))
+    
+    if weather:
+        ahead = future.loc[future['ds'] > df.index.max(), 'ds']
+        upcoming = future_weather(df, ahead)
+        ahead_weather = pd.DataFrame({col: upcoming[col][0] for col in weather_columns},
+                                     index=pd.DatetimeIndex(ahead))
+        future = future.join(pd.concat([weather_frame, ahead_weather]), on='ds')
     
     # Make predictions
     print(f"Generating forecast for next {periods} days...")
-    forecast = model.predict(future)
+    if fast:
+        params = extract_params(model)
+        save_params(params, params_path)
+        regressors = {col: future[col] for col in future.columns if col != 'ds'}
+        forecast = fast_predict(params, future['ds'], regressors, interval='approx', components=True)
+    else:
+        forecast = model.predict(future)
     
     print("[OK] Forecast complete")
     
@@ -120,49 +182,33 @@ def plot_prophet_components(model, forecast, output_path="dashboards/visualizati
     plt.close()
     print(f"[OK] Saved: {output_path}")
 
-def xgboost_forecast(df, forecast_days=30):
+def xgboost_forecast(df, forecast_days=30, mode='full', calendar=None, intervals=True,
+                     weather=False, model_path=None, meta_path=None):
     """
     Forecast using XGBoost with lag features
     forecast_days: number of days to forecast ahead
+    mode: 'full' retrains from scratch, 'update' continues boosting the
+          persisted model on new data (full refit if error drifts)
+    calendar: optional holiday calendar (calendar_index.py) adding
+              holiday-proximity features
+    intervals: add calibrated 80% bounds from a quantile booster (xgboost_intervals.py)
+    weather: add the weather feature store's degree-day, heat and rain features
+             (a dict of load_or_build options instead of True, as above)
+    model_path / meta_path: where the trained booster is saved; update mode
+                            always starts from the live model in models/
+    Returns (model, test actuals and predictions, forecast, fitted values over the history)
     """
     if not XGBOOST_AVAILABLE:
         print("[WARNING] XGBoost not available. Skipping XGBoost forecast.")
-        return None, None, None
+        return None, None, None, None
     
     print("\n" + "="*60)
     print("XGBOOST FORECASTING MODEL")
     print("="*60)
     
-    # Create a copy for feature engineering
-    df_ml = df.copy()
-    
-    # Feature engineering - create lag features
+    # Feature engineering - lag, rolling and time-based features
     print("Creating lag features...")
-    df_ml['lag_1'] = df_ml['demand'].shift(1)
-    df_ml['lag_7'] = df_ml['demand'].shift(7)  # Weekly lag
-    df_ml['lag_30'] = df_ml['demand'].shift(30)  # Monthly lag
-    
-    # Rolling statistics
-    df_ml['rolling_mean_7'] = df_ml['demand'].rolling(window=7).mean()
-    df_ml['rolling_mean_30'] = df_ml['demand'].rolling(window=30).mean()
-    df_ml['rolling_std_7'] = df_ml['demand'].rolling(window=7).std()
-    
-    # Time-based features
-    df_ml['year'] = df_ml.index.year
-    df_ml['month'] = df_ml.index.month
-    df_ml['day_of_year'] = df_ml.index.dayofyear
-    df_ml['day_of_week'] = df_ml.index.dayofweek
-    
-    # Add temperature if available
-    features = ['lag_1', 'lag_7', 'lag_30', 'rolling_mean_7', 
-                'rolling_mean_30', 'rolling_std_7',
-                'year', 'month', 'day_of_year', 'day_of_week']
-    
-    if 'temp' in df_ml.columns:
-        features.append('temp')
-    
-    # Remove rows with NaN (from lag features)
-    df_ml = df_ml.dropna()
+    df_ml, features = create_lag_features(df, calendar, weather=weather)
     
     # Split into train and test
     train_size = len(df_ml) - forecast_days
@@ -177,15 +223,13 @@ def xgboost_forecast(df, forecast_days=30):
     X_test = test[features]
     y_test = test['demand']
     
-    # Train XGBoost model
-    print("Training XGBoost model...")
-    model = XGBRegressor(
-        n_estimators=100,
-        max_depth=6,
-        learning_rate=0.1,
-        random_state=42
-    )
-    model.fit(X_train, y_train)
+    # Train XGBoost model (or continue boosting the persisted one)
+    if mode == 'update':
+        print("Updating persisted XGBoost model...")
+        model, status = fit_or_update(train, features)
+    else:
+        print("Training XGBoost model...")
+        model, status = fit_full(X_train, y_train), 'full'
     print("[OK] Model trained successfully")
     
     # Make predictions on test set
@@ -197,6 +241,8 @@ def xgboost_forecast(df, forecast_days=30):
     train_rmse = np.sqrt(mean_squared_error(y_train, train_predictions))
     test_mae = mean_absolute_error(y_test, test_predictions)
     test_rmse = np.sqrt(mean_squared_error(y_test, test_predictions))
+    test_mape = float(np.mean(np.abs(y_test - test_predictions) / y_test) * 100)
+    metrics = {'test_mae': test_mae, 'test_rmse': test_rmse, 'test_mape': test_mape}
     
     print(f"\nModel Performance:")
     print(f"  Train MAE: {train_mae:.2f} MU")
@@ -204,66 +250,51 @@ def xgboost_forecast(df, forecast_days=30):
     print(f"  Test MAE: {test_mae:.2f} MU")
     print(f"  Test RMSE: {test_rmse:.2f} MU")
     print(f"  Test MAE %: {(test_mae / y_test.mean() * 100):.2f}%")
+    print(f"  Test MAPE: {test_mape:.2f}%")
+    
+    # Persist the booster; the drift baseline only moves on a full fit
+    if status == 'full':
+        save_model(model, train.index[-1], test_mae, len(train), mode=status,
+                   model_path=model_path or MODEL_PATH, meta_path=meta_path or META_PATH,
+                   metrics=metrics)
+    elif status == 'update':
+        meta = load_meta(meta_path or META_PATH)
+        save_model(model, train.index[-1], meta['baseline_mae'], len(train), mode=status,
+                   model_path=model_path or MODEL_PATH, meta_path=meta_path or META_PATH,
+                   metrics=metrics)
     
     # Generate future forecast
     print(f"\nGenerating forecast for next {forecast_days} days...")
-    future_forecast = []
-    last_data = df_ml.iloc[-1:].copy()
-    
-    for i in range(forecast_days):
-        # Prepare features for next day
-        next_date = df_ml.index[-1] + pd.Timedelta(days=i+1)
-        next_row = last_data.copy()
-        next_row.index = [next_date]
-        
-        # Update lag features (use previous predictions)
-        if i == 0:
-            next_row['lag_1'] = df_ml['demand'].iloc[-1]
-        else:
-            next_row['lag_1'] = future_forecast[-1]
-        
-        if i < 7:
-            next_row['lag_7'] = df_ml['demand'].iloc[-(7-i)]
-        else:
-            next_row['lag_7'] = future_forecast[i-7]
-        
-        if i < 30:
-            next_row['lag_30'] = df_ml['demand'].iloc[-(30-i)]
-        else:
-            next_row['lag_30'] = future_forecast[i-30]
-        
-        # Update rolling features (simplified - use recent average)
-        next_row['rolling_mean_7'] = df_ml['demand'].tail(7).mean()
-        next_row['rolling_mean_30'] = df_ml['demand'].tail(30).mean()
-        next_row['rolling_std_7'] = df_ml['demand'].tail(7).std()
-        
-        # Update time features
-        next_row['year'] = next_date.year
-        next_row['month'] = next_date.month
-        next_row['day_of_year'] = next_date.dayofyear
-        next_row['day_of_week'] = next_date.dayofweek
-        
-        # Predict
-        X_next = next_row[features]
-        prediction = model.predict(X_next)[0]
-        future_forecast.append(prediction)
-        
-        # Update for next iteration
-        next_row['demand'] = prediction
-        last_data = next_row
-    
-    # Create forecast dataframe
-    future_dates = pd.date_range(start=df_ml.index[-1] + pd.Timedelta(days=1), 
+    future_dates = pd.date_range(start=df_ml.index[-1] + pd.Timedelta(days=1),
                                  periods=forecast_days, freq='D')
-    forecast_df = pd.DataFrame({
-        'date': future_dates,
-        'forecast': future_forecast
-    })
-    forecast_df.set_index('date', inplace=True)
+    future_temp = None
+    if 'temp' in features:
+        future_temp = climatology_for_dates(build_climatology(df), future_dates)[None, :]
+    future_exog = None
+    if calendar is not None:
+        future_exog = proximity_features(calendar, future_dates)
+    
+    # Create forecast dataframe (same schema as the Prophet forecast); with
+    # intervals, one recursive pass of the quantile booster gives yhat (its
+    # median) and the bounds
+    if intervals:
+        print("Fitting quantile model for forecast intervals...")
+        quantile_model, adjustment = fit_quantile_model(train, features, horizon=forecast_days)
+        forecast_df = quantile_forecast(quantile_model, adjustment, df_ml, features, future_dates,
+                                        future_temp, future_exog)
+    else:
+        future_forecast = recursive_forecast(model, df_ml, features, future_dates,
+                                             future_temp, future_exog)[0]
+        forecast_df = pd.DataFrame({'ds': future_dates, 'yhat': future_forecast})
+    forecast_df.set_index('ds', inplace=True)
+    
+    # One-step predictions over the history, for residual-based anomaly scoring
+    fitted_df = pd.DataFrame({'yhat': np.concatenate([train_predictions, test_predictions])},
+                             index=pd.Index(df_ml.index, name='ds'))
     
     print("[OK] Forecast complete")
     
-    return model, (test.index, y_test, test_predictions), forecast_df
+    return model, (test.index, y_test, test_predictions), forecast_df, fitted_df
 
 def plot_xgboost_results(test_data, forecast_df, output_path="dashboards/visualizations/10_xgboost_forecast.png"):
     """Plot XGBoost forecast results"""
@@ -285,8 +316,11 @@ def plot_xgboost_results(test_data, forecast_df, output_path="dashboards/visuali
     
     # Plot future forecast
     if forecast_df is not None:
-        ax.plot(forecast_df.index, forecast_df['forecast'], 
+        ax.plot(forecast_df.index, forecast_df['yhat'], 
                 label='Future Forecast', linewidth=2, color='#F18F01', linestyle=':', marker='^', markersize=3)
+        if 'yhat_lower' in forecast_df.columns:
+            ax.fill_between(forecast_df.index, forecast_df['yhat_lower'], forecast_df['yhat_upper'],
+                            color='#F18F01', alpha=0.2, label='80% Interval')
     
     ax.set_title('XGBoost Forecast: AP Electricity Demand', 
                  fontsize=16, fontweight='bold', pad=20)
@@ -306,8 +340,169 @@ def save_forecast_results(forecast_df, output_path="data/forecast_results.csv"):
         forecast_df.to_csv(output_path)
         print(f"[OK] Saved forecast results to {output_path}")
 
+def record_forecast_run(model_name, df, forecast, store_path=forecast_store.DB_PATH):
+    """Log a forecast run in the accuracy store and score it as actuals arrive"""
+    forecast_store.add_actuals(df['demand'], store_path)
+    forecast_store.record_forecast(model_name, df.index.max(), forecast, store_path)
+
+def run_baseline_stage(df, data_dir="data", forecast_days=30, group=None,
+                       store_path=forecast_store.DB_PATH):
+    """
+    Backtest the vectorized baselines and save the best one's forecast
+    group: column identifying separate series; every series is handled in one pass
+    store_path: accuracy store the run is recorded in
+    """
+    # Repeated dates with the same demand are one day listed twice (two holidays)
+    repeated = df.loc[df.index.duplicated(keep=False), 'demand']
+    if group is None and repeated.groupby(level=0).nunique().gt(1).any():
+        raise ValueError("Several series per date (e.g. one per region); pass group= so each "
+                         "series is forecast on its own instead of collapsed into one")
+    
+    print("\n" + "="*60)
+    print("BASELINE FORECASTS")
+    print("="*60)
+    
+    forecasts, scores = forecast_panel(df, group=group, horizon=forecast_days)
+    print(f"Backtest MAE (MU) over the last {forecast_days} days:")
+    print(scores.round(2).to_string())
+    hard = screen(scores)
+    print(f"[OK] {len(scores) - len(hard)} of {len(scores)} series within the baseline "
+          f"error budget; {len(hard)} need Prophet/XGBoost")
+    
+    path = f"{data_dir}/baseline_forecast.csv"
+    if group:
+        forecasts.to_csv(path, index=False)
+    else:
+        forecasts[FORECAST_COLUMNS].set_index('ds').to_csv(path)
+    print(f"[OK] Saved baseline forecast to {path}")
+    if not group:
+        record_forecast_run('baseline', df, forecasts[FORECAST_COLUMNS], store_path)
+    return scores
+
+def run_reconciliation_stage(df, data_dir="data", forecast_days=30, method='mint'):
+    """
+    Coherent forecasts for the state total and every zone/region of a regional feed
+    df: prepared data with a 'region' column (and optionally 'zone')
+    """
+    levels = [c for c in HIERARCHY_LEVELS if c in df.columns]
+    reconciled = reconcile_forecasts(df, levels, horizon=forecast_days, method=method)
+    reconciled.to_csv(f"{data_dir}/reconciled_forecast.csv", index=False)
+    print(f"[OK] Saved {method} reconciled forecast for {reconciled['node'].nunique()} "
+          f"nodes to {data_dir}/reconciled_forecast.csv")
+    return reconciled
+
+def run_prophet_stage(df, data_dir="data", viz_dir="dashboards/visualizations", periods=1000,
+                      holidays=False, weather=True, model_dir=MODEL_DIR,
+                      store_path=forecast_store.DB_PATH):
+    """
+    Fit Prophet, render its charts and save the forecast files into the given folders
+    holidays: add holiday-proximity regressors from data/data.csv
+    weather: add degree-day, heat and rain regressors (weather_features.py)
+    model_dir / store_path: where the scoring parameters are saved and the run recorded
+    """
+    if not PROPHET_AVAILABLE:
+        print("\n[WARNING] Install Prophet to use: pip install prophet")
+        return None
+    
+    calendar = None
+    if holidays:
+        calendar = load_calendar(end=df.index.max() + pd.Timedelta(days=periods))
+    model_prophet, forecast_prophet = prophet_forecast(
+        df, periods=periods, calendar=calendar, weather=weather,
+        params_path=os.path.join(model_dir, os.path.basename(PARAMS_PATH)))
+    if model_prophet is None:
+        return None
+    
+    plot_prophet_forecast(model_prophet, forecast_prophet, f"{viz_dir}/08_prophet_forecast.png")
+    plot_prophet_components(model_prophet, forecast_prophet, f"{viz_dir}/09_prophet_components.png")
+    
+    # Save forecast
+    forecast_prophet_df = forecast_prophet[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(periods)
+    forecast_prophet_df.set_index('ds', inplace=True)
+    forecast_prophet_df.to_csv(f"{data_dir}/prophet_forecast.csv")
+    print(f"[OK] Saved Prophet forecast to {data_dir}/prophet_forecast.csv")
+    
+    # Save in-sample fit (used to score residuals for anomaly detection)
+    fitted_prophet_df = forecast_prophet[['ds', 'yhat']].iloc[:-periods]
+    fitted_prophet_df.set_index('ds', inplace=True)
+    fitted_prophet_df.to_csv(f"{data_dir}/prophet_fitted.csv")
+    print(f"[OK] Saved Prophet in-sample fit to {data_dir}/prophet_fitted.csv")
+    
+    record_forecast_run('prophet', df, forecast_prophet_df.reset_index(), store_path)
+    
+    return model_prophet
+
+def run_xgboost_stage(df, data_dir="data", viz_dir="dashboards/visualizations", mode='full',
+                      holidays=False, forecast_days=30, weather=True, model_dir=MODEL_DIR,
+                      store_path=forecast_store.DB_PATH):
+    """
+    Fit XGBoost, render its chart and save the forecast file into the given folders
+    holidays: add holiday-proximity features from data/data.csv
+    weather: add degree-day, heat and rain features (weather_features.py)
+    model_dir / store_path: where the booster is saved and the run recorded
+    """
+    if not XGBOOST_AVAILABLE:
+        print("\n[WARNING] Install XGBoost to use: pip install xgboost scikit-learn")
+        return None
+    
+    calendar = None
+    if holidays:
+        calendar = load_calendar(end=df.index.max() + pd.Timedelta(days=forecast_days))
+    model_xgb, test_data, forecast_xgb, fitted_xgb = xgboost_forecast(
+        df, forecast_days=forecast_days, mode=mode, calendar=calendar, weather=weather,
+        model_path=os.path.join(model_dir, os.path.basename(MODEL_PATH)),
+        meta_path=os.path.join(model_dir, os.path.basename(META_PATH)))
+    if model_xgb is not None:
+        plot_xgboost_results(test_data, forecast_xgb, f"{viz_dir}/10_xgboost_forecast.png")
+        save_forecast_results(forecast_xgb, f"{data_dir}/xgboost_forecast.csv")
+        fitted_xgb.to_csv(f"{data_dir}/xgboost_fitted.csv")
+        print(f"[OK] Saved XGBoost fit to {data_dir}/xgboost_fitted.csv")
+        
+        # Attributions are computed here so the dashboard only reads them; an
+        # unchanged model was not re-saved, so explain the live one
+        model_path = os.path.join(model_dir, os.path.basename(MODEL_PATH))
+        meta_path = os.path.join(model_dir, os.path.basename(META_PATH))
+        if not os.path.exists(model_path):
+            model_path, meta_path = MODEL_PATH, META_PATH
+        load_or_explain(df, attribution_calendar(df), forecast_days, model_path, meta_path,
+                        weather_options=weather if isinstance(weather, dict) else None,
+                        output_path=os.path.join(model_dir, os.path.basename(ATTRIBUTION_PATH)))
+        record_forecast_run('xgboost', df, forecast_xgb.reset_index(), store_path)
+    
+    return model_xgb
+
+def run_ensemble_stage(df, data_dir="data", prophet_path="data/prophet_forecast.csv",
+                       xgboost_path="data/xgboost_forecast.csv",
+                       store_path=forecast_store.DB_PATH):
+    """
+    Blend the saved Prophet and XGBoost forecasts over their common horizon
+    Weights follow tracked accuracy (inverse MAE) in the live store, equal until
+    runs are scored; the ensemble run itself is recorded in store_path
+    """
+    if not (os.path.exists(prophet_path) and os.path.exists(xgboost_path)):
+        print("\n[WARNING] Run the Prophet and XGBoost stages before blending")
+        return None
+    
+    forecasts = {name: forecast_store.load_forecast(path)
+                 for name, path in (('prophet', prophet_path), ('xgboost', xgboost_path))}
+    weights = inverse_mae_weights(list(forecasts))
+    ensemble = blend_forecasts(forecasts, weights)
+    
+    ensemble.set_index('ds').to_csv(f"{data_dir}/ensemble_forecast.csv")
+    print(f"[OK] Saved ensemble forecast to {data_dir}/ensemble_forecast.csv "
+          f"(weights: {', '.join(f'{k} {v:.2f}' for k, v in weights.items())})")
+    record_forecast_run('ensemble', df, ensemble, store_path)
+    return ensemble
+
 if __name__ == "__main__":
-    import os
+    import sys
+    
+    # 'python 03_ml_forecasting.py --update' continues boosting the saved XGBoost model
+    xgb_mode = 'update' if '--update' in sys.argv else 'full'
+    # '--holidays' adds holiday-proximity features from data/data.csv to both models
+    holidays = '--holidays' in sys.argv
+    # '--no-weather' leaves out the weather feature store (temperature only)
+    weather = '--no-weather' not in sys.argv
     
     print("="*60)
     print("AP ELECTRICITY DEMAND - MACHINE LEARNING FORECASTING")
@@ -319,34 +514,26 @@ if __name__ == "__main__":
     # Load data
     df = load_prepared_data()
     
+    # Cheap baselines first: a reference the heavier models should beat
+    run_baseline_stage(df, group='region' if 'region' in df.columns else None)
+    
+    # Regional feeds: make the region forecasts add up to the state total
+    if 'region' in df.columns:
+        run_reconciliation_stage(df)
+    
     # Prophet Forecast
-    if PROPHET_AVAILABLE:
-        # Forecast until end of 2025
-        # Current data ends May 2023.
-        # Days to end of 2023 (~230) + 2024 (366) + 2025 (365) ~= 961 days
-        # Let's forecast 1000 days to be safe
-        periods = 1000
-        model_prophet, forecast_prophet = prophet_forecast(df, periods=periods)
-        if model_prophet is not None:
-            plot_prophet_forecast(model_prophet, forecast_prophet)
-            plot_prophet_components(model_prophet, forecast_prophet)
-            
-            # Save forecast
-            forecast_prophet_df = forecast_prophet[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(periods)
-            forecast_prophet_df.set_index('ds', inplace=True)
-            forecast_prophet_df.to_csv("data/prophet_forecast.csv")
-            print("[OK] Saved Prophet forecast to data/prophet_forecast.csv")
-    else:
-        print("\n[WARNING] Install Prophet to use: pip install prophet")
+    # Forecast until end of 2025
+    # Current data ends May 2023.
+    # Days to end of 2023 (~230) + 2024 (366) + 2025 (365) ~= 961 days
+    # Let's forecast 1000 days to be safe
+    run_prophet_stage(df, periods=1000, holidays=holidays, weather=weather)
     
     # XGBoost Forecast
-    if XGBOOST_AVAILABLE:
-        model_xgb, test_data, forecast_xgb = xgboost_forecast(df, forecast_days=30)
-        if model_xgb is not None:
-            plot_xgboost_results(test_data, forecast_xgb)
-            save_forecast_results(forecast_xgb, "data/xgboost_forecast.csv")
-    else:
-        print("\n[WARNING] Install XGBoost to use: pip install xgboost scikit-learn")
+    run_xgboost_stage(df, mode=xgb_mode, holidays=holidays, weather=weather)
+    
+    # Prophet + XGBoost ensemble over the XGBoost horizon
+    if PROPHET_AVAILABLE and XGBOOST_AVAILABLE:
+        run_ensemble_stage(df)
     
     print("\n" + "="*60)
     print("FORECASTING COMPLETE!")
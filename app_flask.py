@@ -2,7 +2,7 @@
 Andhra Pradesh Electricity Demand Analysis - Flask Application
 """
 
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, request, make_response, g
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -13,16 +13,40 @@ import io
 import base64
 from PIL import Image
 import os
+import glob
+import gzip
+import hashlib
+from functools import wraps, partial
+from collections import OrderedDict
 from prophet import Prophet
 import warnings
 import webbrowser
-from threading import Timer
+from threading import Timer, Lock
+from anomaly_detection import load_expected_demand, detect_anomalies, summarize_anomalies
+import jobs
+import forecast_store
+import scenarios
+from calendar_index import load_calendar
+from prophet_fast import load_params
+from xgboost_incremental import load_model, load_meta
+from xgboost_attributions import load_attributions, attribution_calendar, summarize_attributions
+import sketches
+import partitions
+from density_plot import plot_line
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
 
 warnings.filterwarnings('ignore')
 
 # Initialize Flask app
 app = Flask(__name__, template_folder='templates', static_folder='static')
 app.config['JSON_SORT_KEYS'] = False
+# Cache rendered pages per data version (set False to measure the uncached app)
+app.config['RESPONSE_CACHE'] = True
 
 # Configure matplotlib with professional classic styling
 plt.style.use('default')
@@ -50,6 +74,44 @@ plt.rcParams['text.color'] = '#1e293b'
 
 _cache = {}
 
+# Files the dashboard reads; background jobs replace each one atomically (one at a time)
+DATA_FILES = [
+    'data/prepared_data.csv',
+    'data/prophet_forecast.csv',
+    'data/prophet_fitted.csv',
+    'data/xgboost_forecast.csv',
+    'data/xgboost_fitted.csv',
+    'data/ensemble_forecast.csv',
+    'data/baseline_forecast.csv',
+    'data/forecast_store.db',
+    'data/forecast_store.db-wal',
+    'models/prophet_params.json',
+    'models/xgboost_model.json',
+    'data/percentile_sketches.json',
+    'models/xgboost_attributions.json',
+    'data/data.csv'
+]
+
+def data_version():
+    """Fingerprint of the data files and charts (changes whenever a job publishes new artifacts)"""
+    stamps = []
+    for path in DATA_FILES + sorted(glob.glob('dashboards/visualizations/*.png')):
+        try:
+            stat = os.stat(path)
+            stamps.append(f"{stat.st_mtime_ns}-{stat.st_size}")
+        except FileNotFoundError:
+            stamps.append('-')
+    return '|'.join(stamps)
+
+@app.before_request
+def refresh_cache():
+    """Drop cached frames when a background job has published new data"""
+    version = data_version()
+    g.data_version = version
+    if _cache.get('version') != version:
+        _cache.clear()
+        _cache['version'] = version
+
 def load_data():
     """Load prepared dataset with caching"""
     if 'data' not in _cache:
@@ -72,29 +134,157 @@ def get_prophet_forecast():
             return None
     return _cache['prophet_forecast']
 
+def forecast_rows(name):
+    """Row count of a forecast, from its partition index (the CSV while that is stale)"""
+    index = partitions.current_index(name)
+    if index is not None:
+        return sum(entry['rows'] for entry in index['partitions'].values())
+    forecast = get_prophet_forecast() if name == 'prophet_forecast' else get_xgboost_forecast()
+    return None if forecast is None else len(forecast)
+
+def yearly_forecast_mean(year):
+    """Mean Prophet forecast over one year, read from that year's partitions only"""
+    year_forecast = partitions.read_range('prophet_forecast', f"{year}-01-01", f"{year}-12-31",
+                                          columns=['yhat'])
+    if year_forecast is None:
+        forecast = get_prophet_forecast()
+        if forecast is None:
+            return 0
+        year_forecast = forecast[forecast['ds'].dt.year == year]
+    if len(year_forecast) == 0:
+        return 0
+    return float(year_forecast['yhat'].mean())
+
 def get_xgboost_forecast():
-    """Load XGBoost forecast with caching"""
+    """Load XGBoost forecast with caching (None when missing or not a forecast file)"""
     if 'xgboost_forecast' not in _cache:
         try:
-            df = pd.read_csv('data/xgboost_forecast.csv', index_col=0, parse_dates=True)
+            df = forecast_store.load_forecast('data/xgboost_forecast.csv').set_index('ds')
             _cache['xgboost_forecast'] = df
         except FileNotFoundError:
             return None
+        except ValueError as e:
+            print(f"[WARNING] {e}")
+            return None
     return _cache['xgboost_forecast']
 
-def get_data_summary(df):
+def weather_options():
+    """
+    Weather feature store options for request handlers: keyed on the data
+    version (no rehash of the frame) and never written to disk
+    """
+    return {'version': g.get('data_version') or data_version(), 'save': False}
+
+def xgboost_metrics(rolling_accuracy):
+    """
+    XGBoost error for the forecasting page: tracked accuracy once its runs are
+    scored against actuals, otherwise the holdout test of the last fit
+    """
+    tracked = next((row for row in rolling_accuracy if row['model'] == 'xgboost'), None)
+    if tracked is not None:
+        return {'mae': tracked['mae'], 'mape': tracked['mape'], 'source': 'last 90 days'}
+    meta = load_meta()
+    if meta is None or 'test_mape' not in meta:
+        return None
+    return {'mae': meta['test_mae'], 'mape': meta['test_mape'], 'source': 'holdout test'}
+
+def get_attributions():
+    """
+    XGBoost forecast attributions saved by the XGBoost stage, or (None, None)
+    when they are missing or were computed for another model, data or calendar
+    """
+    if 'attributions' not in _cache:
+        df = load_data()
+        if df is None:
+            return None, None
+        _cache['attributions'] = load_attributions(df, attribution_calendar(df))
+    return _cache['attributions']
+
+def get_sketches():
+    """
+    Per-bucket demand quantile sketches built by the data refresh stage; days
+    they do not cover yet are added in memory only, read from the partitions
+    after the sketches' last date (the loaded frame while they are stale)
+    """
+    if 'sketches' not in _cache:
+        index = partitions.current_index('prepared_data')
+        if index is None or not index['partitions']:
+            df = load_data()
+            if df is None:
+                return None
+            _cache['sketches'], _ = sketches.covering_store(df)
+            return _cache['sketches']
+        
+        entries = list(index['partitions'].values())
+        store = sketches.load_store()
+        if store is None or store['first_date'] != entries[0]['start'] \
+                or store['last_date'] > entries[-1]['end']:
+            store, start = sketches.new_store(), None
+        else:
+            start = pd.Timestamp(store['last_date']) + pd.Timedelta(days=1)
+        recent = partitions.read_range('prepared_data', start, columns=['demand'])
+        sketches.update_store(store, recent['demand'])
+        _cache['sketches'] = store
+    return _cache['sketches']
+
+def get_anomalies():
+    """Detect demand anomalies against model residuals with caching"""
+    if 'anomalies' not in _cache:
+        df = load_data()
+        if df is None:
+            return None
+        result = detect_anomalies(df, load_expected_demand())
+        _cache['anomalies'] = summarize_anomalies(result)
+    return _cache['anomalies']
+
+def describe_data():
+    """
+    Count, mean, std, min and max of each column: from the partition index
+    (no data file is opened), or the loaded frame while the partitions are stale
+    """
+    if 'described' not in _cache:
+        described = partitions.describe('prepared_data')
+        if described is None:
+            df = load_data()
+            if df is None:
+                return None
+            described = df.describe().loc[['count', 'mean', 'std', 'min', 'max']]
+        _cache['described'] = described
+    return _cache['described']
+
+def get_data_summary():
     """Pre-calculate data summaries"""
-    if df is None:
+    described = describe_data()
+    if described is None:
         return {}
+    demand = described['demand']
     return {
-        'mean': float(df['demand'].mean()),
-        'max': float(df['demand'].max()),
-        'min': float(df['demand'].min()),
-        'std': float(df['demand'].std()),
-        'median': float(df['demand'].median()),
-        'records': len(df)
+        'mean': float(demand['mean']),
+        'max': float(demand['max']),
+        'min': float(demand['min']),
+        'std': float(demand['std']),
+        'median': demand_median(),
+        'records': int(demand['count'])
     }
 
+def demand_median():
+    """Exact median demand; reads only the demand column unless the frame is already loaded"""
+    if 'median' not in _cache:
+        if 'data' in _cache:
+            demand = _cache['data']['demand']
+        else:
+            demand = pd.read_csv('data/prepared_data.csv', usecols=['demand'])['demand']
+        _cache['median'] = float(demand.median())
+    return _cache['median']
+
+def data_head(n=10):
+    """First rows of the prepared data, from the first partition(s) only"""
+    head = partitions.head('prepared_data', n)
+    if head is None:
+        df = load_data()
+        return None if df is None else df.head(n)
+    return head
+
 def load_visualization(filename):
     """Load visualization image"""
     path = f'dashboards/visualizations/{filename}'
@@ -126,8 +316,8 @@ def create_line_chart():
     fig = Figure(figsize=(12, 5), facecolor='white')
     ax = fig.subplots()
     
-    # Professional blue color
-    ax.plot(df.index, df['demand'], linewidth=2, color='#2563eb', alpha=0.9)
+    # Professional blue color; long histories are drawn as a min/max envelope
+    plot_line(ax, df.index, df['demand'], dpi=80, linewidth=2, color='#2563eb', alpha=0.9)
     
     ax.set_title('Electricity Demand Over Time (2015-2023)', 
                  fontsize=15, fontweight=600, color='#1e293b', pad=15)
@@ -141,32 +331,121 @@ def create_line_chart():
     
     return fig_to_base64(fig)
 
+# ============================================================================
+# RESPONSE CACHING
+# ============================================================================
+
+# Least recently used entries are evicted past MAX_CACHED_RESPONSES
+_response_cache = OrderedDict()
+_response_cache_lock = Lock()
+MAX_CACHED_RESPONSES = 256
+
+# Smaller bodies are not worth the compression overhead
+MIN_COMPRESS_BYTES = 500
+
+def choose_encoding():
+    """Best content encoding the client accepts: br, then gzip, else identity"""
+    accepted = request.accept_encodings
+    if BROTLI_AVAILABLE and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return 'identity'
+
+def compress(body, encoding):
+    """Compress a response body for the given encoding"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+def cached_response(view=None, query_args=()):
+    """
+    Serve a GET view from a cache keyed by route, query arguments and data version
+    Adds strong per-encoding ETags, answers If-None-Match with 304, and
+    compresses HTML/JSON once per encoding instead of on every hit
+    query_args: the arguments the view reads; only these enter the key (in a
+                fixed order), so unknown or reordered arguments share an entry
+    """
+    if view is None:
+        return partial(cached_response, query_args=query_args)
+    
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not app.config['RESPONSE_CACHE']:
+            return view(*args, **kwargs)
+        
+        version = g.get('data_version') or data_version()
+        params = tuple((name, tuple(request.args.getlist(name))) for name in query_args)
+        key = (request.path, params, version)
+        with _response_cache_lock:
+            entry = _response_cache.get(key)
+            if entry is not None:
+                _response_cache.move_to_end(key)
+        if entry is None:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            body = response.get_data()
+            entry = {
+                'body': body,
+                'mimetype': response.mimetype,
+                'etag': hashlib.sha256(body).hexdigest()[:32],
+                'encoded': {}
+            }
+            with _response_cache_lock:
+                # Entries for older data versions can never be hit again
+                for stale in [k for k in _response_cache if k[2] != version]:
+                    del _response_cache[stale]
+                entry = _response_cache.setdefault(key, entry)
+                while len(_response_cache) > MAX_CACHED_RESPONSES:
+                    _response_cache.popitem(last=False)
+        
+        encoding = choose_encoding() if len(entry['body']) >= MIN_COMPRESS_BYTES else 'identity'
+        etag = entry['etag'] if encoding == 'identity' else f"{entry['etag']}-{encoding}"
+        
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            body = entry['encoded'].get(encoding)
+            if body is None:
+                body = entry['encoded'].setdefault(encoding, compress(entry['body'], encoding))
+            response = app.response_class(body, mimetype=entry['mimetype'])
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        
+        response.set_etag(etag)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return wrapper
+
 # ============================================================================
 # ROUTES
 # ============================================================================
 
 @app.route('/')
+@cached_response
 def home():
     """Home page"""
-    df = load_data()
-    summary = get_data_summary(df) if df is not None else {}
-    
-    return render_template('home.html', summary=summary)
+    return render_template('home.html', summary=get_data_summary())
 
 @app.route('/data-overview')
+@cached_response
 def data_overview():
     """Data overview page"""
-    df = load_data()
-    if df is None:
+    described = describe_data()
+    if described is None:
         return render_template('error.html', message="Data not found")
     
-    summary = get_data_summary(df)
+    summary = get_data_summary()
     
     # Get data table (first 10 rows)
-    data_table = df.head(10).to_html(classes='table table-striped')
+    data_table = data_head(10).to_html(classes='table table-striped')
     
-    # Get statistics
-    stats = df.describe().to_html(classes='table table-striped')
+    # Get statistics (combined from the partition index)
+    stats = described.to_html(classes='table table-striped')
     
     return render_template('data_overview.html', 
                          summary=summary,
@@ -174,6 +453,7 @@ def data_overview():
                          stats=stats)
 
 @app.route('/visualizations')
+@cached_response
 def visualizations():
     """Visualizations page"""
     visualizations_data = {}
@@ -197,47 +477,71 @@ def visualizations():
     return render_template('visualizations.html', visualizations=visualizations_data)
 
 @app.route('/forecasting')
+@cached_response
 def forecasting():
     """ML Forecasting page"""
-    df = load_data()
-    prophet_forecast = get_prophet_forecast()
+    prophet_rows = forecast_rows('prophet_forecast')
     
     forecast_data = {
-        'summary': get_data_summary(df) if df is not None else {},
-        'prophet_available': prophet_forecast is not None,
+        'summary': get_data_summary(),
+        'prophet_available': prophet_rows is not None,
         'xgboost_available': get_xgboost_forecast() is not None
     }
     
-    if prophet_forecast is not None:
+    if prophet_rows is not None:
         forecast_data['prophet_stats'] = {
-            'count': len(prophet_forecast),
-            'avg_2024': float(prophet_forecast[prophet_forecast['ds'].dt.year == 2024]['yhat'].mean()) if len(prophet_forecast[prophet_forecast['ds'].dt.year == 2024]) > 0 else 0,
-            'avg_2025': float(prophet_forecast[prophet_forecast['ds'].dt.year == 2025]['yhat'].mean()) if len(prophet_forecast[prophet_forecast['ds'].dt.year == 2025]) > 0 else 0
+            'count': prophet_rows,
+            'avg_2024': yearly_forecast_mean(2024),
+            'avg_2025': yearly_forecast_mean(2025)
         }
     
+    # Accuracy of past forecast runs scored against actuals
+    if os.path.exists(forecast_store.DB_PATH):
+        forecast_data['rolling_accuracy'] = forecast_store.rolling_accuracy().to_dict('records')
+        forecast_data['horizon_accuracy'] = forecast_store.accuracy_by_horizon().to_dict('records')
+    forecast_data['xgboost_metrics'] = xgboost_metrics(forecast_data.get('rolling_accuracy', []))
+    
+    # What drives the XGBoost forecast (TreeSHAP contributions)
+    attributions, _ = get_attributions()
+    if attributions is not None:
+        forecast_data['drivers'] = summarize_attributions(attributions)
+    
     return render_template('forecasting.html', **forecast_data)
 
 @app.route('/insights')
+@cached_response
 def insights():
     """Insights page"""
-    df = load_data()
-    if df is None:
+    summary = get_data_summary()
+    if not summary:
         return render_template('error.html', message="Data not found")
     
-    summary = get_data_summary(df)
+    # Calculate growth (first and last partitions only, the loaded frame while they are stale)
+    first, last = partitions.edge_rows('prepared_data')
+    if first is None:
+        df = load_data()
+        first, last = df.iloc[0], df.iloc[-1]
+    growth = ((last['demand'] - first['demand']) / first['demand'] * 100)
     
-    # Calculate growth
-    growth = ((df['demand'].iloc[-1] - df['demand'].iloc[0]) / df['demand'].iloc[0] * 100)
-    
-    # Peak month
-    df['month'] = df.index.month
-    monthly_avg = df.groupby('month')['demand'].mean()
+    # Peak month, from the per-partition sums and counts in the index
+    stats = partitions.partition_stats('prepared_data', 'demand')
+    if stats is None:
+        df = load_data()
+        monthly_avg = df.groupby(df.index.month)['demand'].mean()
+    else:
+        stats = stats.groupby('month')[['sum', 'count']].sum()
+        monthly_avg = stats['sum'] / stats['count']
     peak_month_idx = monthly_avg.idxmax()
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
     peak_month = months[peak_month_idx - 1]
     
+    # Most recent flagged days first
+    anomalies = get_anomalies() or []
+    
     insights_data = {
         'summary': summary,
+        'anomalies': anomalies[::-1][:10],
+        'anomaly_count': len(anomalies),
         'growth': round(growth, 1),
         'peak_month': peak_month,
         'peak_value': round(monthly_avg.max(), 0),
@@ -248,13 +552,13 @@ def insights():
     return render_template('insights.html', **insights_data)
 
 @app.route('/api/data-stats')
+@cached_response
 def api_data_stats():
     """API endpoint for data statistics"""
-    df = load_data()
-    summary = get_data_summary(df)
-    return jsonify(summary)
+    return jsonify(get_data_summary())
 
 @app.route('/api/forecast-data')
+@cached_response
 def api_forecast_data():
     """API endpoint for forecast data"""
     prophet_forecast = get_prophet_forecast()
@@ -265,6 +569,149 @@ def api_forecast_data():
     data = prophet_forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].head(30).to_dict('records')
     return jsonify(data)
 
+@app.route('/api/anomalies')
+@cached_response(query_args=('direction',))
+def api_anomalies():
+    """API endpoint for flagged demand anomalies"""
+    anomalies = get_anomalies()
+    if anomalies is None:
+        return jsonify({'error': 'Data not available'}), 404
+    
+    # Optional ?direction=high|low filter
+    direction = request.args.get('direction')
+    if direction:
+        anomalies = [a for a in anomalies if a['direction'] == direction]
+    return jsonify(anomalies)
+
+# Scenarios are scored in the request thread, so requests are capped at the
+# dashboard's ensemble size
+MAX_SCENARIOS = 200
+
+@app.route('/api/scenarios')
+@cached_response(query_args=('model', 'delta', 'month', 'n'))
+def api_scenarios():
+    """
+    API endpoint for temperature what-if forecasts
+    ?delta=3&month=5&n=200&model=prophet|xgboost -> baseline and p10/p50/p90 bands
+    n is capped at MAX_SCENARIOS; the response reports the number scored
+    """
+    df = load_data()
+    name = request.args.get('model', 'prophet')
+    if df is None or name not in ('prophet', 'xgboost'):
+        return jsonify({'error': 'Data not available'}), 404
+    
+    try:
+        delta = float(request.args.get('delta', 3.0))
+        months = [int(m) for m in request.args.getlist('month')] or None
+        n_scenarios = min(max(int(request.args.get('n', MAX_SCENARIOS)), 1), MAX_SCENARIOS)
+    except ValueError:
+        return jsonify({'error': 'Invalid scenario parameters'}), 400
+    
+    # Only used when the saved models were fitted with holiday features
+    calendar = load_calendar(end=df.index.max() + pd.Timedelta(days=365))
+    if name == 'prophet':
+        params = load_params()
+        if params is None:
+            return jsonify({'error': 'Prophet model not available'}), 404
+        results = scenarios.run_scenarios(df, prophet_params=params, delta=delta, months=months,
+                                          n_scenarios=n_scenarios, calendar=calendar)
+    else:
+        model, _ = load_model()
+        if model is None:
+            return jsonify({'error': 'XGBoost model not available'}), 404
+        results = scenarios.run_scenarios(df, xgboost_model=model, delta=delta, months=months,
+                                          n_scenarios=n_scenarios, calendar=calendar,
+                                          weather_options=weather_options())
+    
+    bands = results[name]
+    bands['ds'] = bands['ds'].dt.strftime('%Y-%m-%d')
+    return jsonify({'model': name, 'delta': delta, 'months': months,
+                    'n_scenarios': n_scenarios, 'bands': bands.round(2).to_dict('records')})
+
+@app.route('/api/percentiles')
+@cached_response(query_args=('by', 'q'))
+def api_percentiles():
+    """
+    API endpoint for daily demand percentiles and peak-day counts
+    ?by=month|year|season|all&q=0.95&q=0.99 (defaults: p50, p95, p99)
+    """
+    store = get_sketches()
+    if store is None:
+        return jsonify({'error': 'Data not available'}), 404
+    
+    try:
+        quantiles = [float(q) for q in request.args.getlist('q')] or list(sketches.DEFAULT_QUANTILES)
+        if not all(0 <= q <= 1 for q in quantiles):
+            raise ValueError
+        return jsonify(sketches.percentiles(store, request.args.get('by', 'month'), quantiles))
+    except ValueError:
+        return jsonify({'error': 'Invalid percentile parameters'}), 400
+
+@app.route('/api/load-duration')
+@cached_response(query_args=('by', 'points'))
+def api_load_duration():
+    """
+    API endpoint for load-duration curves: demand exceeded on each share of days
+    ?by=all|month|year|season&points=101
+    """
+    store = get_sketches()
+    if store is None:
+        return jsonify({'error': 'Data not available'}), 404
+    
+    try:
+        points = min(max(int(request.args.get('points', 101)), 2), 1001)
+        return jsonify(sketches.load_duration(store, request.args.get('by', 'all'), points))
+    except ValueError:
+        return jsonify({'error': 'Invalid load-duration parameters'}), 400
+
+@app.route('/api/attributions')
+@cached_response(query_args=('days',))
+def api_attributions():
+    """
+    API endpoint for per-feature contributions to each XGBoost forecast day
+    ?days=7 limits the horizon; contributions plus bias add up to yhat
+    """
+    attributions, version = get_attributions()
+    if attributions is None:
+        return jsonify({'error': 'XGBoost model not available'}), 404
+    
+    try:
+        days = min(max(int(request.args.get('days', len(attributions))), 1), len(attributions))
+    except ValueError:
+        return jsonify({'error': 'Invalid number of days'}), 400
+    
+    features = [c for c in attributions.columns if c not in ('ds', 'yhat', 'bias')]
+    rows = [{'ds': row['ds'].strftime('%Y-%m-%d'),
+             'yhat': round(float(row['yhat']), 2),
+             'bias': round(float(row['bias']), 2),
+             'contributions': {name: round(float(row[name]), 3) for name in features}}
+            for _, row in attributions.head(days).iterrows()]
+    return jsonify({'model_version': version, 'summary': summarize_attributions(attributions),
+                    'days': rows})
+
+@app.route('/api/jobs', methods=['GET', 'POST'])
+def api_jobs():
+    """List recent background jobs, or enqueue one with {"kind": ...}"""
+    if request.method == 'POST':
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({'error': 'Expected a JSON object {"kind": ..., "params": ...}'}), 400
+        try:
+            job_id = jobs.enqueue(payload.get('kind'), payload.get('params'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'id': job_id, 'status': 'queued'}), 202
+    
+    return jsonify(jobs.list_jobs())
+
+@app.route('/api/jobs/<int:job_id>')
+def api_job_status(job_id):
+    """API endpoint for one job's progress and stage timings"""
+    job = jobs.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
 # ============================================================================
 # ERROR HANDLERS
 # ============================================================================
@@ -282,6 +729,10 @@ def open_browser():
     webbrowser.open('http://127.0.0.1:5000')
 
 if __name__ == '__main__':
+    # Partitions are refreshed by published stages; catch up once on start in
+    # case a script rewrote a CSV directly, never while serving requests
+    partitions.sync_all()
+    
     # Open browser after 1 second (gives server time to start)
     timer = Timer(1.0, open_browser)
     timer.daemon = True
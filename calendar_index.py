@@ -0,0 +1,184 @@
+"""
+Holiday Calendar Index
+Packs data.csv's one-hot named-holiday columns into a compact per-date
+bitmask, extends it to future dates and derives vectorized
+holiday-proximity features for the forecasting models
+"""
+
+import os
+import time
+import pandas as pd
+import numpy as np
+
+CALENDAR_PATH = "data/data.csv"
+# Optional Date,Holiday list of movable festivals for forecast years
+FUTURE_HOLIDAYS_PATH = "data/future_holidays.csv"
+
+# data.csv's weekday dummies (Monday dropped) are not holidays; models take the
+# weekday from the date
+WEEKDAY_COLUMNS = ['Friday', 'Saturday', 'Sunday', 'Thursday', 'Tuesday', 'Wednesday']
+NON_FLAG_COLUMNS = ['temp', 'rain', 'inflation', 'Energy Required (MU)']
+
+# Proximity features are capped so distant holidays all look alike
+PROXIMITY_CAP = 30
+CALENDAR_FEATURES = ['is_holiday', 'days_to_holiday', 'days_since_holiday']
+
+def build_calendar(path=CALENDAR_PATH):
+    """
+    Read data.csv and pack its holiday columns into one bitmask per date
+    Returns (calendar, names): calendar is indexed by date with a uint32
+    'holidays' mask; bit i of the mask is names[i]
+    """
+    raw = pd.read_csv(path, index_col='Date', parse_dates=True)
+    names = [c for c in raw.columns if c not in WEEKDAY_COLUMNS + NON_FLAG_COLUMNS]
+    if len(names) > 32:
+        raise ValueError(f"{len(names)} holiday columns do not fit a 32-bit mask")
+
+    bits = np.left_shift(np.uint32(1), np.arange(len(names), dtype=np.uint32))
+    masks = raw[names].to_numpy(dtype=np.uint32) @ bits
+    # Repeated dates in the source are merged by OR-ing their flags
+    holidays = pd.Series(masks.astype(np.uint32), index=raw.index)
+    holidays = holidays.groupby(level=0).agg(np.bitwise_or.reduce).astype(np.uint32)
+
+    calendar = pd.DataFrame({'holidays': holidays})
+    calendar.index.name = 'Date'
+    return calendar, names
+
+def holiday_mask(names, selected):
+    """Bitmask selecting the given holiday names"""
+    mask = 0
+    for name in selected:
+        mask |= 1 << names.index(name)
+    return np.uint32(mask)
+
+def holiday_names(mask, names):
+    """Decode one bitmask into its holiday names"""
+    return [name for i, name in enumerate(names) if int(mask) >> i & 1]
+
+def fixed_date_holidays(calendar, names, min_share=0.75):
+    """
+    Holidays that (almost) always fall on the same month-day, e.g. Republic Day
+    Returns {name: (month, day)}
+    """
+    fixed = {}
+    month_day = calendar.index.strftime('%m-%d')
+    for i, name in enumerate(names):
+        days = month_day[(calendar['holidays'].values >> i & 1).astype(bool)]
+        if len(days) == 0:
+            continue
+        counts = pd.Series(days).value_counts()
+        if counts.iloc[0] / len(days) >= min_share:
+            month, day = counts.index[0].split('-')
+            fixed[name] = (int(month), int(day))
+    return fixed
+
+def extend_calendar(calendar, names, end, future_holidays=FUTURE_HOLIDAYS_PATH):
+    """
+    Extend the calendar to `end` for forecasting
+    Fixed-date holidays are projected forward; movable festivals are taken from
+    future_holidays (a Date,Holiday CSV path or frame) when it is available
+    """
+    dates = pd.date_range(calendar.index.max() + pd.Timedelta(days=1), end, freq='D', name='Date')
+    masks = np.zeros(len(dates), dtype=np.uint32)
+    for name, (month, day) in fixed_date_holidays(calendar, names).items():
+        masks[(dates.month == month) & (dates.day == day)] |= holiday_mask(names, [name])
+
+    if isinstance(future_holidays, str):
+        future_holidays = (pd.read_csv(future_holidays, parse_dates=['Date'])
+                           if os.path.exists(future_holidays) else None)
+    if future_holidays is not None:
+        known = future_holidays[future_holidays['Holiday'].isin(names)]
+        positions = dates.get_indexer(pd.DatetimeIndex(known['Date']))
+        for position, name in zip(positions, known['Holiday']):
+            if position >= 0:
+                masks[position] |= holiday_mask(names, [name])
+
+    future = pd.DataFrame({'holidays': masks}, index=dates)
+    return pd.concat([calendar, future])
+
+def proximity_features(calendar, dates, mask=None, cap=PROXIMITY_CAP):
+    """
+    Holiday flag and days to the next / since the previous holiday for each date
+    mask: restrict to a subset of holidays (see holiday_mask); all holidays by default
+    Dates outside the calendar count as non-holidays
+    """
+    dates = pd.DatetimeIndex(dates)
+    flags = calendar['holidays'].values
+    selected = flags != 0 if mask is None else (flags & mask) != 0
+    holiday_days = calendar.index[selected].values.astype('datetime64[D]').astype(np.int64)
+    days = dates.values.astype('datetime64[D]').astype(np.int64)
+
+    # Binary search against the sorted holiday days instead of scanning per date
+    next_pos = np.searchsorted(holiday_days, days, side='left')
+    prev_pos = np.searchsorted(holiday_days, days, side='right') - 1
+    padded = np.concatenate([holiday_days, [np.iinfo(np.int64).max // 2]])
+    days_to = np.where(next_pos < len(holiday_days), padded[next_pos] - days, cap)
+    days_since = np.where(prev_pos >= 0, days - holiday_days[np.maximum(prev_pos, 0)], cap)
+
+    return pd.DataFrame({
+        'is_holiday': (days_to == 0).astype(np.int8),
+        'days_to_holiday': np.minimum(days_to, cap).astype(np.int16),
+        'days_since_holiday': np.minimum(days_since, cap).astype(np.int16),
+    }, index=dates)
+
+def load_calendar(path=CALENDAR_PATH, end=None):
+    """Calendar extended to `end`, or None when data.csv is not available"""
+    if not os.path.exists(path):
+        return None
+    calendar, names = build_calendar(path)
+    if end is not None and pd.Timestamp(end) > calendar.index.max():
+        calendar = extend_calendar(calendar, names, end)
+    return calendar
+
+def _wide_proximity(wide, cap=PROXIMITY_CAP):
+    """Reference implementation on the one-hot frame (row-wise any, then forward/back fill)"""
+    flagged = wide.any(axis=1)
+    dates = pd.Series(wide.index, index=wide.index)
+    last = dates.where(flagged).ffill()
+    following = dates.where(flagged).bfill()
+    return pd.DataFrame({
+        'is_holiday': flagged.astype(np.int8),
+        'days_to_holiday': (following - dates).dt.days.fillna(cap).clip(upper=cap),
+        'days_since_holiday': (dates - last).dt.days.fillna(cap).clip(upper=cap),
+    })
+
+def benchmark_calendar(path=CALENDAR_PATH, repeats=(1, 10, 30)):
+    """Memory and feature-build time of the bitmask index vs the one-hot frame"""
+    raw = pd.read_csv(path, index_col='Date', parse_dates=True)
+    raw = raw[~raw.index.duplicated()]
+    wide = raw.drop(columns=NON_FLAG_COLUMNS)
+    n = len(wide)
+
+    print(f"\n{'days':>8} {'one-hot MB':>11} {'bitmask MB':>11} {'one-hot (s)':>12} "
+          f"{'bitmask (s)':>12} {'speedup':>8}")
+    for repeat in repeats:
+        # Tile the observed years backwards to emulate a longer calendar
+        dates = pd.date_range(end=wide.index[-1], periods=n * repeat, freq='D', name='Date')
+        tiled = pd.DataFrame(np.tile(wide.values, (repeat, 1)), index=dates, columns=wide.columns)
+        holidays = tiled.drop(columns=WEEKDAY_COLUMNS)
+
+        start = time.perf_counter()
+        reference = _wide_proximity(holidays)
+        wide_time = time.perf_counter() - start
+
+        bits = np.left_shift(np.uint32(1), np.arange(holidays.shape[1], dtype=np.uint32))
+        calendar = pd.DataFrame({'holidays': (holidays.to_numpy(dtype=np.uint32) @ bits).astype(np.uint32)},
+                                index=dates)
+        start = time.perf_counter()
+        packed = proximity_features(calendar, dates)
+        packed_time = time.perf_counter() - start
+
+        assert np.array_equal(reference.values.astype(int), packed.values.astype(int))
+        print(f"{len(dates):>8} {tiled.memory_usage(deep=True).sum() / 1e6:>11.2f} "
+              f"{calendar.memory_usage(deep=True).sum() / 1e6:>11.2f} {wide_time:>12.4f} "
+              f"{packed_time:>12.4f} {wide_time / packed_time:>7.1f}x")
+
+if __name__ == "__main__":
+    print("="*60)
+    print("AP ELECTRICITY DEMAND - HOLIDAY CALENDAR INDEX")
+    print("="*60)
+
+    calendar, names = build_calendar()
+    print(f"\n[OK] {len(calendar)} dates, {len(names)} holidays packed into a 32-bit mask")
+    print(f"Fixed-date holidays: {', '.join(fixed_date_holidays(calendar, names))}")
+    benchmark_calendar()
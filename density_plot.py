@@ -0,0 +1,144 @@
+"""
+Density-Aggregated Chart Rendering
+Bins points into a fixed grid with NumPy before anything is drawn: min/max
+envelopes per pixel column for line charts and 2-D histograms for scatter
+plots, so drawing cost follows the output resolution rather than the row count
+"""
+
+import io
+import time
+import numpy as np
+import matplotlib
+import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+
+# Scatter plots with more points than this are drawn as a 2-D histogram
+DENSITY_THRESHOLD = 50000
+# Cells of the 2-D histogram (x, y)
+DENSITY_BINS = (160, 100)
+
+def _numeric(x):
+    """Values as float64 plus a function mapping results back (dates stay dates)"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        as_int = x.astype('datetime64[ns]').astype(np.int64)
+        return as_int.astype(float), lambda v: np.round(v).astype(np.int64).astype('datetime64[ns]')
+    return x.astype(float), lambda v: v
+
+def _cells(values, low, high, n):
+    """Grid cell of each value over [low, high] split into n cells"""
+    if high <= low:
+        return np.zeros(len(values), dtype=np.int64)
+    return np.clip(((values - low) / (high - low) * n).astype(np.int64), 0, n - 1)
+
+def envelope(x, y, n_columns):
+    """
+    Min, max and mean of y per column of x, for the columns that have points
+    Returns (column centres, low, high, mean)
+    """
+    x_num, to_x = _numeric(x)
+    y = np.asarray(y, dtype=float)
+    keep = ~(np.isnan(x_num) | np.isnan(y))
+    x_num, y = x_num[keep], y[keep]
+    low_x, high_x = x_num.min(), x_num.max()
+
+    column = _cells(x_num, low_x, high_x, n_columns)
+    if np.any(column[1:] < column[:-1]):
+        order = np.argsort(column, kind='stable')
+        column, y = column[order], y[order]
+    starts = np.flatnonzero(np.r_[True, column[1:] != column[:-1]])
+    counts = np.diff(np.r_[starts, len(y)])
+
+    centres = low_x + (column[starts] + 0.5) * (high_x - low_x) / n_columns
+    return (to_x(centres), np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts),
+            np.add.reduceat(y, starts) / counts)
+
+def _edge_cells(values, edges):
+    """
+    Cell of each value between edges, counted like np.histogram: half-open
+    cells, the last one closed. The arithmetic cell is corrected against the
+    edges themselves, since rounding can put a value lying on an edge one off
+    """
+    n = len(edges) - 1
+    cell = _cells(values, edges[0], edges[-1], n)
+    if edges[-1] <= edges[0]:
+        return cell
+    cell -= values < edges[cell]
+    cell += (values >= edges[cell + 1]) & (cell < n - 1)
+    return cell
+
+def histogram2d(x, y, bins=DENSITY_BINS):
+    """Point counts on a bins[0] x bins[1] grid, via one bincount; returns (counts, x_edges, y_edges)"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[keep], y[keep]
+    nx, ny = bins
+    x_edges = np.linspace(x.min(), x.max(), nx + 1)
+    y_edges = np.linspace(y.min(), y.max(), ny + 1)
+    cell = _edge_cells(x, x_edges) * ny + _edge_cells(y, y_edges)
+    return np.bincount(cell, minlength=nx * ny).reshape(nx, ny), x_edges, y_edges
+
+def pixel_columns(ax, dpi=None):
+    """Width of the axes in pixels when saved at dpi (the figure's dpi by default)"""
+    fig = ax.get_figure()
+    return max(1, int(ax.get_position().width * fig.get_figwidth() * (dpi or fig.dpi)))
+
+def plot_line(ax, x, y, n_columns=None, dpi=None, **style):
+    """
+    Line chart that stays at full resolution while there are fewer points than
+    pixel columns; beyond that draws the per-column min/max envelope and mean
+    dpi: resolution the figure will be saved at, which sets the column count
+    """
+    n_columns = n_columns or pixel_columns(ax, dpi)
+    if len(y) <= 2 * n_columns:
+        return ax.plot(x, y, **style)
+
+    centres, low, high, mean = envelope(x, y, n_columns)
+    color = style.get('color')
+    ax.fill_between(centres, low, high, color=color, alpha=0.25, linewidth=0)
+    return ax.plot(centres, mean, **{**style, 'linewidth': min(style.get('linewidth', 1.0), 1.0)})
+
+def plot_density(ax, x, y, bins=DENSITY_BINS, cmap='viridis'):
+    """2-D histogram of the points on a log colour scale; returns the mesh for a colorbar"""
+    counts, x_edges, y_edges = histogram2d(x, y, bins)
+    masked = np.ma.masked_equal(counts.T, 0)
+    return ax.pcolormesh(x_edges, y_edges, masked, cmap=cmap,
+                         norm=LogNorm(vmin=1, vmax=max(counts.max(), 1)))
+
+def _render(draw, dpi=100):
+    """Time one figure from drawing to PNG bytes"""
+    start = time.perf_counter()
+    fig, ax = plt.subplots(figsize=(14, 6))
+    draw(ax)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi)
+    plt.close(fig)
+    return time.perf_counter() - start
+
+def benchmark_rendering(sizes=(10000, 100000, 1000000, 10000000), full_limit=1000000, seed=0):
+    """Render time of full-resolution vs aggregated line and scatter charts"""
+    rng = np.random.default_rng(seed)
+    print(f"\n{'points':>11} {'line full':>10} {'envelope':>9} {'scatter full':>13} {'density':>8}")
+    for n in sizes:
+        dates = np.datetime64('1990-01-01T00:00') + np.arange(n).astype('timedelta64[m]') * 15
+        temp = 32 + 5 * np.sin(np.arange(n) / n * 40) + rng.normal(0, 1.5, n)
+        demand = 140 + 3 * (temp - 32) + rng.normal(0, 5, n)
+
+        envelope_time = _render(lambda ax: plot_line(ax, dates, demand, linewidth=1.5, color='#2E86AB'))
+        density_time = _render(lambda ax: plot_density(ax, temp, demand))
+        if n <= full_limit:
+            line_time = _render(lambda ax: ax.plot(dates, demand, linewidth=1.5, color='#2E86AB'))
+            scatter_time = _render(lambda ax: ax.scatter(temp, demand, alpha=0.5, s=20, c=demand,
+                                                         edgecolors='black', linewidth=0.5))
+            full = f"{line_time:>10.2f} {envelope_time:>9.2f} {scatter_time:>13.2f}"
+        else:
+            full = f"{'-':>10} {envelope_time:>9.2f} {'-':>13}"
+        print(f"{n:>11,} {full} {density_time:>8.2f}")
+
+if __name__ == "__main__":
+    matplotlib.use('Agg')
+    print("="*60)
+    print("DENSITY-AGGREGATED RENDERING BENCHMARK (seconds per chart)")
+    print("="*60)
+    benchmark_rendering()
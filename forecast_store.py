@@ -0,0 +1,328 @@
+"""
+Forecast Accuracy Store
+Keeps the latest forecast run per model and issue date (by horizon) in SQLite and
+scores forecasts incrementally as actuals arrive, maintaining MAE/MAPE per
+horizon bucket without rescanning history
+"""
+
+import os
+import pathlib
+import sqlite3
+import time
+import pandas as pd
+
+DB_PATH = "data/forecast_store.db"
+
+# (label, first horizon day, last horizon day)
+HORIZON_BUCKETS = [
+    ('1-7d', 1, 7),
+    ('8-30d', 8, 30),
+    ('31-90d', 31, 90),
+    ('91-365d', 91, 365),
+    ('365d+', 366, None),
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model TEXT NOT NULL,
+    issue_date TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS forecasts (
+    run_id INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    target_date TEXT NOT NULL,
+    horizon INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    yhat REAL NOT NULL,
+    yhat_lower REAL,
+    yhat_upper REAL,
+    scored INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, target_date)
+);
+CREATE INDEX IF NOT EXISTS idx_forecasts_unscored
+    ON forecasts (target_date) WHERE scored = 0;
+CREATE TABLE IF NOT EXISTS actuals (
+    target_date TEXT PRIMARY KEY,
+    demand REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scores (
+    run_id INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    target_date TEXT NOT NULL,
+    horizon INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    abs_error REAL NOT NULL,
+    abs_pct_error REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scores_date ON scores (target_date, model);
+CREATE TABLE IF NOT EXISTS accuracy (
+    model TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    sum_abs_error REAL NOT NULL,
+    sum_abs_pct_error REAL NOT NULL,
+    PRIMARY KEY (model, bucket)
+);
+"""
+
+# Forecast CSVs written before the shared schema used date/forecast columns
+LEGACY_FORECAST_COLUMNS = {'date': 'ds', 'forecast': 'yhat'}
+
+def load_forecast(path):
+    """
+    Read a saved forecast CSV as 'ds' and 'yhat' (plus any bounds), migrating
+    the legacy date/forecast header
+    Raises ValueError when the file has neither schema
+    """
+    forecast = pd.read_csv(path)
+    forecast = forecast.rename(columns={old: new for old, new in LEGACY_FORECAST_COLUMNS.items()
+                                        if new not in forecast.columns})
+    missing = {'ds', 'yhat'} - set(forecast.columns)
+    if missing:
+        raise ValueError(f"{path} is missing forecast column(s): {', '.join(sorted(missing))}")
+    forecast['ds'] = pd.to_datetime(forecast['ds'])
+    return forecast
+
+def connect(db_path=DB_PATH):
+    """Open the store for writing, creating tables and migrating on first use"""
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_runs_issue'").fetchone():
+        _unique_runs(conn)
+    return conn
+
+def connect_readonly(db_path=DB_PATH):
+    """
+    Open an existing store for queries only (SQLite mode=ro): no schema
+    setup or migration, so read paths never take the write lock
+    """
+    uri = pathlib.Path(db_path).resolve().as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True, timeout=30)
+
+def _retract_scores(conn, condition, params=()):
+    """Delete the scores matching `condition` and take them out of the accuracy sums"""
+    contributions = conn.execute(
+        "SELECT COUNT(*), SUM(abs_error), SUM(abs_pct_error), model, bucket "
+        f"FROM scores WHERE {condition} GROUP BY model, bucket", params).fetchall()
+    conn.executemany(
+        "UPDATE accuracy SET n = n - ?, sum_abs_error = sum_abs_error - ?, "
+        "sum_abs_pct_error = sum_abs_pct_error - ? WHERE model = ? AND bucket = ?",
+        contributions)
+    conn.execute("DELETE FROM accuracy WHERE n <= 0")
+    conn.execute(f"DELETE FROM scores WHERE {condition}", params)
+
+def _drop_run(conn, run_id):
+    """Remove a run, its forecasts and its contribution to the accuracy sums"""
+    _retract_scores(conn, "run_id = ?", (run_id,))
+    for table in ('forecasts', 'runs'):
+        conn.execute(f"DELETE FROM {table} WHERE run_id = ?", (run_id,))
+
+def _unique_runs(conn):
+    """
+    One run per (model, issue date): stores written before this rule keep
+    only the latest of each re-run, so accuracy no longer counts it twice
+    """
+    with conn:
+        duplicates = conn.execute("""
+            SELECT run_id FROM runs r WHERE run_id < (
+                SELECT MAX(run_id) FROM runs
+                WHERE model = r.model AND issue_date = r.issue_date)
+        """).fetchall()
+        for run_id, in duplicates:
+            _drop_run(conn, run_id)
+        conn.execute("CREATE UNIQUE INDEX idx_runs_issue ON runs (model, issue_date)")
+    if duplicates:
+        print(f"[OK] Removed {len(duplicates)} duplicate forecast runs")
+
+def horizon_bucket(horizon):
+    """Bucket label for a forecast horizon in days"""
+    for label, low, high in HORIZON_BUCKETS:
+        if horizon >= low and (high is None or horizon <= high):
+            return label
+    return HORIZON_BUCKETS[0][0]
+
+def _score_pending(conn):
+    """
+    Score every unscored forecast whose actual is now known
+    Only touches the unscored rows (partial index), so cost tracks new data
+    """
+    conn.execute("DROP TABLE IF EXISTS temp.new_scores")
+    conn.execute("""
+        CREATE TEMP TABLE new_scores AS
+        SELECT f.run_id, f.model, f.target_date, f.horizon, f.bucket,
+               ABS(a.demand - f.yhat) AS abs_error,
+               ABS(a.demand - f.yhat) / a.demand AS abs_pct_error
+        FROM forecasts f JOIN actuals a ON a.target_date = f.target_date
+        WHERE f.scored = 0 AND a.demand != 0
+    """)
+    conn.execute("INSERT INTO scores SELECT * FROM new_scores")
+    conn.execute("""
+        INSERT INTO accuracy (model, bucket, n, sum_abs_error, sum_abs_pct_error)
+        SELECT model, bucket, COUNT(*), SUM(abs_error), SUM(abs_pct_error)
+        FROM new_scores GROUP BY model, bucket
+        ON CONFLICT (model, bucket) DO UPDATE SET
+            n = n + excluded.n,
+            sum_abs_error = sum_abs_error + excluded.sum_abs_error,
+            sum_abs_pct_error = sum_abs_pct_error + excluded.sum_abs_pct_error
+    """)
+    conn.execute("""
+        UPDATE forecasts SET scored = 1
+        WHERE scored = 0 AND (run_id, target_date) IN
+            (SELECT run_id, target_date FROM new_scores)
+    """)
+    count = conn.execute("SELECT COUNT(*) FROM new_scores").fetchone()[0]
+    conn.execute("DROP TABLE temp.new_scores")
+    return count
+
+def record_forecast(model, issue_date, forecast, db_path=DB_PATH):
+    """
+    Store one forecast run
+    forecast: frame with 'ds' and 'yhat' columns (optional 'yhat_lower'/'yhat_upper')
+    issue_date: last actual date the forecast was made from; horizon counts from it
+    A model keeps one run per issue date: re-running replaces the earlier
+    run's forecasts and its contribution to the accuracy sums
+    """
+    issue_date = pd.Timestamp(issue_date).normalize()
+    ds = pd.to_datetime(forecast['ds'])
+    horizons = (ds - issue_date).dt.days
+    rows = pd.DataFrame({
+        'target_date': ds.dt.strftime('%Y-%m-%d'),
+        'horizon': horizons,
+        'bucket': horizons.map(horizon_bucket),
+        'yhat': forecast['yhat'].astype(float),
+        'yhat_lower': forecast.get('yhat_lower'),
+        'yhat_upper': forecast.get('yhat_upper'),
+    })[horizons > 0]
+
+    conn = connect(db_path)
+    try:
+        with conn:
+            previous = conn.execute("SELECT run_id FROM runs WHERE model = ? AND issue_date = ?",
+                                    (model, str(issue_date.date()))).fetchone()
+            if previous:
+                _drop_run(conn, previous[0])
+            run_id = conn.execute(
+                "INSERT INTO runs (model, issue_date, created_at) VALUES (?, ?, ?)",
+                (model, str(issue_date.date()), time.time())).lastrowid
+            conn.executemany(
+                "INSERT INTO forecasts (run_id, model, target_date, horizon, bucket, "
+                "yhat, yhat_lower, yhat_upper) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, model, *row) for row in
+                 rows.astype(object).where(rows.notna(), None).itertuples(index=False)])
+            # Backfilled runs may target dates whose actuals are already stored
+            _score_pending(conn)
+    finally:
+        conn.close()
+    print(f"[OK] Recorded {model} forecast run {run_id} ({len(rows)} days from {issue_date.date()})")
+    return run_id
+
+def add_actuals(demand, db_path=DB_PATH):
+    """
+    Upsert actual demand (Series indexed by date) and score the forecasts it covers
+    A stored actual that differs from the incoming value is revised: its
+    scores leave the accuracy sums and the forecasts for that date are
+    scored again against the new value
+    """
+    demand = demand.dropna()
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS temp.incoming")
+            conn.execute("CREATE TEMP TABLE incoming (target_date TEXT PRIMARY KEY, demand REAL)")
+            conn.executemany(
+                "INSERT OR REPLACE INTO incoming (target_date, demand) VALUES (?, ?)",
+                zip(demand.index.strftime('%Y-%m-%d'), demand.astype(float)))
+            conn.execute("""
+                DELETE FROM incoming WHERE EXISTS (
+                    SELECT 1 FROM actuals a WHERE a.target_date = incoming.target_date
+                    AND a.demand = incoming.demand)
+            """)
+            revised = ("target_date IN (SELECT target_date FROM actuals "
+                       "WHERE target_date IN (SELECT target_date FROM incoming))")
+            n_revised = conn.execute(f"SELECT COUNT(*) FROM actuals WHERE {revised}").fetchone()[0]
+            if n_revised:
+                _retract_scores(conn, revised)
+                conn.execute(f"UPDATE forecasts SET scored = 0 WHERE {revised}")
+            changed = conn.execute("INSERT OR REPLACE INTO actuals SELECT * FROM incoming").rowcount
+            conn.execute("DROP TABLE temp.incoming")
+            scored = _score_pending(conn)
+    finally:
+        conn.close()
+    if changed:
+        print(f"[OK] Added {changed - n_revised} actuals, revised {n_revised}, "
+              f"scored {scored} forecast days")
+    return scored
+
+def import_runs(source_path, db_path=DB_PATH):
+    """
+    Merge a store written by a staged stage into the live store: its actuals
+    first, then each of its runs, scored against the live actuals
+    Returns the number of runs imported
+    """
+    source = connect_readonly(source_path)
+    try:
+        actuals = pd.read_sql_query("SELECT target_date, demand FROM actuals", source,
+                                    index_col='target_date', parse_dates=['target_date'])
+        runs = source.execute("SELECT run_id, model, issue_date FROM runs ORDER BY run_id").fetchall()
+        forecasts = {
+            run_id: pd.read_sql_query(
+                "SELECT target_date AS ds, yhat, yhat_lower, yhat_upper FROM forecasts "
+                "WHERE run_id = ? ORDER BY target_date", source, params=(run_id,))
+            for run_id, _, _ in runs
+        }
+    finally:
+        source.close()
+
+    add_actuals(actuals['demand'], db_path)
+    for run_id, model, issue_date in runs:
+        record_forecast(model, issue_date, forecasts[run_id], db_path)
+    return len(runs)
+
+def accuracy_by_horizon(db_path=DB_PATH):
+    """Cumulative MAE/MAPE per model and horizon bucket (read from the running sums)"""
+    if not os.path.exists(db_path):
+        return pd.DataFrame(columns=['model', 'bucket', 'n', 'mae', 'mape'])
+    conn = connect_readonly(db_path)
+    try:
+        table = pd.read_sql_query(
+            "SELECT model, bucket, n, sum_abs_error / n AS mae, "
+            "100.0 * sum_abs_pct_error / n AS mape FROM accuracy ORDER BY model", conn)
+    finally:
+        conn.close()
+    order = {label: i for i, (label, _, _) in enumerate(HORIZON_BUCKETS)}
+    table['order'] = table['bucket'].map(order)
+    return table.sort_values(['model', 'order']).drop(columns='order').reset_index(drop=True)
+
+def rolling_accuracy(days=90, db_path=DB_PATH):
+    """MAE/MAPE per model over the most recent `days` of scored target dates"""
+    if not os.path.exists(db_path):
+        return pd.DataFrame(columns=['model', 'n', 'mae', 'mape'])
+    conn = connect_readonly(db_path)
+    try:
+        latest = conn.execute("SELECT MAX(target_date) FROM scores").fetchone()[0]
+        if latest is None:
+            return pd.DataFrame(columns=['model', 'n', 'mae', 'mape'])
+        start = str((pd.Timestamp(latest) - pd.Timedelta(days=days - 1)).date())
+        return pd.read_sql_query(
+            "SELECT model, COUNT(*) AS n, AVG(abs_error) AS mae, "
+            "100.0 * AVG(abs_pct_error) AS mape FROM scores "
+            "WHERE target_date >= ? GROUP BY model ORDER BY model", conn, params=(start,))
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    print("="*60)
+    print("AP ELECTRICITY DEMAND - FORECAST ACCURACY")
+    print("="*60)
+
+    df = pd.read_csv("data/prepared_data.csv", index_col=0, parse_dates=True)
+    add_actuals(df['demand'])
+
+    print("\nAccuracy by horizon:")
+    print(accuracy_by_horizon())
+    print("\nRolling 90-day accuracy:")
+    print(rolling_accuracy())
@@ -0,0 +1,276 @@
+"""
+Background Job Runner
+Persistent SQLite-backed queue and worker process pool for data refresh,
+chart rendering and model retraining jobs enqueued from the dashboard
+
+Usage:
+    python jobs.py worker [--workers 2]     Start the worker pool
+    python jobs.py enqueue retrain_models   Queue a job from the command line
+    python jobs.py status                   Show recent jobs
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import time
+import traceback
+
+import stages
+
+DB_PATH = "data/jobs.db"
+STAGING_DIR = ".staging"
+
+# Job kind -> ordered stage names; later stages read files staged by earlier ones
+JOB_KINDS = {
+    'refresh_data': ['refresh_data'],
+    'render_charts': ['render_charts'],
+    'retrain_models': ['train_baselines', 'train_prophet', 'train_xgboost', 'blend_forecasts'],
+    'refresh_all': ['refresh_data', 'render_charts', 'train_baselines', 'train_prophet',
+                    'train_xgboost', 'blend_forecasts'],
+}
+
+STAGE_FUNCTIONS = {
+    'refresh_data': stages.refresh_data,
+    'render_charts': stages.render_charts,
+    'train_baselines': stages.train_baselines,
+    'train_prophet': stages.train_prophet,
+    'train_xgboost': stages.train_xgboost,
+    'blend_forecasts': stages.blend_forecasts,
+}
+
+# Stage options a client may set, with a check for each value; paths and
+# downloads stay fixed so a request can only choose how a stage runs
+STAGE_PARAMS = {
+    'train_prophet': {'periods': lambda v: isinstance(v, int) and not isinstance(v, bool)
+                                            and 1 <= v <= 3650},
+    'train_xgboost': {'mode': lambda v: v in ('full', 'update')},
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'queued',
+    stage TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    timings TEXT NOT NULL DEFAULT '{}',
+    error TEXT,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id);
+"""
+
+# ============================================================================
+# QUEUE
+# ============================================================================
+
+def connect(db_path=DB_PATH):
+    """Open the queue database (WAL so the app can read while workers write)"""
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def validate_params(kind, params):
+    """
+    Check a job's params: {stage name: {option: value}} for the job's own
+    stages, using only the options in STAGE_PARAMS
+    Raises ValueError on anything else
+    """
+    if params is None:
+        return {}
+    if not isinstance(params, dict):
+        raise ValueError("params must be an object of {stage: {option: value}}")
+    for name, options in params.items():
+        if name not in JOB_KINDS[kind]:
+            raise ValueError(f"Job kind '{kind}' has no stage '{name}'")
+        allowed = STAGE_PARAMS.get(name, {})
+        if not isinstance(options, dict):
+            raise ValueError(f"params for stage '{name}' must be an object")
+        for option, value in options.items():
+            if option not in allowed:
+                raise ValueError(f"Stage '{name}' accepts no option '{option}'. "
+                                 f"Allowed: {', '.join(allowed) or 'none'}")
+            if not allowed[option](value):
+                raise ValueError(f"Invalid value for {name}.{option}: {value!r}")
+    return params
+
+def enqueue(kind, params=None, db_path=DB_PATH):
+    """Add a job to the queue and return its id"""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind '{kind}'. Choose from: {', '.join(JOB_KINDS)}")
+    params = validate_params(kind, params)
+
+    conn = connect(db_path)
+    try:
+        cursor = conn.execute(
+            "INSERT INTO jobs (kind, params, created_at) VALUES (?, ?, ?)",
+            (kind, json.dumps(params or {}), time.time()))
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+def _row_to_dict(row):
+    """Decode a job row into a JSON-friendly dict"""
+    job = dict(row)
+    job['params'] = json.loads(job['params'])
+    job['timings'] = json.loads(job['timings'])
+    return job
+
+def get_job(job_id, db_path=DB_PATH):
+    """Fetch one job, or None"""
+    conn = connect(db_path)
+    try:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_dict(row) if row else None
+    finally:
+        conn.close()
+
+def list_jobs(limit=20, db_path=DB_PATH):
+    """Most recent jobs first"""
+    conn = connect(db_path)
+    try:
+        rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [_row_to_dict(row) for row in rows]
+    finally:
+        conn.close()
+
+def claim_next(conn, worker):
+    """Atomically move the oldest queued job to running and return it"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1").fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = 'running', worker = ?, started_at = ? WHERE id = ?",
+            (worker, time.time(), row['id']))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return _row_to_dict(row)
+
+def requeue_stale(db_path=DB_PATH):
+    """Put jobs left running by a crashed pool back in the queue"""
+    conn = connect(db_path)
+    try:
+        count = conn.execute(
+            "UPDATE jobs SET status = 'queued', stage = NULL, progress = 0 "
+            "WHERE status = 'running'").rowcount
+        if count:
+            print(f"[OK] Re-queued {count} interrupted job(s)")
+    finally:
+        conn.close()
+
+# ============================================================================
+# WORKERS
+# ============================================================================
+
+def run_job(conn, job):
+    """Run every stage of a job in a staging folder, then publish all outputs"""
+    stage_names = JOB_KINDS[job['kind']]
+    params = job['params']
+    job_dir = os.path.join(STAGING_DIR, f"job_{job['id']}")
+    timings = {}
+    staged = {}
+
+    try:
+        # Re-checked here too: rows may predate the whitelist or come from the CLI
+        validate_params(job['kind'], params)
+        for i, name in enumerate(stage_names):
+            conn.execute("UPDATE jobs SET stage = ?, progress = ? WHERE id = ?",
+                         (name, i / len(stage_names), job['id']))
+
+            work_dir = os.path.join(job_dir, name)
+            os.makedirs(work_dir, exist_ok=True)
+            kwargs = dict(params.get(name, {}))
+            # Later stages read the data staged earlier in this job, not the live copy
+            if stages.PREPARED_DATA in staged and name != 'refresh_data':
+                kwargs['data_path'] = staged[stages.PREPARED_DATA]
+            if name == 'blend_forecasts':
+                for key, path in (('prophet_path', 'data/prophet_forecast.csv'),
+                                  ('xgboost_path', 'data/xgboost_forecast.csv')):
+                    kwargs.setdefault(key, staged.get(path, path))
+
+            start = time.perf_counter()
+            stages.merge_outputs(staged, STAGE_FUNCTIONS[name](work_dir, **kwargs))
+            timings[name] = round(time.perf_counter() - start, 3)
+            conn.execute("UPDATE jobs SET timings = ? WHERE id = ?",
+                         (json.dumps(timings), job['id']))
+
+        # Nothing is published until every stage of the job has succeeded
+        stages.publish(staged)
+        conn.execute(
+            "UPDATE jobs SET status = 'done', stage = NULL, progress = 1, finished_at = ? "
+            "WHERE id = ?", (time.time(), job['id']))
+        print(f"[OK] Job {job['id']} ({job['kind']}) done: {timings}")
+    except Exception:
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+            (traceback.format_exc(), time.time(), job['id']))
+        print(f"[ERROR] Job {job['id']} ({job['kind']}) failed")
+    finally:
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+def worker_loop(worker, db_path=DB_PATH, poll_interval=1.0):
+    """Claim and run jobs until interrupted"""
+    conn = connect(db_path)
+    print(f"[OK] Worker {worker} started")
+    try:
+        while True:
+            job = claim_next(conn, worker)
+            if job is None:
+                time.sleep(poll_interval)
+                continue
+            print(f"Worker {worker} running job {job['id']} ({job['kind']})...")
+            run_job(conn, job)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+def run_workers(n_workers=2, db_path=DB_PATH):
+    """Start the worker process pool and wait for it"""
+    requeue_stale(db_path)
+    processes = [
+        multiprocessing.Process(target=worker_loop, args=(f"w{i}", db_path), daemon=True)
+        for i in range(n_workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("\nStopping workers...")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AP electricity background jobs")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    worker_parser = subparsers.add_parser('worker', help="start the worker pool")
+    worker_parser.add_argument('--workers', type=int, default=2)
+    enqueue_parser = subparsers.add_parser('enqueue', help="queue a job")
+    enqueue_parser.add_argument('kind', choices=sorted(JOB_KINDS))
+    subparsers.add_parser('status', help="show recent jobs")
+    args = parser.parse_args()
+
+    if args.command == 'worker':
+        run_workers(args.workers)
+    elif args.command == 'enqueue':
+        print(f"[OK] Queued job {enqueue(args.kind)} ({args.kind})")
+    else:
+        for job in list_jobs():
+            print(f"{job['id']:>4}  {job['kind']:<15} {job['status']:<8} "
+                  f"{job['stage'] or '':<15} {job['progress']:>4.0%}  {job['timings']}")
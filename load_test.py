@@ -0,0 +1,93 @@
+"""
+Dashboard Load Test
+Serves app_flask locally and measures requests/sec and bytes transferred per
+page with response caching off (baseline) and on (compression, then ETag
+revalidation). Brotli is used when the optional 'brotli' package is installed
+"""
+
+import http.client
+import threading
+import time
+from werkzeug.serving import make_server, WSGIRequestHandler
+
+import app_flask
+
+ROUTES = ['/', '/data-overview', '/visualizations', '/forecasting', '/insights',
+          '/api/data-stats', '/api/forecast-data', '/api/anomalies']
+
+class QuietHandler(WSGIRequestHandler):
+    """Keep-alive request handler without per-request access logging"""
+    protocol_version = "HTTP/1.1"
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+def hammer(port, route, duration, headers, revalidate, results):
+    """One client: request a route repeatedly over a keep-alive connection"""
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    etag = None
+    count, transferred = 0, 0
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        request_headers = dict(headers)
+        if revalidate and etag:
+            request_headers['If-None-Match'] = etag
+        conn.request('GET', route, headers=request_headers)
+        response = conn.getresponse()
+        transferred += len(response.read())
+        etag = response.getheader('ETag') or etag
+        count += 1
+    conn.close()
+    results.append((count, transferred))
+
+def run_load(port, route, clients, duration, headers, revalidate):
+    """Run concurrent clients against one route; returns (req/s, bytes/request)"""
+    results = []
+    threads = [
+        threading.Thread(target=hammer, args=(port, route, duration, headers, revalidate, results))
+        for _ in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    count = sum(r[0] for r in results)
+    transferred = sum(r[1] for r in results)
+    return count / duration, transferred / max(count, 1)
+
+def run_load_test(clients=4, duration=3.0):
+    """Compare the uncached app with cached + compressed + conditional GETs"""
+    server = make_server('127.0.0.1', 0, app_flask.app, threaded=True,
+                         request_handler=QuietHandler)
+    port = server.server_port
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    scenarios = [
+        ('before', False, {}, False),
+        ('cached', True, {'Accept-Encoding': 'br, gzip'}, False),
+        ('304', True, {'Accept-Encoding': 'br, gzip'}, True),
+    ]
+
+    print(f"\n{clients} clients, {duration:.0f}s per route")
+    print("before: no cache | cached: cache + compression | 304: cached + If-None-Match\n")
+    print(f"{'route':<20}" + ''.join(f"{name + ' req/s':>13}" for name, *_ in scenarios)
+          + ''.join(f"{name + ' B/req':>14}" for name, *_ in scenarios))
+    try:
+        for route in ROUTES:
+            row = []
+            for name, cache_on, headers, revalidate in scenarios:
+                app_flask.app.config['RESPONSE_CACHE'] = cache_on
+                row.append(run_load(port, route, clients, duration, headers, revalidate))
+            print(f"{route:<20}" + ''.join(f"{rate:>13.1f}" for rate, _ in row)
+                  + ''.join(f"{size:>14,.0f}" for _, size in row))
+    finally:
+        server.shutdown()
+        app_flask.app.config['RESPONSE_CACHE'] = True
+
+if __name__ == "__main__":
+    print("="*60)
+    print("AP ELECTRICITY DASHBOARD - LOAD TEST")
+    print("="*60)
+    run_load_test()
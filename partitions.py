@@ -0,0 +1,366 @@
+"""
+Year/Month Partitioned Storage
+Mirrors the prepared data and forecast CSVs as one file per month with a small
+JSON index of each partition's date range, row count and column statistics.
+Readers ask for a date range and open only the partitions that overlap it;
+writers rewrite only the partitions whose rows changed
+"""
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import pandas as pd
+import numpy as np
+
+PARTITION_ROOT = "data/partitions"
+INDEX_FILE = "_index.json"
+# Bumped when the index layout changes; older indexes count as stale
+INDEX_VERSION = 2
+# Bytes hashed per read when checking that a source only grew at the end
+HASH_CHUNK = 1 << 20
+
+# Partitioned datasets and the CSV each mirrors (first column is the date)
+SOURCES = {
+    'prepared_data': "data/prepared_data.csv",
+    'prophet_forecast': "data/prophet_forecast.csv",
+    'xgboost_forecast': "data/xgboost_forecast.csv",
+}
+
+# Serializes sync() within a process; unique temp names keep processes apart
+_sync_lock = threading.Lock()
+
+def _stamp(path):
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+def _atomic_write(write, path):
+    """Write to a uniquely named temporary file and swap it into place"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        write(temp)
+        os.replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+def _digest(frame):
+    return hashlib.sha256(pd.util.hash_pandas_object(frame).values.tobytes()).hexdigest()[:16]
+
+def _stats(frame):
+    """Count, sum, min, max and sum of squares of each numeric column"""
+    numeric = frame.select_dtypes(include=[np.number])
+    return {col: [int(numeric[col].count()), float(numeric[col].sum()),
+                  float(numeric[col].min()), float(numeric[col].max()),
+                  float((numeric[col] ** 2).sum())]
+            for col in numeric.columns if numeric[col].count()}
+
+def _prefix_hash(path, size):
+    """SHA-256 of a file's first `size` bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while size > 0:
+            chunk = f.read(min(HASH_CHUNK, size))
+            if not chunk:
+                break
+            digest.update(chunk)
+            size -= len(chunk)
+    return digest.hexdigest()
+
+def _source_check(path):
+    """Size and content hash of a source CSV, to recognise a later append"""
+    size = os.path.getsize(path)
+    return {'size': size, 'hash': _prefix_hash(path, size)}
+
+def _dump_json(data, path):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+def load_index(name, root=PARTITION_ROOT):
+    """Partition index of a dataset, or None when it has not been written"""
+    path = os.path.join(root, name, INDEX_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def write_partitions(df, name, root=PARTITION_ROOT, mode='replace', source=None,
+                     source_check=None):
+    """
+    Store a date-indexed frame as one CSV per month
+    mode: 'replace' makes the dataset equal to df; 'append' merges df into the
+          months it touches (its dates replace stored rows on the same dates)
+          and leaves every other month alone
+    Only partitions whose rows actually changed are written
+    source / source_check: stamp and size/hash of the CSV the dataset mirrors
+
+    Returns the number of partition files written
+    """
+    if mode not in ('replace', 'append'):
+        raise ValueError(f"Unknown write mode '{mode}', expected 'replace' or 'append'")
+    directory = os.path.join(root, name)
+    index = load_index(name, root)
+    if index is None or index.get('version') != INDEX_VERSION:
+        index = {'partitions': {}}
+    old = index['partitions']
+    keys = df.index.strftime('%Y-%m')
+
+    partitions = dict(old) if mode == 'append' else {}
+    written = 0
+    for key, part in df.groupby(keys, sort=True):
+        if mode == 'append' and key in old:
+            stored = read_partition(name, old[key], root)
+            part = pd.concat([stored[~stored.index.isin(part.index)], part]).sort_index(kind='stable')
+        digest = _digest(part)
+        if key in old and old[key]['hash'] == digest:
+            partitions[key] = old[key]
+            continue
+
+        path = f"{key[:4]}/{key[5:]}.csv"
+        _atomic_write(part.to_csv, os.path.join(directory, path))
+        partitions[key] = {'path': path, 'start': str(part.index.min().date()),
+                           'end': str(part.index.max().date()), 'rows': len(part),
+                           'hash': digest, 'stats': _stats(part)}
+        written += 1
+
+    index = {'version': INDEX_VERSION, 'source': source, 'source_check': source_check,
+             'index_name': df.index.name, 'columns': list(df.columns),
+             'partitions': dict(sorted(partitions.items()))}
+    # The index goes after the partitions and stale months are removed after
+    # it, so readers never see it point at a missing partition
+    _atomic_write(lambda path: _dump_json(index, path), os.path.join(directory, INDEX_FILE))
+    for key in set(old) - set(partitions):
+        try:
+            os.remove(os.path.join(directory, old[key]['path']))
+        except FileNotFoundError:
+            pass
+    return written
+
+def _appended_rows(source_path, index):
+    """
+    Rows added to the end of a source CSV since the index was written, or None
+    when the file changed any other way. The old bytes are only hashed; just
+    the new lines are parsed
+    """
+    check = index.get('source_check')
+    if index.get('version') != INDEX_VERSION or not check:
+        return None
+    size = os.path.getsize(source_path)
+    if size < check['size'] or _prefix_hash(source_path, check['size']) != check['hash']:
+        return None
+
+    with open(source_path, 'rb') as f:
+        header = f.readline()
+        f.seek(check['size'] - 1)
+        tail = f.read()
+    # The old file must have ended on a complete line
+    if check['size'] < len(header) or not tail.startswith(b'\n'):
+        return None
+    appended = pd.read_csv(io.BytesIO(header + tail[1:]), index_col=0)
+    appended.index = pd.to_datetime(appended.index)
+    return appended
+
+def sync(name, root=PARTITION_ROOT, source_path=None):
+    """
+    Bring a dataset's partitions up to date with the CSV it mirrors
+    Rows appended to the CSV are read on their own and merged into the months
+    they touch; any other change re-partitions the whole file
+    Returns the index, or None when the source file does not exist
+    """
+    source_path = source_path or SOURCES[name]
+    with _sync_lock:
+        index = load_index(name, root)
+        if not os.path.exists(source_path):
+            return index
+        stamp = _stamp(source_path)
+        if index is None or index.get('source') != stamp:
+            check = _source_check(source_path)
+            appended = None if index is None else _appended_rows(source_path, index)
+            if appended is not None and list(appended.columns) == index['columns']:
+                write_partitions(appended, name, root, mode='append', source=stamp,
+                                 source_check=check)
+            else:
+                df = pd.read_csv(source_path, index_col=0, parse_dates=True)
+                write_partitions(df, name, root, source=stamp, source_check=check)
+            index = load_index(name, root)
+        return index
+
+def current_index(name, root=PARTITION_ROOT):
+    """
+    Index of a dataset, or None when it is missing or older than the CSV it
+    mirrors (e.g. a script rewrote the CSV outside a published stage)
+    Never writes: partitions are refreshed when stages publish, not on reads
+    """
+    index = load_index(name, root)
+    if index is None or index.get('version') != INDEX_VERSION:
+        return None
+    if name not in SOURCES:
+        return index
+    try:
+        return index if index.get('source') == _stamp(SOURCES[name]) else None
+    except FileNotFoundError:
+        return None
+
+def read_partition(name, entry, root=PARTITION_ROOT):
+    return pd.read_csv(os.path.join(root, name, entry['path']), index_col=0, parse_dates=True)
+
+def select(index, start=None, end=None):
+    """Index entries whose date range overlaps [start, end]"""
+    start = None if start is None else str(pd.Timestamp(start).date())
+    end = None if end is None else str(pd.Timestamp(end).date())
+    return [entry for entry in index['partitions'].values()
+            if (start is None or entry['end'] >= start) and (end is None or entry['start'] <= end)]
+
+def read_range(name, start=None, end=None, columns=None, root=PARTITION_ROOT):
+    """
+    Rows of a dataset between start and end (inclusive), opening only the
+    partitions that overlap the range
+    Returns None when the dataset is not available or its partitions are stale
+    """
+    index = current_index(name, root)
+    if index is None:
+        return None
+    entries = select(index, start, end)
+    if not entries:
+        empty = pd.DataFrame(columns=index['columns'],
+                             index=pd.DatetimeIndex([], name=index['index_name']))
+        return empty if columns is None else empty[columns]
+
+    frame = pd.concat([read_partition(name, entry, root) for entry in entries])
+    if start is not None:
+        frame = frame[frame.index >= pd.Timestamp(start)]
+    if end is not None:
+        frame = frame[frame.index < pd.Timestamp(end) + pd.Timedelta(days=1)]
+    return frame if columns is None else frame[columns]
+
+def head(name, n=5, root=PARTITION_ROOT):
+    """First n rows of a dataset, opening partitions from the start until there are enough"""
+    index = current_index(name, root)
+    if index is None:
+        return None
+    frames, rows = [], 0
+    for entry in index['partitions'].values():
+        if rows >= n:
+            break
+        frames.append(read_partition(name, entry, root))
+        rows += entry['rows']
+    if not frames:
+        return pd.DataFrame(columns=index['columns'],
+                            index=pd.DatetimeIndex([], name=index['index_name']))
+    return pd.concat(frames).head(n)
+
+def edge_rows(name, root=PARTITION_ROOT):
+    """First and last rows of a dataset, read from its first and last partitions only"""
+    index = current_index(name, root)
+    if index is None or not index['partitions']:
+        return None, None
+    entries = list(index['partitions'].values())
+    return (read_partition(name, entries[0], root).iloc[0],
+            read_partition(name, entries[-1], root).iloc[-1])
+
+def partition_stats(name, column, root=PARTITION_ROOT):
+    """
+    Per-month count, sum, mean, min and max of one column, from the index
+    alone (no partition is opened)
+    """
+    index = current_index(name, root)
+    if index is None:
+        return None
+    rows = [(key, *entry['stats'][column]) for key, entry in index['partitions'].items()
+            if column in entry['stats']]
+    stats = pd.DataFrame(rows, columns=['partition', 'count', 'sum', 'min', 'max', 'sumsq'])
+    stats['year'] = stats['partition'].str[:4].astype(int)
+    stats['month'] = stats['partition'].str[5:].astype(int)
+    stats['mean'] = stats['sum'] / stats['count']
+    return stats.set_index('partition')
+
+def describe(name, root=PARTITION_ROOT):
+    """
+    Count, mean, std, min and max of every numeric column (the moment rows of
+    DataFrame.describe), combined from the index alone
+    """
+    index = current_index(name, root)
+    if index is None:
+        return None
+    totals = {}
+    for entry in index['partitions'].values():
+        for column, (count, total, low, high, sumsq) in entry['stats'].items():
+            acc = totals.setdefault(column, [0, 0.0, np.inf, -np.inf, 0.0])
+            acc[0] += count
+            acc[1] += total
+            acc[2] = min(acc[2], low)
+            acc[3] = max(acc[3], high)
+            acc[4] += sumsq
+
+    table = {}
+    for column in index['columns']:
+        if column not in totals:
+            continue
+        count, total, low, high, sumsq = totals[column]
+        mean = total / count
+        var = (sumsq - count * mean ** 2) / (count - 1) if count > 1 else np.nan
+        table[column] = [count, mean, np.sqrt(max(var, 0.0)), low, high]
+    return pd.DataFrame(table, index=['count', 'mean', 'std', 'min', 'max'])
+
+def sync_all(root=PARTITION_ROOT):
+    """Refresh every partitioned dataset whose CSV exists"""
+    for name in SOURCES:
+        sync(name, root)
+
+def benchmark_partitions(n_years=(10, 100, 300), root="data/partitions_benchmark"):
+    """One-year range reads and one-day appends vs reading/writing the whole CSV"""
+    from synthetic_data import make_synthetic_demand
+
+    print(f"\n{'years':>6} {'rows':>8} {'full read (s)':>14} {'range read (s)':>15} "
+          f"{'full write (s)':>15} {'append (s)':>11} {'files':>6}")
+    try:
+        for years in n_years:
+            df = make_synthetic_demand(int(years * 365.25))
+            csv_path = os.path.join(root, "full.csv")
+            os.makedirs(root, exist_ok=True)
+
+            start = time.perf_counter()
+            df.to_csv(csv_path)
+            full_write = time.perf_counter() - start
+
+            start = time.perf_counter()
+            full = pd.read_csv(csv_path, index_col=0, parse_dates=True)
+            full = full[full.index.year == 2020]
+            full_read = time.perf_counter() - start
+
+            write_partitions(df.iloc[:-1], 'demand', root)
+            start = time.perf_counter()
+            written = write_partitions(df.iloc[-1:], 'demand', root, mode='append')
+            append_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            ranged = read_range('demand', '2020-01-01', '2020-12-31', root=root)
+            range_read = time.perf_counter() - start
+            assert len(ranged) == len(full)
+
+            print(f"{years:>6} {len(df):>8,} {full_read:>14.3f} {range_read:>15.3f} "
+                  f"{full_write:>15.3f} {append_time:>11.3f} {written:>6}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    print("="*60)
+    print("AP ELECTRICITY DEMAND - PARTITIONED STORAGE")
+    print("="*60)
+
+    sync_all()
+    for name in SOURCES:
+        index = load_index(name)
+        if index:
+            entries = list(index['partitions'].values())
+            print(f"[OK] {name}: {len(entries)} partitions, "
+                  f"{entries[0]['start']} to {entries[-1]['end']}")
+    benchmark_partitions()
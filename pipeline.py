@@ -0,0 +1,254 @@
+"""
+Pipeline Orchestrator
+Runs data preparation, EDA charts and both forecasting models as a DAG.
+Stages declare their input and output files; a stage is skipped when the
+content hash of its inputs matches the last successful run
+
+Usage:
+    python pipeline.py                 Run every stage that is out of date
+    python pipeline.py --force         Re-run everything
+    python pipeline.py xgboost         Run one stage (and anything upstream of it)
+    python pipeline.py --download      Fetch the Kaggle dataset first
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+
+import stages
+
+MANIFEST_PATH = "data/pipeline_manifest.json"
+REPORT_PATH = "data/pipeline_report.json"
+STAGING_DIR = os.path.join(".staging", "pipeline")
+
+VIZ = stages.VISUALIZATION_DIR
+XGBOOST_MODEL = "models/xgboost_model.json"
+XGBOOST_META = "models/xgboost_meta.json"
+WEATHER_CACHE = "data/weather_features.npz"
+
+# 03_ml_forecasting.py and every module it imports; each model stage loads all of them
+ML_SCRIPTS = ["03_ml_forecasting.py", "features.py", "scenarios.py", "calendar_index.py",
+              "forecast_store.py", "baselines.py", "reconcile.py", "prophet_fast.py",
+              "weather_features.py", "xgboost_incremental.py", "xgboost_intervals.py",
+              "xgboost_attributions.py"]
+
+class Stage:
+    """A pipeline step: a stages.* function plus the files it reads and writes"""
+
+    def __init__(self, name, func, inputs, outputs):
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.outputs = outputs
+
+# Scripts are listed as inputs so editing a stage's code also re-runs it. Every
+# forecast stage records its run in the accuracy store, which the ensemble
+# weights are read from
+STAGES = [
+    Stage('prepare', partial(stages.refresh_data, download=False),
+          inputs=["data/finalAPData.csv", "01_data_loading.py", "validation.py", "sketches.py",
+                  "weather_features.py", "features.py", "baselines.py"],
+          outputs=[stages.PREPARED_DATA, "data/validation_report.json", "data/quarantine.csv",
+                   "data/percentile_sketches.json", WEATHER_CACHE]),
+    Stage('eda', stages.render_charts,
+          inputs=[stages.PREPARED_DATA, "02_eda_visualization.py"],
+          outputs=[f"{VIZ}/01_demand_over_time.png", f"{VIZ}/02_monthly_seasonality.png",
+                   f"{VIZ}/03_yearly_comparison.png", f"{VIZ}/04_monthly_pattern.png",
+                   f"{VIZ}/05_temperature_correlation.png", f"{VIZ}/06_holiday_impact.png",
+                   f"{VIZ}/07_heatmap_monthly.png", f"{VIZ}/summary_statistics.txt"]),
+    Stage('baselines', stages.train_baselines,
+          inputs=[stages.PREPARED_DATA] + ML_SCRIPTS,
+          outputs=["data/baseline_forecast.csv", stages.FORECAST_STORE]),
+    # The model stages read the weather cache published by 'prepare' and never write it
+    Stage('prophet', stages.train_prophet,
+          inputs=[stages.PREPARED_DATA, WEATHER_CACHE] + ML_SCRIPTS,
+          outputs=["data/prophet_forecast.csv", "data/prophet_fitted.csv",
+                   f"{VIZ}/08_prophet_forecast.png", f"{VIZ}/09_prophet_components.png",
+                   "models/prophet_params.json", stages.FORECAST_STORE]),
+    # Update mode continues boosting the saved model, so it is an input as well as an output
+    Stage('xgboost', stages.train_xgboost,
+          inputs=[stages.PREPARED_DATA, WEATHER_CACHE, XGBOOST_MODEL, XGBOOST_META] + ML_SCRIPTS,
+          outputs=["data/xgboost_forecast.csv", "data/xgboost_fitted.csv",
+                   f"{VIZ}/10_xgboost_forecast.png", "models/xgboost_attributions.json",
+                   XGBOOST_MODEL, XGBOOST_META, stages.FORECAST_STORE]),
+    Stage('ensemble', stages.blend_forecasts,
+          inputs=["data/prophet_forecast.csv", "data/xgboost_forecast.csv",
+                  stages.FORECAST_STORE] + ML_SCRIPTS,
+          outputs=["data/ensemble_forecast.csv"]),
+]
+
+def file_hash(path):
+    """SHA-256 of a file's contents, or None if it does not exist"""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def inputs_hash(stage):
+    """Combined hash of every input file of a stage"""
+    digest = hashlib.sha256()
+    for path in stage.inputs:
+        digest.update(f"{path}:{file_hash(path)}\n".encode())
+    return digest.hexdigest()
+
+def load_manifest(path=MANIFEST_PATH):
+    """Input hashes recorded by the last successful run of each stage"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    """Write the manifest atomically"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def upstream(stage, stage_list):
+    """Stages producing any of this stage's inputs"""
+    return [other for other in stage_list
+            if other is not stage and set(other.outputs) & set(stage.inputs)]
+
+def select_stages(targets, stage_list=STAGES):
+    """Requested stages plus everything upstream of them, in declaration order"""
+    if not targets:
+        return list(stage_list)
+
+    by_name = {stage.name: stage for stage in stage_list}
+    unknown = [name for name in targets if name not in by_name]
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(unknown)}. "
+                         f"Choose from: {', '.join(by_name)}")
+
+    selected = set()
+    pending = [by_name[name] for name in targets]
+    while pending:
+        stage = pending.pop()
+        if stage.name not in selected:
+            selected.add(stage.name)
+            pending.extend(upstream(stage, stage_list))
+    return [stage for stage in stage_list if stage.name in selected]
+
+def _run_stage(stage, work_dir):
+    """Executed in a worker process: run one stage into its staging folder"""
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+    start = time.perf_counter()
+    outputs = stage.func(work_dir)
+    return outputs, time.perf_counter() - start
+
+def run_pipeline(targets=None, force=False, max_workers=3, stage_list=STAGES):
+    """
+    Run out-of-date stages, concurrently wherever their inputs allow
+    Returns the timing report (also written to data/pipeline_report.json)
+    """
+    selected = select_stages(targets, stage_list)
+    manifest = load_manifest()
+    report = {'started_at': time.strftime('%Y-%m-%d %H:%M:%S'), 'stages': {}}
+    done, failed = set(), set()
+    running = {}
+    pipeline_start = time.perf_counter()
+
+    def ready(stage):
+        deps = [dep.name for dep in upstream(stage, selected)]
+        return all(dep in done for dep in deps) and not any(dep in failed for dep in deps)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = list(selected)
+        while pending or running:
+            # Start (or skip) every stage whose upstream stages have finished
+            for stage in [s for s in pending if ready(s)]:
+                pending.remove(stage)
+                digest = inputs_hash(stage)
+                recorded = manifest.get(stage.name, {})
+                outputs_present = all(os.path.exists(path) for path in stage.outputs)
+                if not force and recorded.get('inputs_hash') == digest and outputs_present:
+                    report['stages'][stage.name] = {'status': 'skipped', 'seconds': 0.0}
+                    print(f"[OK] {stage.name}: inputs unchanged, skipping")
+                    done.add(stage.name)
+                    continue
+
+                print(f"Running stage: {stage.name}...")
+                work_dir = os.path.join(STAGING_DIR, stage.name)
+                running[executor.submit(_run_stage, stage, work_dir)] = stage
+
+            # Stages downstream of a failure can never start
+            blocked = [s for s in pending
+                       if any(dep.name in failed for dep in upstream(s, selected))]
+            while blocked:
+                for stage in blocked:
+                    pending.remove(stage)
+                    failed.add(stage.name)
+                    report['stages'][stage.name] = {'status': 'blocked', 'seconds': 0.0}
+                blocked = [s for s in pending
+                           if any(dep.name in failed for dep in upstream(s, selected))]
+
+            if not running:
+                if pending and not any(ready(s) for s in pending):
+                    raise RuntimeError("Pipeline stages have a dependency cycle")
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                try:
+                    outputs, seconds = future.result()
+                except Exception as e:
+                    print(f"[ERROR] Stage {stage.name} failed: {e}")
+                    failed.add(stage.name)
+                    report['stages'][stage.name] = {'status': 'failed', 'error': str(e)}
+                    continue
+
+                # Publish before dependents are scheduled so they hash the new files.
+                # Inputs are hashed again afterwards: a stage that rewrites one of its
+                # own inputs (the saved XGBoost model) is then current, not stale
+                stages.publish(outputs)
+                manifest[stage.name] = {'inputs_hash': inputs_hash(stage),
+                                        'finished_at': time.strftime('%Y-%m-%d %H:%M:%S')}
+                save_manifest(manifest)
+                done.add(stage.name)
+                report['stages'][stage.name] = {'status': 'ran', 'seconds': round(seconds, 3)}
+                print(f"[OK] {stage.name} finished in {seconds:.1f}s")
+
+    report['total_seconds'] = round(time.perf_counter() - pipeline_start, 3)
+    with open(REPORT_PATH, 'w') as f:
+        json.dump(report, f, indent=2)
+    shutil.rmtree(STAGING_DIR, ignore_errors=True)
+    return report
+
+def print_report(report):
+    """Print the per-stage timing report"""
+    print("\n" + "="*60)
+    print("PIPELINE TIMING REPORT")
+    print("="*60)
+    for name, entry in report['stages'].items():
+        print(f"  {name:<10} {entry['status']:<8} {entry.get('seconds', 0):>8.2f}s")
+    print(f"  {'total':<10} {'':<8} {report['total_seconds']:>8.2f}s")
+    print(f"\n[OK] Saved report to {REPORT_PATH}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AP electricity demand pipeline")
+    parser.add_argument('targets', nargs='*', help="stages to run (default: all)")
+    parser.add_argument('--force', action='store_true', help="ignore recorded input hashes")
+    parser.add_argument('--download', action='store_true', help="fetch the Kaggle dataset first")
+    parser.add_argument('--workers', type=int, default=3)
+    args = parser.parse_args()
+
+    print("="*60)
+    print("AP ELECTRICITY DEMAND - PIPELINE")
+    print("="*60)
+
+    if args.download:
+        stages.load_script("01_data_loading.py").copy_dataset_to_project()
+
+    report = run_pipeline(args.targets, force=args.force, max_workers=args.workers)
+    print_report(report)
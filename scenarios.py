@@ -0,0 +1,199 @@
+"""
+Temperature Scenario Engine
+Builds day-of-year temperature/rain climatologies once and scores hundreds of
+"what if it is hotter" scenarios through the fitted models as batched arrays
+"""
+
+import time
+import pandas as pd
+import numpy as np
+
+DEFAULT_QUANTILES = (0.1, 0.5, 0.9)
+
+def build_climatology(df, columns=('temp', 'rain'), smooth_days=15):
+    """
+    Mean value per day of year (1-366), smoothed with a circular moving average
+    Returns a frame indexed by day of year
+    """
+    climatology = {}
+    doy = df.index.dayofyear
+    for col in columns:
+        if col not in df.columns:
+            continue
+        daily = df[col].groupby(doy).mean().reindex(range(1, 367))
+        values = daily.interpolate(limit_direction='both').values
+        # Wrap the year around so late December smooths into early January
+        kernel = np.ones(smooth_days) / smooth_days
+        padded = np.concatenate([values[-smooth_days:], values, values[:smooth_days]])
+        climatology[col] = np.convolve(padded, kernel, mode='same')[smooth_days:-smooth_days]
+    return pd.DataFrame(climatology, index=pd.RangeIndex(1, 367, name='day_of_year'))
+
+def climatology_for_dates(climatology, dates, column='temp'):
+    """Look up climatological values for a sequence of dates"""
+    return climatology[column].values[pd.DatetimeIndex(dates).dayofyear - 1]
+
+def make_scenarios(climatology, dates, n_scenarios=200, delta=0.0, months=None,
+                   noise_std=1.5, persistence=0.7, seed=42):
+    """
+    Temperature paths for every scenario as one (n_scenarios, n_days) array
+    delta: degrees added on the selected months (all months when months is None)
+    noise_std / persistence: AR(1) day-to-day weather noise around climatology
+    """
+    dates = pd.DatetimeIndex(dates)
+    base = climatology_for_dates(climatology, dates)
+    shift = np.full(len(dates), float(delta))
+    if months is not None:
+        shift = np.where(np.isin(dates.month, list(months)), shift, 0.0)
+
+    # AR(1) noise via a scaled cumulative filter, generated for all scenarios at once
+    rng = np.random.default_rng(seed)
+    shocks = rng.normal(0, noise_std * np.sqrt(1 - persistence ** 2), (n_scenarios, len(dates)))
+    noise = np.empty_like(shocks)
+    noise[:, 0] = rng.normal(0, noise_std, n_scenarios)
+    for i in range(1, len(dates)):
+        noise[:, i] = persistence * noise[:, i - 1] + shocks[:, i]
+
+    return base[None, :] + shift[None, :] + noise
+
+def _calendar_exog(calendar, dates, needed):
+    """Holiday-proximity values for the models trained with them"""
+    from calendar_index import proximity_features, CALENDAR_FEATURES
+
+    if not set(CALENDAR_FEATURES) & set(needed):
+        return None
+    if calendar is None:
+        raise ValueError("Model uses holiday features; pass the holiday calendar")
+    return proximity_features(calendar, dates)
+
+def _weather(df, dates, temps, needed):
+    """Weather features of every scenario for the models trained with them"""
+    from weather_features import WEATHER_FEATURES, future_weather
+
+    if not set(WEATHER_FEATURES) & set(needed):
+        return None
+    return future_weather(df, dates, temps)
+
+def score_prophet(params, dates, temps, calendar=None, weather=None):
+    """
+    Score every scenario through the extracted Prophet coefficients
+    The seasonal part is computed once; only the temperature term (and the
+    weather regressors derived from temperature) varies by scenario
+    weather: {feature: (n_scenarios, n_days)} for models with weather regressors
+    """
+    from prophet_fast import fast_predict
+
+    varying = {name: np.asarray(values) for name, values in {'temp': temps, **(weather or {})}.items()
+               if name in params['regressors']}
+    regressors = {name: np.full(len(dates), params['regressors'][name]['mu']) for name in varying}
+    exog = _calendar_exog(calendar, dates, params['regressors'])
+    if exog is not None:
+        regressors.update({col: exog[col].values for col in exog.columns})
+    base = fast_predict(params, dates, regressors, interval=None, components=True)
+
+    # Regressor betas sit after all Fourier columns, in regressor order
+    offset = sum(2 * s['fourier_order'] for s in params['seasonalities'].values())
+    names = list(params['regressors'])
+    additive = np.zeros((1, len(dates)))
+    multiplicative = np.zeros((1, len(dates)))
+    for name, values in varying.items():
+        regressor = params['regressors'][name]
+        coefficient = params['beta'][offset + names.index(name)] / regressor['std']
+        effect = coefficient * (values - regressor['mu'])
+        if name in params['additive_components']:
+            additive = additive + effect * params['y_scale']
+        else:
+            multiplicative = multiplicative + effect
+
+    trend = base['trend'].values[None, :]
+    return (trend * (1 + base['multiplicative_terms'].values[None, :] + multiplicative)
+            + base['additive_terms'].values[None, :] + additive)
+
+def score_xgboost(model, df, dates, temps, calendar=None, weather_options=None):
+    """
+    Recursive XGBoost forecasts for all scenarios, one batched predict per day
+    weather_options: passed to weather_features.load_or_build for models with weather features
+    """
+    from features import create_lag_features, recursive_forecast
+    from weather_features import WEATHER_FEATURES
+
+    needed = model.get_booster().feature_names or []
+    exog = _calendar_exog(calendar, dates, needed)
+    weather = bool(set(WEATHER_FEATURES) & set(needed))
+    df_ml, features = create_lag_features(df, calendar if exog is not None else None,
+                                          weather=weather and (weather_options or True))
+    return recursive_forecast(model, df_ml, features, pd.DatetimeIndex(dates), temps, exog)
+
+def scenario_bands(dates, values, quantiles=DEFAULT_QUANTILES):
+    """Quantile bands across scenarios per date"""
+    bands = np.quantile(values, quantiles, axis=0)
+    frame = pd.DataFrame({'ds': pd.DatetimeIndex(dates)})
+    for q, band in zip(quantiles, bands):
+        frame[f"p{int(round(q * 100))}"] = band
+    return frame
+
+def run_scenarios(df, prophet_params=None, xgboost_model=None, delta=3.0, months=None,
+                  n_scenarios=200, prophet_days=365, xgboost_days=30, seed=42,
+                  calendar=None, weather_options=None):
+    """
+    Score the baseline (climatology) and the perturbed scenarios through each model
+    calendar: holiday calendar covering the horizon, for models fitted with holiday features
+    weather_options: weather feature store options for XGBoost (see score_xgboost)
+    Returns {model: frame of ds, baseline, p10, p50, p90}
+    """
+    climatology = build_climatology(df)
+    start = df.index.max() + pd.Timedelta(days=1)
+    results = {}
+
+    models = []
+    if prophet_params is not None:
+        models.append(('prophet', prophet_days,
+                       lambda dates, temps: score_prophet(
+                           prophet_params, dates, temps, calendar,
+                           _weather(df, dates, temps, prophet_params['regressors']))))
+    if xgboost_model is not None:
+        models.append(('xgboost', xgboost_days,
+                       lambda dates, temps: score_xgboost(xgboost_model, df, dates, temps, calendar,
+                                                               weather_options)))
+
+    for name, days, score in models:
+        dates = pd.date_range(start, periods=days, freq='D')
+        temps = make_scenarios(climatology, dates, n_scenarios, delta, months, seed=seed)
+        # Row 0 is the unperturbed climatology so the baseline rides in the same batch
+        baseline_temp = climatology_for_dates(climatology, dates)[None, :]
+        scored = score(dates, np.vstack([baseline_temp, temps]))
+        bands = scenario_bands(dates, scored[1:])
+        bands.insert(1, 'baseline', scored[0])
+        results[name] = bands
+    return results
+
+def benchmark_scenarios(df, n_scenarios=500):
+    """Report batched scenario scoring cost for each available model"""
+    from prophet_fast import load_params
+    from xgboost_incremental import load_model
+    from calendar_index import load_calendar
+
+    params = load_params()
+    model, _ = load_model()
+    if params is None and model is None:
+        print("[WARNING] No fitted models in models/. Run 03_ml_forecasting.py first.")
+        return
+
+    start = time.perf_counter()
+    calendar = load_calendar(end=df.index.max() + pd.Timedelta(days=365))
+    results = run_scenarios(df, params, model, delta=3.0, months=[5], n_scenarios=n_scenarios,
+                            calendar=calendar)
+    elapsed = time.perf_counter() - start
+    print(f"\nScored {n_scenarios} scenarios through {', '.join(results)} in {elapsed:.2f}s")
+    for name, bands in results.items():
+        may = bands[bands['ds'].dt.month == 5]
+        if len(may):
+            print(f"  {name}: May +3C -> median {may['p50'].mean():.1f} MU "
+                  f"vs baseline {may['baseline'].mean():.1f} MU")
+
+if __name__ == "__main__":
+    print("="*60)
+    print("AP ELECTRICITY DEMAND - TEMPERATURE SCENARIOS")
+    print("="*60)
+
+    df = pd.read_csv("data/prepared_data.csv", index_col=0, parse_dates=True)
+    benchmark_scenarios(df)
@@ -0,0 +1,305 @@
+"""
+Mergeable Quantile Sketches for Demand Percentiles
+Keeps a KLL sketch of daily demand per month, year and season, updated as
+rows are appended, so percentiles, load-duration curves and peak-day counts
+are answered from a few hundred numbers per bucket instead of the full history
+"""
+
+import json
+import os
+import time
+import pandas as pd
+import numpy as np
+
+SKETCH_PATH = "data/percentile_sketches.json"
+
+# Sketch size: rank error is roughly 1.7 / K (under 1% at 200)
+K = 200
+# Days above this all-history quantile count as peak days
+PEAK_QUANTILE = 0.95
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+GROUPINGS = ('all', 'year', 'month', 'season')
+
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+# Andhra Pradesh seasons by month (IMD convention)
+SEASONS = {12: 'Winter', 1: 'Winter', 2: 'Winter', 3: 'Summer', 4: 'Summer', 5: 'Summer',
+           6: 'Monsoon', 7: 'Monsoon', 8: 'Monsoon', 9: 'Monsoon',
+           10: 'Post-monsoon', 11: 'Post-monsoon'}
+SEASON_ORDER = ['Winter', 'Summer', 'Monsoon', 'Post-monsoon']
+
+class KLLSketch:
+    """
+    KLL quantile sketch: a stack of compactors where an item at level h stands
+    for 2**h values. A full level is sorted and every other item (random
+    offset) moves up, so memory stays O(K) however many values are added.
+    Two sketches merge by concatenating their levels and compacting
+    """
+
+    def __init__(self, k=K, seed=0):
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        # Lower levels get geometrically smaller compactors (c = 2/3)
+        depth = len(self.levels) - 1 - level
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(items)
+            # An odd item out stays behind so no weight is lost
+            keep = items[:len(items) % 2]
+            pairs = items[len(items) % 2:]
+            promoted = pairs[self._rng.integers(2)::2]
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level = 0 if level == 0 else level - 1
+
+    def update(self, values):
+        """Add a batch of values"""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** h)
+                                  for h, items in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """Approximate quantile(s); the exact min and max at q = 0 and 1"""
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        if self.n == 0:
+            return np.full(len(q), np.nan)
+        items, cumulative = self._weighted()
+        position = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        result = items[np.minimum(position, len(items) - 1)]
+        return np.where(q <= 0, self.min, np.where(q >= 1, self.max, result))
+
+    def cdf(self, x):
+        """Approximate share of values <= x"""
+        if self.n == 0:
+            return np.nan
+        items, cumulative = self._weighted()
+        position = np.searchsorted(items, x, side='right')
+        return float(cumulative[position - 1] / cumulative[-1]) if position else 0.0
+
+    def to_dict(self):
+        return {'k': self.k, 'n': self.n, 'min': float(self.min), 'max': float(self.max),
+                'levels': [items.tolist() for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['k'])
+        sketch.n = data['n']
+        sketch.min, sketch.max = data['min'], data['max']
+        sketch.levels = [np.asarray(items, dtype=float) for items in data['levels']]
+        return sketch
+
+def bucket_labels(dates, by):
+    """Bucket of each date for one grouping"""
+    if by == 'all':
+        return np.full(len(dates), 'all', dtype=object)
+    if by == 'year':
+        return dates.year.astype(str).values
+    if by == 'month':
+        return np.asarray(MONTH_NAMES, dtype=object)[dates.month.values - 1]
+    if by == 'season':
+        return pd.Series(dates.month).map(SEASONS).values
+    raise ValueError(f"Unknown grouping '{by}', expected one of {GROUPINGS}")
+
+def new_store():
+    return {'first_date': None, 'last_date': None,
+            'sketches': {by: {} for by in GROUPINGS}}
+
+def update_store(store, demand):
+    """
+    Add days after the store's last date to every bucket's sketch
+    demand: daily demand series indexed by date
+    Returns the number of days added
+    """
+    demand = demand[~demand.index.duplicated(keep='first')].sort_index().dropna()
+    if store['last_date'] is not None:
+        demand = demand[demand.index > pd.Timestamp(store['last_date'])]
+    if len(demand) == 0:
+        return 0
+
+    values = demand.values
+    for by in GROUPINGS:
+        codes, labels = pd.factorize(bucket_labels(demand.index, by))
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+        for i, label in enumerate(labels):
+            sketch = store['sketches'][by].setdefault(label, KLLSketch())
+            sketch.update(values[order[bounds[i]:bounds[i + 1]]])
+
+    if store['first_date'] is None:
+        store['first_date'] = str(demand.index[0].date())
+    store['last_date'] = str(demand.index[-1].date())
+    return len(demand)
+
+def save_store(store, path=SKETCH_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    data = {**store, 'sketches': {by: {label: sketch.to_dict() for label, sketch in buckets.items()}
+                                  for by, buckets in store['sketches'].items()}}
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+def load_store(path=SKETCH_PATH):
+    """Saved sketches, or None when there are none yet"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    data['sketches'] = {by: {label: KLLSketch.from_dict(sketch) for label, sketch in buckets.items()}
+                        for by, buckets in data['sketches'].items()}
+    return data
+
+def covering_store(df, path=SKETCH_PATH):
+    """
+    Saved sketches topped up in memory with the days of df['demand'] after
+    them, rebuilt when the history no longer extends the saved one; never writes
+    Returns (store, number of days added)
+    """
+    store = load_store(path)
+    first = str(df.index.min().date())
+    last = str(df.index.max().date())
+    if store is None or store['first_date'] != first or store['last_date'] > last:
+        store = new_store()
+    return store, update_store(store, df['demand'])
+
+def sync_store(df, path=SKETCH_PATH, output_path=None):
+    """
+    Bring the saved sketches up to date with df and write them back
+    output_path: write here instead of path (a stage's work folder); always written
+    """
+    store, added = covering_store(df, path)
+    if added or output_path:
+        save_store(store, output_path or path)
+    return store
+
+def _ordered(buckets, by):
+    """Buckets in calendar order"""
+    order = {'month': MONTH_NAMES, 'season': SEASON_ORDER}.get(by)
+    return sorted(buckets, key=order.index) if order else sorted(buckets)
+
+def percentiles(store, by='month', quantiles=DEFAULT_QUANTILES, peak_quantile=PEAK_QUANTILE):
+    """
+    Count, range and quantiles of daily demand per bucket, plus the number of
+    peak days (above the all-history peak_quantile)
+    """
+    if by not in GROUPINGS:
+        raise ValueError(f"Unknown grouping '{by}', expected one of {GROUPINGS}")
+    threshold = float(store['sketches']['all']['all'].quantile(peak_quantile)[0])
+    buckets = store['sketches'][by]
+    rows = []
+    for label in _ordered(buckets, by):
+        sketch = buckets[label]
+        values = sketch.quantile(quantiles)
+        rows.append({
+            'bucket': label,
+            'days': int(sketch.n),
+            'min': float(sketch.min),
+            'max': float(sketch.max),
+            **{f"p{q * 100:g}": float(v) for q, v in zip(quantiles, values)},
+            'peak_days': int(round(sketch.n * (1 - sketch.cdf(threshold)))),
+        })
+    return {'by': by, 'peak_threshold': threshold, 'buckets': rows}
+
+def load_duration(store, by='all', points=101):
+    """
+    Load-duration curve per bucket: the demand exceeded on each share of days,
+    from 0% (the peak) to 100% (the minimum)
+    """
+    if by not in GROUPINGS:
+        raise ValueError(f"Unknown grouping '{by}', expected one of {GROUPINGS}")
+    exceeded = np.linspace(0, 1, points)
+    buckets = store['sketches'][by]
+    return {'by': by, 'exceeded': exceeded.round(4).tolist(),
+            'curves': {label: buckets[label].quantile(1 - exceeded).round(2).tolist()
+                       for label in _ordered(buckets, by)}}
+
+def benchmark_sketches(n_years=(10, 100, 300), quantiles=(0.5, 0.95, 0.99)):
+    """
+    Percentiles by month from sketches vs exact groupby quantiles as history
+    grows, the cost of appending one day, and the worst rank error
+    """
+    from synthetic_data import make_synthetic_demand
+
+    print(f"\n{'years':>6} {'days':>8} {'exact (s)':>10} {'build (s)':>10} {'query (ms)':>11} "
+          f"{'append (ms)':>12} {'rank error':>11}")
+    for years in n_years:
+        df = make_synthetic_demand(int(years * 365.25))
+
+        start = time.perf_counter()
+        exact = df.groupby(bucket_labels(df.index, 'month'))['demand'].quantile(list(quantiles))
+        exact_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store = new_store()
+        update_store(store, df['demand'].iloc[:-1])
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        update_store(store, df['demand'].iloc[-1:])
+        append_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = percentiles(store, 'month', quantiles)
+        query_time = time.perf_counter() - start
+
+        # Rank error: how far the sketch's answer sits from the requested rank
+        worst = 0.0
+        months = bucket_labels(df.index, 'month')
+        for row in result['buckets']:
+            values = np.sort(df['demand'].values[months == row['bucket']])
+            for q in quantiles:
+                rank = np.searchsorted(values, row[f"p{q * 100:g}"], side='right') / len(values)
+                worst = max(worst, abs(rank - q))
+        assert len(exact) == 12 * len(quantiles)
+
+        print(f"{years:>6} {len(df):>8,} {exact_time:>10.4f} {build_time:>10.3f} "
+              f"{query_time * 1000:>11.2f} {append_time * 1000:>12.2f} {worst:>11.2%}")
+
+if __name__ == "__main__":
+    print("="*60)
+    print("AP ELECTRICITY DEMAND - PERCENTILE SKETCHES")
+    print("="*60)
+
+    df = pd.read_csv("data/prepared_data.csv", index_col=0, parse_dates=True)
+    store = sync_store(df)
+    print(f"\n[OK] Sketches cover {store['first_date']} to {store['last_date']}")
+    print(pd.DataFrame(percentiles(store, 'season')['buckets']).round(1).to_string(index=False))
+    benchmark_sketches()
@@ -0,0 +1,154 @@
+"""
+Pipeline Stages
+Runs the numbered analysis scripts as callable stages that write into a
+work folder, so results are swapped into place, file by file, only once
+the stages that produce them have finished
+"""
+
+import importlib.util
+import os
+
+PREPARED_DATA = "data/prepared_data.csv"
+VISUALIZATION_DIR = "dashboards/visualizations"
+MODEL_DIR = "models"
+FORECAST_STORE = "data/forecast_store.db"
+
+# Weather feature options of the model stages: read the cache the data refresh
+# stage publishes, never write the live copy from a worker
+STAGE_WEATHER = {'save': False}
+
+# Files a forecast stage writes that belong in models/ rather than data/
+MODEL_FILES = ('prophet_params.json', 'xgboost_model.json', 'xgboost_meta.json',
+               'xgboost_attributions.json')
+
+_scripts = {}
+
+def load_script(filename):
+    """Import one of the numbered scripts (not importable by name) as a module"""
+    if filename not in _scripts:
+        spec = importlib.util.spec_from_file_location(
+            os.path.splitext(filename)[0].lstrip('0123456789_'), filename)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _scripts[filename] = module
+    return _scripts[filename]
+
+def _outputs(work_dir, dest_dir):
+    """Map every file written to work_dir onto its final location in dest_dir"""
+    return {
+        f"{dest_dir}/{name}": os.path.join(work_dir, name)
+        for name in sorted(os.listdir(work_dir))
+    }
+
+def refresh_data(work_dir, download=True, source_path="data/finalAPData.csv"):
+    """Stage 1: download the raw dataset and prepare it (01_data_loading.py)"""
+    loader = load_script("01_data_loading.py")
+    if download:
+        loader.copy_dataset_to_project()
+
+    df = loader.prepare_data(loader.load_data(source_path), output_dir=work_dir)
+    df.to_csv(os.path.join(work_dir, "prepared_data.csv"))
+
+    # Percentile sketches follow the prepared data; the dashboard only loads them
+    import sketches
+    sketch_path = os.path.join(work_dir, os.path.basename(sketches.SKETCH_PATH))
+    sketches.sync_store(df, output_path=sketch_path)
+
+    # So does the weather feature cache the models read
+    import weather_features
+    weather_path = os.path.join(work_dir, os.path.basename(weather_features.WEATHER_CACHE))
+    weather_features.load_or_build(df, save=False, output_path=weather_path)
+    return _outputs(work_dir, "data")
+
+def render_charts(work_dir, data_path=PREPARED_DATA):
+    """Stage 2: render the EDA charts (02_eda_visualization.py)"""
+    eda = load_script("02_eda_visualization.py")
+    eda.create_all_visualizations(eda.load_prepared_data(data_path), work_dir)
+    return _outputs(work_dir, VISUALIZATION_DIR)
+
+def _store_path(work_dir):
+    """Staged accuracy store a forecast stage records its run in"""
+    return os.path.join(work_dir, os.path.basename(FORECAST_STORE))
+
+def _forecast_outputs(work_dir):
+    """Forecast stages write CSVs, charts, models and runs; route each to its folder"""
+    outputs = {}
+    for name in sorted(os.listdir(work_dir)):
+        if name.endswith(('-wal', '-shm', '-journal')):
+            continue
+        if name.endswith('.png'):
+            dest_dir = VISUALIZATION_DIR
+        elif name in MODEL_FILES:
+            dest_dir = MODEL_DIR
+        else:
+            dest_dir = "data"
+        outputs[f"{dest_dir}/{name}"] = os.path.join(work_dir, name)
+    return outputs
+
+def train_baselines(work_dir, data_path=PREPARED_DATA):
+    """Stage 3: vectorized baseline forecasts (03_ml_forecasting.py)"""
+    ml = load_script("03_ml_forecasting.py")
+    df = ml.load_prepared_data(data_path)
+    ml.run_baseline_stage(df, work_dir, group='region' if 'region' in df.columns else None,
+                          store_path=_store_path(work_dir))
+    return _forecast_outputs(work_dir)
+
+def train_prophet(work_dir, data_path=PREPARED_DATA, periods=1000):
+    """Stage 3a: Prophet forecast (03_ml_forecasting.py)"""
+    ml = load_script("03_ml_forecasting.py")
+    ml.run_prophet_stage(ml.load_prepared_data(data_path), work_dir, work_dir, periods,
+                         weather=STAGE_WEATHER, model_dir=work_dir,
+                         store_path=_store_path(work_dir))
+    return _forecast_outputs(work_dir)
+
+def train_xgboost(work_dir, data_path=PREPARED_DATA, mode='update'):
+    """Stage 3b: XGBoost forecast (03_ml_forecasting.py)"""
+    ml = load_script("03_ml_forecasting.py")
+    ml.run_xgboost_stage(ml.load_prepared_data(data_path), work_dir, work_dir, mode,
+                         weather=STAGE_WEATHER, model_dir=work_dir,
+                         store_path=_store_path(work_dir))
+    return _forecast_outputs(work_dir)
+
+def blend_forecasts(work_dir, data_path=PREPARED_DATA, prophet_path="data/prophet_forecast.csv",
+                    xgboost_path="data/xgboost_forecast.csv"):
+    """Stage 4: Prophet + XGBoost ensemble (03_ml_forecasting.py)"""
+    ml = load_script("03_ml_forecasting.py")
+    ml.run_ensemble_stage(ml.load_prepared_data(data_path), work_dir, prophet_path, xgboost_path,
+                          store_path=_store_path(work_dir))
+    return _forecast_outputs(work_dir)
+
+def merge_outputs(staged, outputs):
+    """
+    Add one stage's outputs to those staged earlier in the same job
+    Every forecast stage stages its own accuracy store, so later ones are
+    folded into the first rather than replacing it
+    """
+    if FORECAST_STORE in staged and FORECAST_STORE in outputs:
+        import forecast_store
+        outputs = dict(outputs)
+        forecast_store.import_runs(outputs.pop(FORECAST_STORE), staged[FORECAST_STORE])
+    staged.update(outputs)
+    return staged
+
+def publish(outputs):
+    """
+    Swap staged files into place
+    Each os.replace is atomic, so readers see either the old or the new copy
+    of a file, never a partial one. Files are replaced one at a time, though:
+    while a publish is in progress a reader can see a new forecast next to
+    the previous model. Staged accuracy stores hold only their own runs, so
+    they are merged into the live store rather than replacing its history
+    """
+    import forecast_store
+    for dest, staged in outputs.items():
+        if dest == FORECAST_STORE:
+            forecast_store.import_runs(staged, dest)
+            continue
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.replace(staged, dest)
+
+    # Repartition published datasets now rather than on their first read
+    import partitions
+    for name, source in partitions.SOURCES.items():
+        if source in outputs:
+            partitions.sync(name)
@@ -0,0 +1,45 @@
+"""
+Synthetic Demand Data for Scale Testing
+Generates prepared_data-shaped frames of arbitrary length for benchmarks
+"""
+
+import pandas as pd
+import numpy as np
+
+# Real data ends here; synthetic history is laid out backwards from this date
+END_DATE = "2023-05-14"
+
+def make_synthetic_demand(n_days, n_regions=1, end=END_DATE, seed=42):
+    """
+    Create a synthetic daily demand frame with the prepared_data.csv columns
+    n_days: number of days per region (capped by the pandas Timestamp range)
+    n_regions: adds a 'region' column and stacks one series per region when > 1
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=end, periods=n_days, freq='D', name='Date')
+    doy = dates.dayofyear.values
+    dow = dates.dayofweek.values
+    t = np.arange(n_days)
+
+    frames = []
+    for region in range(n_regions):
+        seasonal_temp = 32 + 5 * np.sin(2 * np.pi * (doy - 80) / 365.25)
+        temp = seasonal_temp + rng.normal(0, 1.5, n_days)
+        rain = np.clip(rng.gamma(0.4, 5.0, n_days) * (doy > 150) * (doy < 300), 0, None)
+        scale = 1.0 + 0.2 * region
+        demand = scale * (140 + 0.01 * t + 3.0 * (temp - 32)
+                          - 6.0 * (dow == 6) + rng.normal(0, 5, n_days))
+
+        frame = pd.DataFrame({
+            'demand': demand,
+            'temp': temp,
+            'rain': rain,
+            'inflation': 0.05 + rng.normal(0, 0.01, n_days),
+            'day': dates.day_name(),
+            'Holiday': np.where(rng.random(n_days) < 0.06, 'Holiday', 'Work'),
+        }, index=dates)
+        if n_regions > 1:
+            frame['region'] = f"R{region:03d}"
+        frames.append(frame)
+
+    return pd.concat(frames) if n_regions > 1 else frames[0]
@@ -0,0 +1,19 @@
+"""
+Shared test setup
+Makes the flat top-level modules importable and runs each test in a fresh
+working folder, since modules read and write paths relative to the project root
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Empty project folder used as the current directory"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,52 @@
+"""Tests for the batch and streaming anomaly detectors (anomaly_detection.py)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from anomaly_detection import StreamingAnomalyDetector, detect_anomalies
+from synthetic_data import make_synthetic_demand
+
+SPIKE, DIP = 500, 620
+
+def injected(n_days=900):
+    df = make_synthetic_demand(n_days)
+    df.iloc[SPIKE, df.columns.get_loc('demand')] *= 1.4
+    df.iloc[DIP, df.columns.get_loc('demand')] *= 0.6
+    return df
+
+def model_expectation(df, start):
+    """Clean synthetic demand plus a model error of its own, from `start` on"""
+    clean = make_synthetic_demand(len(df))['demand']
+    noise = np.random.default_rng(1).normal(0, 4, len(df))
+    return (clean + noise).iloc[start:]
+
+def streamed(df, expected=None):
+    detector = StreamingAnomalyDetector()
+    values = expected.reindex(df.index) if expected is not None else [None] * len(df)
+    return np.array([detector.update(value, exp)[0]
+                     for value, exp in zip(df['demand'].values, values)])
+
+def test_batch_flags_spike_and_dip():
+    result = detect_anomalies(injected())
+    assert result['is_anomaly'].iloc[SPIKE] and result['direction'].iloc[SPIKE] == 'high'
+    assert result['is_anomaly'].iloc[DIP] and result['direction'].iloc[DIP] == 'low'
+    # Clean synthetic days are rarely flagged
+    assert result['is_anomaly'].mean() < 0.03
+
+def test_batch_flags_against_model_expectations():
+    df = injected()
+    # A partial expectation: the model covers the second half only
+    expected = model_expectation(df, len(df) // 2)
+    result = detect_anomalies(df, expected)
+    assert result['direction'].iloc[SPIKE] == 'high' and result['score'].iloc[SPIKE] > 3.5
+    assert result['direction'].iloc[DIP] == 'low' and result['score'].iloc[DIP] < -3.5
+
+@pytest.mark.parametrize('with_expected', [False, True])
+def test_streaming_matches_batch(with_expected):
+    df = injected()
+    expected = model_expectation(df, 400) if with_expected else None
+    batch = detect_anomalies(df, expected)['score'].values
+    scores = streamed(df, expected)
+    np.testing.assert_allclose(scores, batch, equal_nan=True)
+    assert scores[SPIKE] > 3.5 and scores[DIP] < -3.5
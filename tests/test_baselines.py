@@ -0,0 +1,72 @@
+"""Tests for the vectorized baseline forecasts (baselines.py)"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import baselines
+import stages
+from conftest import ROOT
+from synthetic_data import make_synthetic_demand
+
+def test_mape_is_mean_percentage_error():
+    # A constant weekly pattern: seasonal naive is exact except for the
+    # last day, which is doubled in the holdout
+    index = pd.date_range('2022-01-01', periods=200, freq='D', name='Date')
+    demand = np.tile([100.0, 200, 300, 400, 500, 600, 700], 30)[:200]
+    demand[-1] *= 2
+    df = pd.DataFrame({'demand': demand}, index=index)
+
+    _, scores = baselines.forecast_panel(df, horizon=7, models={
+        'seasonal_naive': baselines.seasonal_naive})
+    actual = demand[-7:]
+    forecast = np.tile([100.0, 200, 300, 400, 500, 600, 700], 30)[193:200]
+    expected = np.mean(np.abs(forecast - actual) / actual) * 100
+    assert scores.loc['all', 'mape'] == pytest.approx(expected)
+    # MAE over the mean level would give a different number here
+    assert expected != pytest.approx(np.mean(np.abs(forecast - actual)) / actual.mean() * 100)
+
+def test_screen_uses_mape():
+    scores = pd.DataFrame({'mape': [1.0, 6.0, np.nan]}, index=['a', 'b', 'c'])
+    assert baselines.screen(scores) == ['b', 'c']
+    assert baselines.screen(scores, max_mape=10) == ['c']
+
+def test_regional_input_needs_group(workdir):
+    df = make_synthetic_demand(400, n_regions=3)
+    ml = stages.load_script(os.path.join(ROOT, "03_ml_forecasting.py"))
+    with pytest.raises(ValueError, match="group"):
+        ml.run_baseline_stage(df, data_dir=str(workdir))
+
+    scores = ml.run_baseline_stage(df, data_dir=str(workdir), group='region')
+    assert len(scores) == 3
+
+def test_repeated_day_is_not_regional(workdir):
+    # The prepared data lists a day twice when two holidays fall on it
+    df = make_synthetic_demand(400)
+    df = pd.concat([df, df.iloc[[100]]]).sort_index(kind='stable')
+    ml = stages.load_script(os.path.join(ROOT, "03_ml_forecasting.py"))
+    scores = ml.run_baseline_stage(df, data_dir=str(workdir), store_path=str(workdir / "store.db"))
+    assert list(scores.index) == ['all']
+
+def test_short_and_ragged_panels():
+    # Under the weekly profile's 8 weeks of history
+    short = make_synthetic_demand(40)
+    forecasts, _ = baselines.forecast_panel(short, horizon=7)
+    assert np.isfinite(forecasts[['yhat', 'yhat_lower', 'yhat_upper']].values).all()
+
+    # B stops 10 days before the others, C starts 25 days before the end
+    df = make_synthetic_demand(200, n_regions=3)
+    dates = df.index.unique().sort_values()
+    df = df[~((df['region'] == df['region'].unique()[1]) & (df.index > dates[-11]))
+            & ~((df['region'] == df['region'].unique()[2]) & (df.index < dates[-25]))]
+    forecasts, scores = baselines.forecast_panel(df, group='region', horizon=7)
+    assert np.isfinite(forecasts[['yhat', 'yhat_lower', 'yhat_upper']].values).all()
+    # Seasonal naive has no last week for B, so B falls back to another model
+    ended = scores.index[1]
+    assert scores.loc[ended, 'best'] != 'seasonal_naive'
+    assert (forecasts.loc[forecasts['region'] == ended, 'model'] == scores.loc[ended, 'best']).all()
+
+    with pytest.raises(ValueError, match="history"):
+        baselines.forecast_panel(make_synthetic_demand(30), horizon=30)
@@ -0,0 +1,69 @@
+"""Tests for the packed holiday calendar (calendar_index.py)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import calendar_index
+from calendar_index import PROXIMITY_CAP
+
+HOLIDAYS = ['Republic Day', 'Diwali']
+
+@pytest.fixture
+def data_csv(tmp_path):
+    """data.csv layout: weather and demand, weekday dummies, one column per holiday"""
+    dates = pd.date_range('2022-01-01', '2023-12-31', freq='D', name='Date')
+    raw = pd.DataFrame({'temp': 30.0, 'rain': 0.0, 'inflation': 0.05,
+                        'Energy Required (MU)': 150.0}, index=dates)
+    for day in calendar_index.WEEKDAY_COLUMNS:
+        raw[day] = (dates.day_name() == day).astype(int)
+    raw['Republic Day'] = ((dates.month == 1) & (dates.day == 26)).astype(int)
+    raw['Diwali'] = dates.isin(pd.to_datetime(['2022-10-24', '2023-11-12'])).astype(int)
+    # A date listed twice, once per holiday falling on it
+    repeated = raw.loc[['2023-01-26']].assign(Diwali=1, **{'Republic Day': 0})
+    raw = pd.concat([raw, repeated]).sort_index(kind='stable')
+    path = tmp_path / "data.csv"
+    raw.to_csv(path)
+    return str(path)
+
+def one_hot(calendar, names):
+    """The calendar's bitmask unpacked into one column per holiday"""
+    return pd.DataFrame({name: (calendar['holidays'].values >> i & 1).astype(bool)
+                         for i, name in enumerate(names)}, index=calendar.index)
+
+def test_build_calendar_packs_holidays_only(data_csv):
+    calendar, names = calendar_index.build_calendar(data_csv)
+    assert names == HOLIDAYS
+    assert list(calendar.columns) == ['holidays']
+    assert calendar.index.is_unique
+    # The repeated date keeps both of its holidays
+    assert calendar_index.holiday_names(calendar.loc['2023-01-26', 'holidays'], names) == HOLIDAYS
+    assert calendar_index.fixed_date_holidays(calendar, names) == {'Republic Day': (1, 26)}
+
+def test_proximity_matches_one_hot_reference(data_csv):
+    calendar, names = calendar_index.build_calendar(data_csv)
+    calendar = calendar_index.extend_calendar(calendar, names, '2024-12-31', future_holidays=None)
+    assert calendar.loc['2024-01-26', 'holidays'] == calendar_index.holiday_mask(names, ['Republic Day'])
+
+    expected = calendar_index._wide_proximity(one_hot(calendar, names))
+    features = calendar_index.proximity_features(calendar, calendar.index)
+    np.testing.assert_array_equal(features.values.astype(int), expected.values.astype(int))
+
+    # Past the last projected holiday nothing follows: days_to is capped
+    last = features.loc['2024-12-31']
+    assert last['is_holiday'] == 0
+    assert last['days_to_holiday'] == PROXIMITY_CAP
+    assert last['days_since_holiday'] == PROXIMITY_CAP
+    assert features.loc['2024-01-10', 'days_to_holiday'] == 16
+
+def test_proximity_outside_calendar_and_masked(data_csv):
+    calendar, names = calendar_index.build_calendar(data_csv)
+    # Dates past the calendar end count as non-holidays
+    ahead = calendar_index.proximity_features(calendar, pd.date_range('2024-01-20', periods=10))
+    assert ahead['is_holiday'].sum() == 0
+    assert (ahead['days_to_holiday'] == PROXIMITY_CAP).all()
+
+    diwali = calendar_index.holiday_mask(names, ['Diwali'])
+    masked = calendar_index.proximity_features(calendar, pd.DatetimeIndex(['2022-01-26']), diwali)
+    assert masked['is_holiday'].iloc[0] == 0
+    assert masked['days_since_holiday'].iloc[0] == PROXIMITY_CAP
@@ -0,0 +1,80 @@
+"""Tests for the density-aggregated chart helpers (density_plot.py)"""
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+import density_plot
+
+def naive_envelope(x, y, n_columns):
+    """Min, max and mean of y per equal-width column of x, via a pandas groupby"""
+    frame = pd.DataFrame({'x': x, 'y': y}).dropna()
+    low, high = frame['x'].min(), frame['x'].max()
+    column = np.floor((frame['x'] - low) / (high - low) * n_columns).clip(0, n_columns - 1)
+    return frame.groupby(column.astype(int))['y'].agg(['min', 'max', 'mean'])
+
+@pytest.mark.parametrize('n_columns', [1, 37, 500])
+def test_envelope_matches_groupby(n_columns):
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 1000, 20000)
+    y = np.sin(x / 50) * 20 + rng.normal(0, 3, len(x))
+    x[::97], y[::89] = np.nan, np.nan
+
+    centres, low, high, mean = density_plot.envelope(x, y, n_columns)
+    expected = naive_envelope(x, y, n_columns)
+    np.testing.assert_array_equal(low, expected['min'])
+    np.testing.assert_array_equal(high, expected['max'])
+    np.testing.assert_allclose(mean, expected['mean'])
+    width = (np.nanmax(x) - np.nanmin(x)) / n_columns
+    np.testing.assert_allclose(centres, np.nanmin(x) + (expected.index + 0.5) * width)
+
+def test_envelope_of_dates():
+    dates = pd.date_range('2020-01-01', periods=24 * 400, freq='h').values
+    y = np.arange(len(dates), dtype=float) % 24
+    centres, low, high, _ = density_plot.envelope(dates, y, 100)
+    assert centres.dtype == np.dtype('datetime64[ns]')
+    assert dates[0] <= centres[0] < centres[-1] <= dates[-1]
+    expected = naive_envelope(dates.astype(np.int64).astype(float), y, 100)
+    np.testing.assert_array_equal(low, expected['min'])
+    np.testing.assert_array_equal(high, expected['max'])
+
+@pytest.mark.parametrize('step', [None, 0.5, 0.1])
+@pytest.mark.parametrize('bins', [(160, 100), (7, 13)])
+def test_histogram_matches_numpy(step, bins):
+    rng = np.random.default_rng(1)
+    x = rng.normal(30, 5, 100000)
+    y = 140 + 3 * (x - 30) + rng.normal(0, 5, len(x))
+    if step:
+        # Rounded readings put many points exactly on cell edges
+        x, y = np.round(x / step) * step, np.round(y / step) * step
+    x[::101] = np.nan
+
+    counts, x_edges, y_edges = density_plot.histogram2d(x, y, bins)
+    keep = ~np.isnan(x)
+    expected, _, _ = np.histogram2d(x[keep], y[keep], bins=[x_edges, y_edges])
+    assert counts.shape == bins
+    np.testing.assert_array_equal(counts, expected)
+
+def test_histogram_values_on_every_edge():
+    values = 3 + np.arange(101) * 0.1
+    counts, x_edges, y_edges = density_plot.histogram2d(values, values, (100, 100))
+    expected, _, _ = np.histogram2d(values, values, bins=[x_edges, y_edges])
+    np.testing.assert_array_equal(counts, expected)
+
+def test_plot_line_switches_to_envelope():
+    fig, ax = plt.subplots(figsize=(4, 2), dpi=50)
+    try:
+        columns = density_plot.pixel_columns(ax)
+        few = np.arange(columns, dtype=float)
+        line, = density_plot.plot_line(ax, few, few)
+        assert len(line.get_xdata()) == columns
+
+        many = np.arange(columns * 10, dtype=float)
+        line, = density_plot.plot_line(ax, many, np.sin(many))
+        assert len(line.get_xdata()) == columns
+        assert len(ax.collections) == 1
+    finally:
+        plt.close(fig)
@@ -0,0 +1,19 @@
+"""Tests for the XGBoost feature frame (features.py)"""
+
+import numpy as np
+import pandas as pd
+
+from features import create_lag_features
+
+def test_nan_outside_features_keeps_row():
+    index = pd.date_range('2022-01-01', periods=120, freq='D', name='Date')
+    df = pd.DataFrame({'demand': np.linspace(100, 200, 120), 'temp': 30.0,
+                       'inflation': 0.05, 'Holiday': 'Work'}, index=index)
+    df.loc[index[100], 'inflation'] = np.nan
+    df.loc[index[101], 'Holiday'] = np.nan
+    df.loc[index[102], 'demand'] = np.nan
+
+    df_ml, features = create_lag_features(df)
+    assert index[100] in df_ml.index and index[101] in df_ml.index
+    assert index[102] not in df_ml.index
+    assert not df_ml[features].isna().any().any()
@@ -0,0 +1,153 @@
+"""Tests for the forecast accuracy store (forecast_store.py)"""
+
+import sqlite3
+import time
+
+import pandas as pd
+import pytest
+
+import forecast_store
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "store.db")
+
+def _demand(start, values):
+    return pd.Series(values, index=pd.date_range(start, periods=len(values), freq='D'), dtype=float)
+
+def _forecast(start, values):
+    return pd.DataFrame({'ds': pd.date_range(start, periods=len(values), freq='D'), 'yhat': values})
+
+def _accuracy(db_path):
+    return forecast_store.accuracy_by_horizon(db_path).set_index(['model', 'bucket'])
+
+def test_scores_arrive_with_actuals(db):
+    forecast_store.add_actuals(_demand('2024-01-01', [100]), db)
+    forecast_store.record_forecast('m', '2024-01-01', _forecast('2024-01-02', [110, 90]), db)
+    assert len(forecast_store.accuracy_by_horizon(db)) == 0
+
+    forecast_store.add_actuals(_demand('2024-01-01', [100, 100, 100]), db)
+    row = _accuracy(db).loc[('m', '1-7d')]
+    assert row['n'] == 2
+    assert row['mae'] == pytest.approx(10.0)
+    assert row['mape'] == pytest.approx(10.0)
+
+def test_backfilled_run_scored_on_insert(db):
+    forecast_store.add_actuals(_demand('2024-01-01', [100] * 40), db)
+    forecast_store.record_forecast('m', '2024-01-01', _forecast('2024-01-02', [120] * 20), db)
+    table = _accuracy(db)
+    assert table.loc[('m', '1-7d'), 'n'] == 7
+    assert table.loc[('m', '8-30d'), 'n'] == 13
+    assert table.loc[('m', '8-30d'), 'mae'] == pytest.approx(20.0)
+
+def test_rerun_replaces_earlier_run(db):
+    forecast_store.add_actuals(_demand('2024-01-01', [100] * 10), db)
+    forecast_store.record_forecast('m', '2024-01-01', _forecast('2024-01-02', [150] * 5), db)
+    forecast_store.record_forecast('m', '2024-01-01', _forecast('2024-01-02', [110] * 5), db)
+
+    row = _accuracy(db).loc[('m', '1-7d')]
+    assert row['n'] == 5
+    assert row['mae'] == pytest.approx(10.0)
+    conn = sqlite3.connect(db)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0] == 5
+    finally:
+        conn.close()
+
+    # Other models and issue dates are separate runs
+    forecast_store.record_forecast('other', '2024-01-01', _forecast('2024-01-02', [100] * 5), db)
+    forecast_store.record_forecast('m', '2024-01-03', _forecast('2024-01-04', [100] * 5), db)
+    assert _accuracy(db).loc[('m', '1-7d'), 'n'] == 10
+
+def test_legacy_duplicate_runs_removed(db):
+    forecast_store.add_actuals(_demand('2024-01-01', [100] * 10), db)
+    forecast_store.record_forecast('m', '2024-01-01', _forecast('2024-01-02', [110] * 5), db)
+
+    # A store written before runs were unique: same run recorded twice
+    conn = sqlite3.connect(db)
+    with conn:
+        conn.execute("DROP INDEX idx_runs_issue")
+        run_id = conn.execute("INSERT INTO runs (model, issue_date, created_at) VALUES (?, ?, ?)",
+                              ('m', '2024-01-01', time.time())).lastrowid
+        conn.execute("INSERT INTO forecasts (run_id, model, target_date, horizon, bucket, yhat) "
+                     "SELECT ?, model, target_date, horizon, bucket, 130 FROM forecasts", (run_id,))
+    conn.close()
+    forecast_store.add_actuals(_demand('2024-01-01', [100] * 11), db)
+    assert _accuracy(db).loc[('m', '1-7d'), 'n'] == 5
+
+def test_import_runs(db, tmp_path):
+    staged = str(tmp_path / "staged.db")
+    forecast_store.add_actuals(_demand('2024-01-01', [100] * 5), db)
+    forecast_store.add_actuals(_demand('2024-01-01', [100] * 10), staged)
+    forecast_store.record_forecast('m', '2024-01-03', _forecast('2024-01-04', [105] * 5), staged)
+
+    assert forecast_store.import_runs(staged, db) == 1
+    row = _accuracy(db).loc[('m', '1-7d')]
+    assert row['n'] == 5
+    assert row['mae'] == pytest.approx(5.0)
+
+def test_rolling_accuracy_window(db):
+    forecast_store.add_actuals(_demand('2024-01-01', [100] * 200), db)
+    forecast_store.record_forecast('m', '2024-01-01', _forecast('2024-01-02', [110] * 199), db)
+    recent = forecast_store.rolling_accuracy(days=30, db_path=db).set_index('model')
+    assert recent.loc['m', 'n'] == 30
+    assert recent.loc['m', 'mae'] == pytest.approx(10.0)
+
+def test_revised_actuals_rescored(db):
+    forecast_store.add_actuals(_demand('2024-01-01', [100] * 10), db)
+    forecast_store.record_forecast('m', '2024-01-01', _forecast('2024-01-02', [110] * 5), db)
+    assert _accuracy(db).loc[('m', '1-7d'), 'mae'] == pytest.approx(10.0)
+
+    # Two past days revised to 120, plus one new day; unchanged days stay scored once
+    revised = _demand('2024-01-01', [100] * 11)
+    revised.iloc[[1, 2]] = 120
+    forecast_store.add_actuals(revised, db)
+    row = _accuracy(db).loc[('m', '1-7d')]
+    assert row['n'] == 5
+    assert row['mae'] == pytest.approx((10 * 3 + 10 * 2) / 5)
+    assert row['mape'] == pytest.approx((10 * 3 + 100 * 10 / 120 * 2) / 5)
+
+    # Re-sending the same history changes nothing
+    assert forecast_store.add_actuals(revised, db) == 0
+    assert _accuracy(db).loc[('m', '1-7d'), 'n'] == 5
+
+def test_queries_are_read_only(db, tmp_path):
+    missing = str(tmp_path / "missing.db")
+    assert forecast_store.accuracy_by_horizon(missing).empty
+    assert forecast_store.rolling_accuracy(db_path=missing).empty
+    assert not (tmp_path / "missing.db").exists()
+
+    forecast_store.add_actuals(_demand('2024-01-01', [100] * 10), db)
+    forecast_store.record_forecast('m', '2024-01-01', _forecast('2024-01-02', [110] * 5), db)
+    # A legacy store is read as it is; only writers migrate it
+    conn = sqlite3.connect(db)
+    with conn:
+        conn.execute("DROP INDEX idx_runs_issue")
+    conn.close()
+    assert len(forecast_store.rolling_accuracy(db_path=db)) == 1
+    assert len(forecast_store.accuracy_by_horizon(db)) == 1
+    conn = sqlite3.connect(db)
+    try:
+        assert not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_runs_issue'").fetchone()
+    finally:
+        conn.close()
+
+    conn = forecast_store.connect_readonly(db)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM scores")
+    finally:
+        conn.close()
+
+def test_load_forecast_migrates_legacy_header(tmp_path):
+    legacy = tmp_path / "legacy.csv"
+    legacy.write_text("date,forecast\n2024-01-01,100.5\n2024-01-02,101.0\n")
+    forecast = forecast_store.load_forecast(str(legacy))
+    assert list(forecast.columns) == ['ds', 'yhat']
+    assert forecast['ds'].iloc[1] == pd.Timestamp('2024-01-02')
+
+    other = tmp_path / "other.csv"
+    other.write_text("a,b\n1,2\n")
+    with pytest.raises(ValueError):
+        forecast_store.load_forecast(str(other))
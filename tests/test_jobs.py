@@ -0,0 +1,147 @@
+"""Tests for the background job runner (jobs.py) and staged publishing (stages.py)"""
+
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import forecast_store
+import jobs
+import stages
+
+def _write(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+
+def _forecast_stage(model):
+    """Stage writing a forecast CSV and recording one run in its staged store"""
+    def stage(work_dir, data_path=stages.PREPARED_DATA):
+        demand = pd.Series([100.0, 110.0], index=pd.to_datetime(['2024-01-01', '2024-01-02']))
+        forecast = pd.DataFrame({'ds': pd.to_datetime(['2024-01-03', '2024-01-04']),
+                                 'yhat': [105.0, 108.0]})
+        forecast.set_index('ds').to_csv(os.path.join(work_dir, f"{model}_forecast.csv"))
+        store = stages._store_path(work_dir)
+        forecast_store.add_actuals(demand, store)
+        forecast_store.record_forecast(model, demand.index[-1], forecast, store)
+        return stages._forecast_outputs(work_dir)
+    return stage
+
+def test_enqueue_and_claim_in_order(workdir):
+    db = str(workdir / "jobs.db")
+    first = jobs.enqueue('render_charts', db_path=db)
+    second = jobs.enqueue('refresh_data', db_path=db)
+
+    conn = jobs.connect(db)
+    try:
+        assert jobs.claim_next(conn, 'w0')['id'] == first
+        assert jobs.claim_next(conn, 'w1')['id'] == second
+        assert jobs.claim_next(conn, 'w0') is None
+    finally:
+        conn.close()
+    assert jobs.get_job(first, db)['status'] == 'running'
+
+def test_unknown_kind_rejected(workdir):
+    try:
+        jobs.enqueue('nope', db_path=str(workdir / "jobs.db"))
+    except ValueError as e:
+        assert 'nope' in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+def test_requeue_stale(workdir):
+    db = str(workdir / "jobs.db")
+    job_id = jobs.enqueue('render_charts', db_path=db)
+    conn = jobs.connect(db)
+    jobs.claim_next(conn, 'w0')
+    conn.close()
+
+    jobs.requeue_stale(db)
+    assert jobs.get_job(job_id, db)['status'] == 'queued'
+
+def test_run_job_publishes_every_stage(workdir, monkeypatch):
+    monkeypatch.setitem(jobs.JOB_KINDS, 'test', ['prophet', 'xgboost'])
+    monkeypatch.setitem(jobs.STAGE_FUNCTIONS, 'prophet', _forecast_stage('prophet'))
+    monkeypatch.setitem(jobs.STAGE_FUNCTIONS, 'xgboost', _forecast_stage('xgboost'))
+    db = str(workdir / "jobs.db")
+    job_id = jobs.enqueue('test', db_path=db)
+
+    conn = jobs.connect(db)
+    try:
+        jobs.run_job(conn, jobs.claim_next(conn, 'w0'))
+    finally:
+        conn.close()
+
+    job = jobs.get_job(job_id, db)
+    assert job['status'] == 'done', job['error']
+    assert set(job['timings']) == {'prophet', 'xgboost'}
+    assert os.path.exists("data/prophet_forecast.csv")
+    assert os.path.exists("data/xgboost_forecast.csv")
+    assert not os.path.exists(jobs.STAGING_DIR + "/job_1")
+
+    # Both stages' runs reach the live store
+    conn = sqlite3.connect(stages.FORECAST_STORE)
+    try:
+        assert sorted(m for m, in conn.execute("SELECT model FROM runs")) == ['prophet', 'xgboost']
+    finally:
+        conn.close()
+
+def test_failed_job_publishes_nothing(workdir, monkeypatch):
+    def broken(work_dir, data_path=stages.PREPARED_DATA):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(jobs.JOB_KINDS, 'test', ['prophet', 'broken'])
+    monkeypatch.setitem(jobs.STAGE_FUNCTIONS, 'prophet', _forecast_stage('prophet'))
+    monkeypatch.setitem(jobs.STAGE_FUNCTIONS, 'broken', broken)
+    db = str(workdir / "jobs.db")
+    job_id = jobs.enqueue('test', db_path=db)
+
+    conn = jobs.connect(db)
+    try:
+        jobs.run_job(conn, jobs.claim_next(conn, 'w0'))
+    finally:
+        conn.close()
+
+    job = jobs.get_job(job_id, db)
+    assert job['status'] == 'failed'
+    assert 'boom' in job['error']
+    assert not os.path.exists("data/prophet_forecast.csv")
+    assert not os.path.exists(stages.FORECAST_STORE)
+
+def test_forecast_outputs_routing(workdir):
+    for name in ("chart.png", "xgboost_model.json", "xgboost_forecast.csv",
+                 "forecast_store.db", "forecast_store.db-wal"):
+        _write(name, "")
+    outputs = stages._forecast_outputs(str(workdir))
+    assert set(outputs) == {f"{stages.VISUALIZATION_DIR}/chart.png", "models/xgboost_model.json",
+                            "data/xgboost_forecast.csv", "data/forecast_store.db"}
+
+def test_params_whitelisted(workdir):
+    db = str(workdir / "jobs.db")
+    assert jobs.enqueue('retrain_models', {'train_xgboost': {'mode': 'full'},
+                                           'train_prophet': {'periods': 365}}, db_path=db)
+    bad = [
+        ['train_xgboost'],
+        {'train_xgboost': {'data_path': '/etc/passwd'}},
+        {'refresh_data': {'download': True}},
+        {'train_xgboost': {'mode': 'sideways'}},
+        {'train_prophet': {'periods': 'many'}},
+        {'train_prophet': 5},
+        {'refresh_data': {}},
+    ]
+    for params in bad:
+        with pytest.raises(ValueError):
+            jobs.enqueue('retrain_models', params, db_path=db)
+    assert len(jobs.list_jobs(db_path=db)) == 1
+
+def test_api_rejects_non_object_bodies(workdir):
+    import app_flask
+
+    client = app_flask.app.test_client()
+    assert client.post('/api/jobs', json=['retrain_models']).status_code == 400
+    assert client.post('/api/jobs', data='not json', content_type='application/json').status_code == 400
+    response = client.post('/api/jobs', json={'kind': 'retrain_models',
+                                              'params': {'train_xgboost': {'model_path': 'x'}}})
+    assert response.status_code == 400
+    response = client.post('/api/jobs', json={'kind': 'render_charts'})
+    assert response.status_code == 202
@@ -0,0 +1,140 @@
+"""Tests for month-partitioned storage (partitions.py)"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import partitions
+
+def _frame(start, days):
+    index = pd.date_range(start, periods=days, freq='D', name='Date')
+    return pd.DataFrame({'demand': np.arange(days, dtype=float) + 100}, index=index)
+
+def test_round_trip_and_range_read(tmp_path):
+    root = str(tmp_path)
+    df = _frame('2020-01-15', 60)
+    assert partitions.write_partitions(df, 'demand', root) == 3
+
+    ranged = partitions.read_range('demand', '2020-02-01', '2020-02-29', root=root)
+    expected = df.loc['2020-02-01':'2020-02-29']
+    pd.testing.assert_frame_equal(ranged, expected, check_freq=False)
+
+    first, last = partitions.edge_rows('demand', root)
+    assert first['demand'] == df['demand'].iloc[0]
+    assert last['demand'] == df['demand'].iloc[-1]
+
+def test_index_stats_match_data(tmp_path):
+    root = str(tmp_path)
+    df = _frame('2020-01-01', 366)
+    partitions.write_partitions(df, 'demand', root)
+    stats = partitions.partition_stats('demand', 'demand', root)
+    monthly = df['demand'].groupby(df.index.strftime('%Y-%m')).agg(['count', 'sum', 'mean'])
+    np.testing.assert_allclose(stats[['count', 'sum', 'mean']].values, monthly.values)
+
+def test_unchanged_partitions_not_rewritten(tmp_path):
+    root = str(tmp_path)
+    df = _frame('2020-01-01', 90)
+    partitions.write_partitions(df, 'demand', root)
+    assert partitions.write_partitions(df, 'demand', root) == 0
+
+    # Appending one day only touches its month
+    extra = _frame('2020-03-31', 1) + 1000
+    assert partitions.write_partitions(extra, 'demand', root, mode='append') == 1
+    assert partitions.read_range('demand', '2020-03-31', '2020-03-31', root=root)['demand'].iloc[0] == 1100
+
+def test_stale_partitions_removed_after_index(tmp_path):
+    root = str(tmp_path)
+    partitions.write_partitions(_frame('2020-01-01', 90), 'demand', root)
+    partitions.write_partitions(_frame('2020-01-01', 31), 'demand', root)
+
+    index = partitions.load_index('demand', root)
+    assert list(index['partitions']) == ['2020-01']
+    assert not os.path.exists(os.path.join(root, 'demand', '2020', '03.csv'))
+    assert not [name for _, _, files in os.walk(root) for name in files if name.endswith('.tmp')]
+
+def test_readers_never_sync(workdir):
+    os.makedirs("data")
+    _frame('2020-01-01', 40).to_csv(partitions.SOURCES['prepared_data'])
+
+    # No partitions yet: readers report unavailable instead of building them
+    assert partitions.read_range('prepared_data') is None
+    assert partitions.edge_rows('prepared_data') == (None, None)
+    assert not os.path.exists(partitions.PARTITION_ROOT)
+
+    partitions.sync('prepared_data')
+    assert len(partitions.read_range('prepared_data')) == 40
+
+    # A rewritten CSV makes the index stale until the next sync
+    _frame('2020-01-01', 50).to_csv(partitions.SOURCES['prepared_data'])
+    os.utime(partitions.SOURCES['prepared_data'], ns=(1, 1))
+    assert partitions.partition_stats('prepared_data', 'demand') is None
+    partitions.sync('prepared_data')
+    assert partitions.partition_stats('prepared_data', 'demand')['count'].sum() == 50
+
+def test_concurrent_syncs(workdir):
+    os.makedirs("data")
+    _frame('2019-01-01', 800).to_csv(partitions.SOURCES['prepared_data'])
+
+    errors = []
+    def run():
+        try:
+            partitions.sync('prepared_data')
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(partitions.read_range('prepared_data')) == 800
+
+def test_sync_reads_only_appended_rows(workdir, monkeypatch):
+    os.makedirs("data")
+    source = partitions.SOURCES['prepared_data']
+    _frame('2020-01-01', 90).to_csv(source)
+    partitions.sync('prepared_data')
+    january = os.path.join(partitions.PARTITION_ROOT, 'prepared_data', '2020', '01.csv')
+    before = os.stat(january).st_mtime_ns
+
+    # Append ten days: the source's new lines and the stored March are parsed,
+    # and only March/April are rewritten
+    _frame('2020-01-01', 100).to_csv(source)
+    parsed = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(pd, 'read_csv', lambda *a, **k: parsed.append(read_csv(*a, **k)) or parsed[-1])
+    partitions.sync('prepared_data')
+    monkeypatch.setattr(pd, 'read_csv', read_csv)
+    assert [len(frame) for frame in parsed] == [10, 30]
+    assert os.stat(january).st_mtime_ns == before
+    pd.testing.assert_frame_equal(partitions.read_range('prepared_data'), _frame('2020-01-01', 100),
+                                  check_freq=False)
+
+    # A touched file with no new rows only refreshes the stamp
+    os.utime(source, ns=(1, 1))
+    partitions.sync('prepared_data')
+    assert len(partitions.read_range('prepared_data')) == 100
+
+def test_sync_rereads_rewritten_history(workdir):
+    os.makedirs("data")
+    source = partitions.SOURCES['prepared_data']
+    _frame('2020-01-01', 60).to_csv(source)
+    partitions.sync('prepared_data')
+
+    edited = _frame('2020-01-01', 70)
+    edited.iloc[5, 0] = -1.0
+    edited.to_csv(source)
+    partitions.sync('prepared_data')
+    pd.testing.assert_frame_equal(partitions.read_range('prepared_data'), edited, check_freq=False)
+
+def test_describe_from_index(tmp_path):
+    root = str(tmp_path)
+    df = _frame('2020-01-01', 400)
+    df['temp'] = np.random.default_rng(0).normal(30, 4, len(df))
+    partitions.write_partitions(df, 'demand', root)
+    expected = df.describe().loc[['count', 'mean', 'std', 'min', 'max']]
+    pd.testing.assert_frame_equal(partitions.describe('demand', root), expected)
+    pd.testing.assert_frame_equal(partitions.head('demand', 40, root), df.head(40), check_freq=False)
@@ -0,0 +1,126 @@
+"""Tests for the pipeline's dependency order and skip logic (pipeline.py)"""
+
+import os
+from functools import partial
+
+import pytest
+
+import pipeline
+from pipeline import Stage
+
+def _copy(source, dest, work_dir):
+    """Stage: append a marker to source and write it as dest"""
+    with open(source) as f:
+        text = f.read()
+    staged = os.path.join(work_dir, os.path.basename(dest))
+    with open(staged, 'w') as f:
+        f.write(text + "+")
+    return {dest: staged}
+
+def _grow(path, work_dir):
+    """Stage that rewrites its own input, like XGBoost update mode"""
+    text = open(path).read() if os.path.exists(path) else ""
+    staged = os.path.join(work_dir, os.path.basename(path))
+    with open(staged, 'w') as f:
+        f.write(text + "tree\n")
+    return {path: staged}
+
+def _fail(work_dir):
+    raise RuntimeError("boom")
+
+@pytest.fixture
+def project(workdir):
+    os.makedirs("data")
+    with open("data/raw.txt", 'w') as f:
+        f.write("raw")
+    return workdir
+
+def _run(stage_list, **kwargs):
+    report = pipeline.run_pipeline(stage_list=stage_list, max_workers=2, **kwargs)
+    return {name: entry['status'] for name, entry in report['stages'].items()}
+
+def _chain():
+    return [
+        Stage('prepare', partial(_copy, "data/raw.txt", "data/prepared.txt"),
+              inputs=["data/raw.txt"], outputs=["data/prepared.txt"]),
+        Stage('model', partial(_copy, "data/prepared.txt", "data/forecast.txt"),
+              inputs=["data/prepared.txt"], outputs=["data/forecast.txt"]),
+    ]
+
+def test_unchanged_inputs_skip(project):
+    assert _run(_chain()) == {'prepare': 'ran', 'model': 'ran'}
+    assert open("data/forecast.txt").read() == "raw++"
+    assert _run(_chain()) == {'prepare': 'skipped', 'model': 'skipped'}
+    assert _run(_chain(), force=True) == {'prepare': 'ran', 'model': 'ran'}
+
+def test_changed_input_reruns_downstream(project):
+    _run(_chain())
+    with open("data/raw.txt", 'w') as f:
+        f.write("new")
+    assert _run(_chain()) == {'prepare': 'ran', 'model': 'ran'}
+    assert open("data/forecast.txt").read() == "new++"
+
+def test_missing_output_reruns(project):
+    _run(_chain())
+    os.remove("data/forecast.txt")
+    assert _run(_chain()) == {'prepare': 'skipped', 'model': 'ran'}
+
+def test_stage_rewriting_its_own_input_is_current(project):
+    stage_list = _chain() + [
+        Stage('boost', partial(_grow, "data/model.txt"),
+              inputs=["data/prepared.txt", "data/model.txt"], outputs=["data/model.txt"]),
+    ]
+    assert _run(stage_list)['boost'] == 'ran'
+    assert _run(stage_list)['boost'] == 'skipped'
+
+    # Replacing the saved model by hand makes the stage stale again
+    with open("data/model.txt", 'w') as f:
+        f.write("other\n")
+    assert _run(stage_list)['boost'] == 'ran'
+
+def test_failure_blocks_downstream(project):
+    stage_list = [
+        Stage('prepare', _fail, inputs=["data/raw.txt"], outputs=["data/prepared.txt"]),
+        Stage('model', partial(_copy, "data/prepared.txt", "data/forecast.txt"),
+              inputs=["data/prepared.txt"], outputs=["data/forecast.txt"]),
+    ]
+    assert _run(stage_list) == {'prepare': 'failed', 'model': 'blocked'}
+    assert not os.path.exists("data/forecast.txt")
+
+def test_select_stages_pulls_in_upstream():
+    names = [stage.name for stage in pipeline.select_stages(['ensemble'])]
+    # The ensemble reads weights from the accuracy store every forecast stage writes to
+    assert names == ['prepare', 'baselines', 'prophet', 'xgboost', 'ensemble']
+    with pytest.raises(ValueError):
+        pipeline.select_stages(['nope'])
+
+def test_xgboost_stage_declares_its_model():
+    stage = next(s for s in pipeline.STAGES if s.name == 'xgboost')
+    for path in (pipeline.XGBOOST_MODEL, pipeline.XGBOOST_META):
+        assert path in stage.inputs and path in stage.outputs
+    # Its own model is not a dependency on another stage
+    assert stage not in pipeline.upstream(stage, pipeline.STAGES)
+
+def test_model_stages_declare_every_module_they_load():
+    import ast
+    from conftest import ROOT
+
+    with open(os.path.join(ROOT, "03_ml_forecasting.py")) as f:
+        tree = ast.parse(f.read())
+    local = {os.path.splitext(name)[0] for name in os.listdir(ROOT) if name.endswith('.py')}
+    imported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module in local:
+            imported.add(node.module + ".py")
+        elif isinstance(node, ast.Import):
+            imported.update(alias.name + ".py" for alias in node.names if alias.name in local)
+    # weather_features imports baselines.to_panel
+    imported.add("baselines.py")
+
+    for stage in pipeline.STAGES:
+        if stage.name in ('baselines', 'prophet', 'xgboost', 'ensemble'):
+            assert imported <= set(stage.inputs), stage.name
+    ensemble = next(s for s in pipeline.STAGES if s.name == 'ensemble')
+    assert pipeline.stages.FORECAST_STORE in ensemble.inputs
+    prepare = next(s for s in pipeline.STAGES if s.name == 'prepare')
+    assert pipeline.WEATHER_CACHE in prepare.outputs
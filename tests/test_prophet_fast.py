@@ -0,0 +1,75 @@
+"""Tests for scoring Prophet from extracted coefficients (prophet_fast.py)"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import prophet_fast
+import stages
+from calendar_index import load_calendar
+from conftest import ROOT
+from synthetic_data import make_synthetic_demand
+
+Prophet = pytest.importorskip('prophet').Prophet
+
+HORIZON = 60
+
+def mean_width(forecast, rows):
+    return (forecast['yhat_upper'] - forecast['yhat_lower'])[rows].mean()
+
+@pytest.fixture(scope='module')
+def fitted():
+    """A multiplicative model with the temperature regressor, as in the forecasting stage"""
+    df = make_synthetic_demand(3 * 365)
+    history = df.reset_index()[['Date', 'demand', 'temp']]
+    history.columns = ['ds', 'y', 'temp']
+    model = Prophet(yearly_seasonality=True, weekly_seasonality=True, daily_seasonality=False,
+                    seasonality_mode='multiplicative', changepoint_prior_scale=0.05)
+    model.add_regressor('temp')
+    model.fit(history)
+
+    future = model.make_future_dataframe(periods=HORIZON).merge(history[['ds', 'temp']],
+                                                                 on='ds', how='left')
+    future['temp'] = future['temp'].fillna(30.0)
+    return df, model, future, model.predict(future)
+
+@pytest.mark.parametrize('interval', ['approx', 'cached'])
+def test_fast_predict_matches_predict(fitted, interval):
+    df, model, future, reference = fitted
+    params = prophet_fast.extract_params(model, calibration=reference)
+    fast = prophet_fast.fast_predict(params, future['ds'], {'temp': future['temp']},
+                                     interval=interval)
+
+    np.testing.assert_allclose(fast['yhat'], reference['yhat'], rtol=1e-9)
+    # model.predict samples its intervals, so widths agree only in the mean
+    ahead = (future['ds'] > df.index.max()).values
+    assert mean_width(fast, ahead) == pytest.approx(mean_width(reference, ahead), rel=0.15)
+    assert mean_width(fast, ~ahead) == pytest.approx(mean_width(reference, ~ahead), rel=0.15)
+
+def test_params_round_trip(fitted, tmp_path):
+    _, model, future, _ = fitted
+    path = str(tmp_path / "params.json")
+    prophet_fast.save_params(prophet_fast.extract_params(model), path)
+    params = prophet_fast.load_params(path)
+    direct = prophet_fast.fast_predict(prophet_fast.extract_params(model), future['ds'],
+                                       {'temp': future['temp']})
+    loaded = prophet_fast.fast_predict(params, future['ds'], {'temp': future['temp']})
+    pd.testing.assert_frame_equal(direct, loaded)
+
+def test_stage_fast_path_matches_predict(workdir):
+    # The stage's fast path with the calendar and weather regressors
+    ml = stages.load_script(os.path.join(ROOT, "03_ml_forecasting.py"))
+    df = make_synthetic_demand(3 * 365)
+    calendar = load_calendar(os.path.join(ROOT, "data", "data.csv"),
+                             end=df.index.max() + pd.Timedelta(days=HORIZON))
+    options = dict(periods=HORIZON, calendar=calendar, weather={'save': False},
+                   params_path=str(workdir / "params.json"))
+
+    _, fast = ml.prophet_forecast(df, fast=True, **options)
+    _, reference = ml.prophet_forecast(df, fast=False, **options)
+    np.testing.assert_allclose(fast['yhat'], reference['yhat'], rtol=1e-9)
+    ahead = (fast['ds'] > df.index.max()).values
+    assert mean_width(fast, ahead) == pytest.approx(mean_width(reference, ahead), rel=0.15)
+    assert not os.path.exists(workdir / "data" / "weather_features.npz")
@@ -0,0 +1,82 @@
+"""Tests for hierarchical forecast reconciliation (reconcile.py)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import reconcile
+from synthetic_data import make_synthetic_demand
+
+# total -> Z1 (R1, R2), Z2 (R3, R4, R5)
+LEAVES = pd.DataFrame({'zone': ['Z1', 'Z1', 'Z2', 'Z2', 'Z2'],
+                       'region': ['R1', 'R2', 'R3', 'R4', 'R5']})
+LEVELS = ['zone', 'region']
+
+@pytest.fixture
+def hierarchy():
+    return reconcile.build_hierarchy(LEAVES, LEVELS)
+
+@pytest.fixture
+def base():
+    """Incoherent base forecasts for the 8 nodes over 4 horizons"""
+    rng = np.random.default_rng(0)
+    return rng.uniform(50, 150, (8, 4))
+
+def test_summing_matrix(hierarchy):
+    nodes, n_aggregates, S = hierarchy
+    assert nodes == ['total', 'Z1', 'Z2', 'R1', 'R2', 'R3', 'R4', 'R5']
+    assert n_aggregates == 3
+    expected = np.array([[1, 1, 1, 1, 1],
+                         [1, 1, 0, 0, 0],
+                         [0, 0, 1, 1, 1],
+                         *np.eye(5)])
+    np.testing.assert_array_equal(S.toarray(), expected)
+
+@pytest.mark.parametrize('variances', [None, [4.0, 1.0, 9.0, 2.0, 0.5, 1.0, 3.0, 6.0]])
+def test_mint_matches_dense_closed_form(hierarchy, base, variances):
+    _, n_aggregates, S = hierarchy
+    S_dense = S.toarray()
+    w = S_dense.sum(axis=1) if variances is None else np.asarray(variances)
+    W_inv = np.diag(1 / w)
+    # y~ = S (S' W^-1 S)^-1 S' W^-1 y^
+    expected = S_dense @ np.linalg.solve(S_dense.T @ W_inv @ S_dense, S_dense.T @ W_inv @ base)
+    result = reconcile.reconcile(base, S, n_aggregates, 'mint', variances)
+    np.testing.assert_allclose(result, expected, rtol=1e-10)
+
+@pytest.mark.parametrize('method', reconcile.METHODS)
+def test_methods_are_coherent(hierarchy, base, method):
+    _, n_aggregates, S = hierarchy
+    assert reconcile.incoherence(S, n_aggregates, base) > 1
+    proportions = [0.1, 0.2, 0.3, 0.25, 0.15]
+    result = reconcile.reconcile(base, S, n_aggregates, method, proportions=proportions)
+    # Every node equals the sum of the bottom series under it
+    np.testing.assert_allclose(S @ result[n_aggregates:], result)
+    assert reconcile.incoherence(S, n_aggregates, result) < 1e-9
+
+    if method == 'bottom_up':
+        np.testing.assert_array_equal(result[n_aggregates:], base[n_aggregates:])
+    elif method == 'top_down':
+        np.testing.assert_allclose(result[0], base[0])
+        np.testing.assert_allclose(result[n_aggregates:], np.outer(proportions, base[0]))
+
+def test_mint_keeps_coherent_forecasts(hierarchy, base):
+    _, n_aggregates, S = hierarchy
+    coherent = S @ base[n_aggregates:]
+    np.testing.assert_allclose(reconcile.reconcile(coherent, S, n_aggregates), coherent)
+
+def test_reconcile_arguments(hierarchy, base):
+    _, n_aggregates, S = hierarchy
+    with pytest.raises(ValueError, match="proportions"):
+        reconcile.reconcile(base, S, n_aggregates, 'top_down')
+    with pytest.raises(ValueError, match="Unknown"):
+        reconcile.reconcile(base, S, n_aggregates, 'middle_out')
+
+def test_reconcile_forecasts_end_to_end():
+    df = make_synthetic_demand(200, n_regions=4)
+    df['zone'] = df['region'].map({'R000': 'Z1', 'R001': 'Z1', 'R002': 'Z2', 'R003': 'Z2'})
+    nodes, n_aggregates, S = reconcile.build_hierarchy(df[LEVELS], LEVELS)
+
+    reconciled = reconcile.reconcile_forecasts(df, LEVELS, horizon=7)
+    assert set(reconciled['node']) == set(nodes)
+    yhat = reconciled.set_index(['node', 'ds'])['yhat'].unstack().loc[nodes].values
+    assert reconcile.incoherence(S, n_aggregates, yhat) < 1e-6
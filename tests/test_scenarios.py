@@ -0,0 +1,72 @@
+"""Tests for the temperature scenario engine (scenarios.py)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import scenarios
+from synthetic_data import make_synthetic_demand
+
+DATES = pd.date_range('2024-04-01', periods=120, freq='D')
+
+@pytest.fixture(scope='module')
+def climatology():
+    return scenarios.build_climatology(make_synthetic_demand(3 * 365))
+
+def test_ar1_noise_shape(climatology):
+    paths = scenarios.make_scenarios(climatology, DATES, n_scenarios=2000, noise_std=1.5,
+                                     persistence=0.7, seed=3)
+    assert paths.shape == (2000, len(DATES))
+    noise = paths - scenarios.climatology_for_dates(climatology, DATES)[None, :]
+
+    # Stationary AR(1): the same spread every day, lag-k correlation persistence ** k
+    assert noise.std(axis=0).mean() == pytest.approx(1.5, rel=0.05)
+    assert noise[:, 0].std() == pytest.approx(1.5, rel=0.1)
+    for lag in (1, 2, 5):
+        corr = np.mean([np.corrcoef(noise[:, i], noise[:, i + lag])[0, 1]
+                        for i in range(0, len(DATES) - lag, 10)])
+        assert corr == pytest.approx(0.7 ** lag, abs=0.05)
+
+    # Seeded: reproducible, and a different seed gives different paths
+    again = scenarios.make_scenarios(climatology, DATES, n_scenarios=2000, persistence=0.7, seed=3)
+    np.testing.assert_array_equal(paths, again)
+    other = scenarios.make_scenarios(climatology, DATES, n_scenarios=2000, persistence=0.7, seed=4)
+    assert not np.allclose(paths, other)
+
+def test_delta_applies_to_selected_months(climatology):
+    base = scenarios.make_scenarios(climatology, DATES, n_scenarios=50)
+    everywhere = scenarios.make_scenarios(climatology, DATES, n_scenarios=50, delta=3.0)
+    np.testing.assert_allclose(everywhere - base, 3.0)
+
+    may = scenarios.make_scenarios(climatology, DATES, n_scenarios=50, delta=3.0, months=[5])
+    expected = np.where(DATES.month == 5, 3.0, 0.0)
+    np.testing.assert_allclose(may - base, np.broadcast_to(expected, base.shape), atol=1e-12)
+
+def test_bands_are_ordered_quantiles(climatology):
+    values = scenarios.make_scenarios(climatology, DATES, n_scenarios=300, seed=1) * 4 + 50
+    bands = scenarios.scenario_bands(DATES, values)
+    assert list(bands.columns) == ['ds', 'p10', 'p50', 'p90']
+    assert (bands['p10'] <= bands['p50']).all() and (bands['p50'] <= bands['p90']).all()
+    np.testing.assert_allclose(bands['p50'], np.median(values, axis=0))
+    assert (bands['ds'] == DATES).all()
+
+def test_api_caps_scenarios(workdir, monkeypatch):
+    import app_flask
+
+    scored = []
+    def fake_run(df, n_scenarios, **kwargs):
+        scored.append(n_scenarios)
+        return {'prophet': pd.DataFrame({'ds': DATES[:2], 'baseline': 1.0,
+                                         'p10': 0.0, 'p50': 1.0, 'p90': 2.0})}
+
+    monkeypatch.setattr(app_flask, 'load_data', lambda: make_synthetic_demand(400))
+    monkeypatch.setattr(app_flask, 'load_params', lambda: {})
+    monkeypatch.setattr(app_flask.scenarios, 'run_scenarios', fake_run)
+    client = app_flask.app.test_client()
+
+    response = client.get('/api/scenarios?model=prophet&n=100000')
+    assert response.status_code == 200
+    assert response.get_json()['n_scenarios'] == app_flask.MAX_SCENARIOS
+    assert client.get('/api/scenarios?model=prophet&n=50').get_json()['n_scenarios'] == 50
+    assert scored == [app_flask.MAX_SCENARIOS, 50]
+    assert client.get('/api/scenarios?n=many').status_code == 400
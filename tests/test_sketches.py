@@ -0,0 +1,93 @@
+"""Tests for the demand quantile sketches (sketches.py)"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sketches
+
+def _demand(days, start='2020-01-01', seed=0):
+    index = pd.date_range(start, periods=days, freq='D', name='Date')
+    values = np.random.default_rng(seed).normal(200, 30, days)
+    return pd.DataFrame({'demand': values}, index=index)
+
+def test_quantiles_close_to_exact():
+    values = np.random.default_rng(1).lognormal(5, 0.4, 200000)
+    sketch = sketches.KLLSketch()
+    sketch.update(values)
+    estimated = sketch.quantile([0.5, 0.95, 0.99])
+    exact = np.quantile(values, [0.5, 0.95, 0.99])
+    ranks = np.searchsorted(np.sort(values), estimated) / len(values)
+    np.testing.assert_allclose(ranks, [0.5, 0.95, 0.99], atol=0.01)
+    assert estimated[0] == pytest.approx(exact[0], rel=0.02)
+    assert sketch.n == len(values)
+
+def test_buckets_cover_every_day():
+    df = _demand(3 * 365)
+    store = sketches.new_store()
+    assert sketches.update_store(store, df['demand']) == len(df)
+    for by in sketches.GROUPINGS:
+        assert sum(sketch.n for sketch in store['sketches'][by].values()) == len(df)
+    assert set(store['sketches']['month']) == set(sketches.MONTH_NAMES)
+
+def test_update_only_adds_new_days():
+    df = _demand(400)
+    store = sketches.new_store()
+    sketches.update_store(store, df['demand'].iloc[:300])
+    assert sketches.update_store(store, df['demand']) == 100
+    assert sketches.update_store(store, df['demand']) == 0
+    assert store['sketches']['all']['all'].n == 400
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "sketches.json")
+    store = sketches.new_store()
+    sketches.update_store(store, _demand(500)['demand'])
+    sketches.save_store(store, path)
+    loaded = sketches.load_store(path)
+    assert loaded['last_date'] == store['last_date']
+    np.testing.assert_allclose(loaded['sketches']['season']['Summer'].quantile([0.5, 0.9]),
+                               store['sketches']['season']['Summer'].quantile([0.5, 0.9]))
+
+def test_covering_store_never_writes(tmp_path):
+    path = str(tmp_path / "sketches.json")
+    df = _demand(500)
+    sketches.sync_store(df.iloc[:400], path)
+    before = os.stat(path).st_mtime_ns
+
+    store, added = sketches.covering_store(df, path)
+    assert added == 100
+    assert store['sketches']['all']['all'].n == 500
+    assert os.stat(path).st_mtime_ns == before
+    assert sketches.load_store(path)['sketches']['all']['all'].n == 400
+
+def test_sync_store_to_output_path(tmp_path):
+    path = str(tmp_path / "live.json")
+    staged = str(tmp_path / "staged.json")
+    df = _demand(200)
+    sketches.sync_store(df, path)
+    # Nothing new, but a stage still gets its output file
+    sketches.sync_store(df, path, output_path=staged)
+    assert sketches.load_store(staged)['last_date'] == sketches.load_store(path)['last_date']
+
+def test_rebuilt_when_history_changes(tmp_path):
+    path = str(tmp_path / "sketches.json")
+    sketches.sync_store(_demand(300), path)
+    store = sketches.sync_store(_demand(100, start='2021-01-01'), path)
+    assert store['first_date'] == '2021-01-01'
+    assert store['sketches']['all']['all'].n == 100
+
+def test_percentiles_and_load_duration():
+    store = sketches.new_store()
+    sketches.update_store(store, _demand(730)['demand'])
+    table = sketches.percentiles(store, 'season', [0.5])
+    assert [row['bucket'] for row in table['buckets']] == sketches.SEASON_ORDER
+    assert sum(row['days'] for row in table['buckets']) == 730
+    assert sum(row['peak_days'] for row in table['buckets']) == pytest.approx(0.05 * 730, abs=10)
+
+    curve = sketches.load_duration(store, 'all', 11)['curves']['all']
+    assert len(curve) == 11
+    assert curve == sorted(curve, reverse=True)
+    with pytest.raises(ValueError):
+        sketches.percentiles(store, 'week')
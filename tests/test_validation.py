@@ -0,0 +1,65 @@
+"""Tests for the raw data validation rules (validation.py)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import validation
+
+DEMAND = 'Energy Required (MU)'
+
+def interleaved(n_days=10, regions=('A', 'B')):
+    """Two regions at very different levels, rows ordered by date then region"""
+    dates = pd.date_range('2024-01-01', periods=n_days, freq='D').strftime('%Y-%m-%d')
+    levels = {'A': 100.0, 'B': 400.0}
+    return pd.DataFrame([{'Date': date, 'region': region, DEMAND: levels[region]}
+                         for date in dates for region in regions])
+
+def flagged(df, rule, chunksize=None):
+    """Row numbers breaking `rule`, whole-frame or streamed in chunks"""
+    rules = [r for r in validation.RULES if r['rule'] == rule]
+    if chunksize is None:
+        violations, _ = validation.validate(df, rules)
+    else:
+        state = validation.new_state()
+        found = [validation.validate(df.iloc[begin:begin + chunksize], rules, state)[0]
+                 for begin in range(0, len(df), chunksize)]
+        violations = pd.concat([f for f in found if len(f)] or found[:1])
+    return sorted(violations['row'])
+
+@pytest.mark.parametrize('chunksize', [None, 3, 7])
+def test_jump_compares_within_series(chunksize):
+    df = interleaved()
+    # Alternating regions are 4x apart; only a real jump within B is flagged
+    assert flagged(df, 'jump', chunksize) == []
+    df.loc[13, DEMAND] = 700.0
+    assert df.loc[13, 'region'] == 'B'
+    # The jump itself and the return to normal on the next B row
+    assert flagged(df, 'jump', chunksize) == [13, 15]
+
+@pytest.mark.parametrize('chunksize', [None, 3, 7])
+def test_increasing_compares_within_series(chunksize):
+    df = interleaved()
+    assert flagged(df, 'increasing', chunksize) == []
+    # A's row for day 7 moved back a week: earlier than A's previous row
+    df.loc[14, 'Date'] = '2023-12-31'
+    assert df.loc[14, 'region'] == 'A'
+    assert flagged(df, 'increasing', chunksize) == [14]
+
+def test_single_series_without_by_column():
+    df = interleaved(regions=('A',)).drop(columns='region')
+    df.loc[4, DEMAND] = 10.0
+    df.loc[6, 'Date'] = '2024-01-02'
+    assert flagged(df, 'jump') == [4, 5]
+    assert flagged(df, 'increasing') == [6]
+
+def test_range_rows_quarantined_and_reported(tmp_path):
+    df = interleaved()
+    df.loc[3, DEMAND] = 131501.0
+    clean, report = validation.validate_frame(df, report_path=str(tmp_path / "report.json"),
+                                              quarantine_path=str(tmp_path / "quarantine.csv"))
+    assert len(clean) == len(df) - 1
+    assert report['quarantined'] == 1
+    ranges = [v for v in report['violations'] if v['rule'] == 'range']
+    assert ranges[0]['examples'][0]['row'] == 3
+    assert np.isclose(pd.read_csv(tmp_path / "quarantine.csv")[DEMAND].iloc[0], 131501.0)
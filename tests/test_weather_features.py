@@ -0,0 +1,111 @@
+"""Tests for the weather feature store (weather_features.py)"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import weather_features
+from synthetic_data import make_synthetic_demand
+
+@pytest.fixture(autouse=True)
+def clear_memory():
+    weather_features._memory.clear()
+    weather_features._by_version.clear()
+    yield
+    weather_features._memory.clear()
+    weather_features._by_version.clear()
+
+def _frame(temps, rain=None, start='2024-01-01'):
+    index = pd.date_range(start, periods=len(temps), freq='D', name='Date')
+    rain = np.zeros(len(temps)) if rain is None else rain
+    return pd.DataFrame({'temp': np.asarray(temps, dtype=float), 'rain': np.asarray(rain, dtype=float),
+                         'demand': 100.0}, index=index)
+
+def test_trailing_sum_needs_full_window():
+    values = np.array([1.0, 2.0, np.nan, 4.0, 5.0, 6.0])
+    result = weather_features._trailing_sum(values, 2)
+    np.testing.assert_array_equal(result, [np.nan, 3.0, np.nan, np.nan, 9.0, 11.0])
+
+def test_trailing_sum_matches_pandas_rolling():
+    values = np.random.default_rng(0).random((3, 50))
+    expected = pd.DataFrame(values.T).rolling(7).sum().values.T
+    np.testing.assert_allclose(weather_features._trailing_sum(values, 7), expected)
+
+def test_streak_counts_consecutive_days():
+    flags = np.array([True, True, False, True, True, True, False])
+    np.testing.assert_array_equal(weather_features._streak(flags), [1, 2, 0, 1, 2, 3, 0])
+
+def test_compute_degree_days_and_streak():
+    temps = [20, 30, 39, 40, 25]
+    features = weather_features.compute(np.array(temps, dtype=float))
+    np.testing.assert_allclose(features['cdd_24'], [0, 6, 15, 16, 1])
+    np.testing.assert_allclose(features['hdd_22'], [2, 0, 0, 0, 0])
+    np.testing.assert_allclose(features['heat_3d'], [np.nan, np.nan, 21, 37, 32])
+    np.testing.assert_allclose(features['hot_streak'], [0, 0, 1, 2, 0])
+    assert 'rain_3d' not in features
+
+def test_gaps_interpolated_before_windows():
+    df = _frame([30, 30, 30, 30, 30], rain=[1, 2, 3, 4, 5]).drop(pd.Timestamp('2024-01-03'))
+    frame = weather_features.weather_features(df)
+    assert list(frame.index) == list(df.index)
+    # The missing day is interpolated, so the 3-day window still spans calendar days
+    assert frame.loc['2024-01-04', 'rain_3d'] == pytest.approx(2 + 3 + 4)
+
+def test_series_computed_independently():
+    a = _frame([40] * 5).assign(region='A')
+    b = _frame([20] * 5).assign(region='B')
+    frame = weather_features.weather_features(pd.concat([a, b]), group='region')
+    assert list(frame['hot_streak'].iloc[:5]) == [1, 2, 3, 4, 5]
+    assert frame['hot_streak'].iloc[5:].sum() == 0
+
+def test_future_weather_windows_reach_into_history():
+    df = _frame(np.full(40, 30.0), rain=np.ones(40))
+    dates = pd.date_range('2024-02-10', periods=2, freq='D')
+    temps = np.array([[30.0, 30.0], [40.0, 40.0]])
+    future = weather_features.future_weather(df, dates, temps)
+    assert future['heat_3d'].shape == (2, 2)
+    assert future['heat_3d'][0, 0] == pytest.approx(18.0)
+    assert future['heat_3d'][1, 1] == pytest.approx(6 + 16 + 16)
+    assert future['hot_streak'][1, 1] == 2
+
+def test_load_or_build_caches_on_disk(tmp_path):
+    path = str(tmp_path / "weather.npz")
+    df = _frame(np.linspace(20, 40, 60), rain=np.arange(60))
+    built = weather_features.load_or_build(df, cache_path=path)
+    assert os.path.exists(path)
+
+    weather_features._memory.clear()
+    cached = weather_features.load_or_build(df, cache_path=path)
+    pd.testing.assert_frame_equal(built, cached)
+
+    # Duplicate dates share the value of their date
+    doubled = pd.concat([df, df.iloc[:5]]).sort_index(kind='stable')
+    repeated = weather_features.load_or_build(doubled, cache_path=path)
+    assert len(repeated) == len(doubled)
+    np.testing.assert_allclose(repeated.loc[df.index[0]].values[0], built.iloc[0].values)
+
+def test_load_or_build_read_only_and_versioned(tmp_path):
+    path = str(tmp_path / "weather.npz")
+    df = _frame(np.linspace(20, 40, 60))
+    first = weather_features.load_or_build(df, cache_path=path, version='v1', save=False)
+    assert not os.path.exists(path)
+
+    # Same version: served without looking at the frame again
+    assert weather_features.load_or_build(df.iloc[::-1].iloc[::-1], cache_path=path,
+                                          version='v1', save=False) is first
+    assert weather_features.load_or_build(df, cache_path=path, version='v2',
+                                          save=False) is not first
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+def test_output_path_always_written(workdir):
+    df = make_synthetic_demand(200)
+    live = str(workdir / "live.npz")
+    weather_features.load_or_build(df, cache_path=live, save=False)
+    # The frame is now in memory; a stage still gets its own copy, the live one none
+    staged = str(workdir / "staged.npz")
+    weather_features.load_or_build(df, cache_path=live, save=False, output_path=staged)
+    assert os.path.exists(staged) and not os.path.exists(live)
+    pd.testing.assert_frame_equal(weather_features.load_or_build(df, cache_path=staged),
+                                  weather_features.load_or_build(df, cache_path=live, save=False))
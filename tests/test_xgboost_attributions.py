@@ -0,0 +1,122 @@
+"""Tests for the XGBoost forecast attributions and their cache (xgboost_attributions.py)"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+xgboost = pytest.importorskip('xgboost')
+
+import xgboost_attributions
+from calendar_index import CALENDAR_FEATURES
+from features import create_lag_features, recursive_forecast
+from synthetic_data import make_synthetic_demand
+from xgboost_incremental import save_model
+
+HORIZON = 14
+
+def fixed_holidays(end, extra=()):
+    """Packed calendar with Republic Day and Independence Day every year, plus `extra` dates"""
+    dates = pd.date_range('2015-01-01', end, freq='D', name='Date')
+    flagged = (((dates.month == 1) & (dates.day == 26)) | ((dates.month == 8) & (dates.day == 15))
+               | dates.isin(pd.to_datetime(list(extra))))
+    return pd.DataFrame({'holidays': flagged.astype(np.uint32)}, index=dates)
+
+def fit(df, calendar=None, n_estimators=30):
+    df_ml, features = create_lag_features(df, calendar)
+    model = xgboost.XGBRegressor(n_estimators=n_estimators, max_depth=3, random_state=0)
+    model.fit(df_ml[features], df_ml['demand'])
+    return model, df_ml, features
+
+@pytest.fixture
+def saved(tmp_path):
+    """A small model saved like the stage saves it, with the calendar features"""
+    df = make_synthetic_demand(500)
+    calendar = fixed_holidays(df.index.max() + pd.Timedelta(days=400))
+    model, _, features = fit(df, calendar)
+    assert set(CALENDAR_FEATURES) <= set(features)
+    paths = {'model_path': str(tmp_path / "model.json"), 'meta_path': str(tmp_path / "meta.json")}
+    save_model(model, df.index.max(), 1.0, len(df), **paths)
+    return df, calendar, model, paths
+
+def test_contributions_add_up_to_prediction():
+    model, df_ml, features = fit(make_synthetic_demand(500))
+    X = df_ml[features].iloc[-100:]
+    explained = xgboost_attributions.contributions(model, X)
+    assert list(explained.columns) == features + [xgboost_attributions.BIAS]
+    np.testing.assert_allclose(explained.sum(axis=1), model.predict(X), atol=1e-3)
+
+def test_explained_forecast_adds_up(saved):
+    df, calendar, model, _ = saved
+    explained = xgboost_attributions.explain_forecast(model, df, HORIZON, calendar)
+    assert len(explained) == HORIZON
+    contribs = explained.drop(columns=['ds', 'yhat'])
+    np.testing.assert_allclose(contribs.sum(axis=1), explained['yhat'], atol=1e-3)
+
+    # yhat is the recursive forecast itself
+    df_ml, features = create_lag_features(df, calendar)
+    dates = pd.DatetimeIndex(explained['ds'])
+    temps = xgboost_attributions.climatology_for_dates(
+        xgboost_attributions.build_climatology(df), dates)[None, :]
+    exog = xgboost_attributions.proximity_features(calendar, dates)
+    forecast = recursive_forecast(model, df_ml, features, dates, temps, exog)
+    np.testing.assert_allclose(explained['yhat'], forecast[0], rtol=1e-6)
+
+def test_cache_key_tracks_model_data_and_calendar(saved):
+    df, calendar, model, paths = saved
+
+    def key(m=model, d=df, c=calendar):
+        return xgboost_attributions.cache_key(m, d, c, HORIZON, paths['model_path'])
+
+    base = key()
+    assert key() == base
+
+    # Model: a different booster saved over the same path
+    other, _, _ = fit(df, calendar, n_estimators=31)
+    save_model(other, df.index.max(), 1.0, len(df), **paths)
+    assert key(m=other)['model_version'] != base['model_version']
+    save_model(model, df.index.max(), 1.0, len(df), **paths)
+    assert key() == base
+
+    # Data: one demand value revised
+    revised = df.copy()
+    revised.iloc[-3, revised.columns.get_loc('demand')] += 1.0
+    assert key(d=revised)['data_version'] != base['data_version']
+
+    # Calendar: a new holiday inside the forecast horizon, but not one a year past it
+    soon = df.index.max() + pd.Timedelta(days=5)
+    later = df.index.max() + pd.Timedelta(days=HORIZON + 200)
+    moved = key(c=fixed_holidays(calendar.index.max(), [soon]))
+    assert moved['calendar_version'] != base['calendar_version']
+    assert key(c=fixed_holidays(calendar.index.max(), [later])) == base
+
+    # A model without holiday features ignores the calendar
+    plain, _, _ = fit(df)
+    assert key(m=plain)['calendar_version'] is None
+    assert key(m=plain, c=None)['calendar_version'] is None
+
+def test_load_or_explain_reuses_cache(saved, tmp_path, monkeypatch):
+    df, calendar, _, paths = saved
+    cache = str(tmp_path / "attributions.json")
+    options = dict(calendar=calendar, forecast_days=HORIZON, cache_path=cache, **paths)
+    first, version = xgboost_attributions.load_or_explain(df, **options)
+    assert os.path.exists(cache)
+
+    calls = []
+    real = xgboost_attributions.explain_forecast
+    monkeypatch.setattr(xgboost_attributions, 'explain_forecast',
+                        lambda *args, **kwargs: calls.append(1) or real(*args, **kwargs))
+    cached, cached_version = xgboost_attributions.load_or_explain(df, **options)
+    assert calls == [] and cached_version == version
+    pd.testing.assert_frame_equal(cached, first, check_dtype=False)
+
+    revised = df.copy()
+    revised.iloc[-1, revised.columns.get_loc('demand')] += 5.0
+    xgboost_attributions.load_or_explain(revised, **options)
+    assert calls == [1]
+    loaded, _ = xgboost_attributions.load_attributions(revised, calendar, HORIZON,
+                                                       cache_path=cache, **paths)
+    assert loaded is not None
+    assert xgboost_attributions.load_attributions(df, calendar, HORIZON, cache_path=cache,
+                                                  **paths) == (None, None)
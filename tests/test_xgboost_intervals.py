@@ -0,0 +1,44 @@
+"""Tests for the quantile forecast and its calibration inputs (xgboost_intervals.py)"""
+
+import numpy as np
+import pandas as pd
+
+from features import create_lag_features
+from scenarios import build_climatology, climatology_for_dates
+from synthetic_data import make_synthetic_demand
+from xgboost_intervals import _known_ahead, quantile_forecast
+
+class TemperatureQuantiles:
+    """Stand-in multi-quantile model: temperature -/+ 5 around the temperature"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += 1
+        temp = X['temp'].values
+        return np.column_stack([temp - 5, temp, temp + 5])
+
+def test_median_is_yhat_in_one_pass():
+    df_ml, features = create_lag_features(make_synthetic_demand(400))
+    dates = pd.date_range(df_ml.index[-1] + pd.Timedelta(days=1), periods=10, freq='D')
+    temps = np.linspace(25, 34, 10)[None, :]
+    model = TemperatureQuantiles()
+
+    forecast = quantile_forecast(model, np.arange(10.0), df_ml, features, dates, temps)
+    assert model.calls == len(dates)
+    np.testing.assert_allclose(forecast['yhat'], temps[0])
+    np.testing.assert_allclose(forecast['yhat_lower'], temps[0] - 5 - np.arange(10))
+    np.testing.assert_allclose(forecast['yhat_upper'], temps[0] + 5 + np.arange(10))
+
+def test_calibration_uses_climatology_not_observed_weather():
+    df_ml, features = create_lag_features(make_synthetic_demand(800))
+    start = df_ml.index[-60]
+    history = df_ml[df_ml.index < start]
+    dates = pd.date_range(start, periods=30, freq='D')
+
+    temps, exog = _known_ahead(history, df_ml, features, dates)
+    expected = climatology_for_dates(build_climatology(history), dates)
+    np.testing.assert_allclose(temps[0], expected)
+    assert not np.allclose(temps[0], df_ml['temp'].reindex(dates).values)
+    assert exog is None
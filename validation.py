@@ -0,0 +1,295 @@
+"""
+Data Validation for AP Electricity Demand
+Runs a declarative rule set (ranges, duplicate and out-of-order dates, sudden
+jumps, day-name consistency) as vectorized column checks, either over the whole
+raw frame or chunk by chunk, and writes a violations report and quarantine file
+"""
+
+import json
+import os
+import time
+import pandas as pd
+import numpy as np
+
+REPORT_PATH = "data/validation_report.json"
+QUARANTINE_PATH = "data/quarantine.csv"
+
+# Rows breaking an 'error' rule are quarantined; 'warn' rules are only reported.
+# Range bounds double as unit checks (MU not kWh, degrees C not F, inflation as a fraction).
+# Date and jump rules apply per series when the 'by' column is present (multi-region feeds)
+RULES = [
+    {'rule': 'not_null', 'column': 'Date', 'severity': 'error'},
+    {'rule': 'duplicate', 'column': 'Date', 'by': 'region', 'severity': 'warn'},
+    {'rule': 'increasing', 'column': 'Date', 'by': 'region', 'severity': 'warn'},
+    {'rule': 'range', 'column': 'Energy Required (MU)', 'min': 1, 'max': 1000,
+     'severity': 'error', 'hint': 'daily energy in MU'},
+    {'rule': 'range', 'column': 'temp', 'min': 0, 'max': 55,
+     'severity': 'error', 'hint': 'degrees Celsius'},
+    {'rule': 'range', 'column': 'rain', 'min': 0, 'max': 500,
+     'severity': 'error', 'hint': 'daily rainfall in mm'},
+    {'rule': 'range', 'column': 'inflation', 'min': -0.5, 'max': 0.5,
+     'severity': 'error', 'hint': 'a fraction, not a percentage'},
+    {'rule': 'jump', 'column': 'Energy Required (MU)', 'by': 'region', 'max_change': 0.4,
+     'severity': 'warn'},
+    {'rule': 'day_name', 'column': 'day', 'severity': 'warn'},
+]
+
+VIOLATION_COLUMNS = ['row', 'date', 'rule', 'column', 'severity', 'value']
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+def _series_keys(chunk, by, cache):
+    """Hash of the 'by' column per row (zeros for a single series), computed once per chunk"""
+    if by not in cache:
+        if by and by in chunk.columns:
+            cache[by] = pd.util.hash_array(chunk[by].astype(str).values).view(np.int64)
+        else:
+            cache[by] = np.zeros(len(chunk), dtype=np.int64)
+    return cache[by]
+
+def _previous_in_series(series, values, carried, fill):
+    """
+    Value of the previous row of the same series (in file order) for every row;
+    the first row of each series in the chunk takes its value carried over
+    from earlier chunks
+    """
+    order = np.argsort(series, kind='stable')
+    ordered = series[order]
+    previous = np.empty(len(values), dtype=values.dtype)
+    previous[1:] = values[order][:-1]
+    first = np.ones(len(values), dtype=bool)
+    first[1:] = ordered[1:] != ordered[:-1]
+    previous[first] = [carried.get(key, fill) for key in ordered[first]]
+    result = np.empty_like(previous)
+    result[order] = previous
+    return result
+
+def _last_per_series(series, values):
+    """{series key: value of its last row}"""
+    keys, position = np.unique(series[::-1], return_index=True)
+    return dict(zip(keys, values[len(values) - 1 - position]))
+
+def _numeric(chunk, column):
+    return pd.to_numeric(chunk[column], errors='coerce').to_numpy(dtype=float)
+
+def _check(rule, chunk, dates, state, cache):
+    """Boolean mask of rows violating one rule (NaN values pass; filling handles them)"""
+    kind = rule['rule']
+    valid = dates.notna().values
+    if kind == 'not_null':
+        return ~valid
+    if kind in ('duplicate', 'increasing'):
+        days = dates.values.astype('datetime64[D]').astype(np.int64)
+        series = _series_keys(chunk, rule.get('by'), cache)
+        if kind == 'duplicate':
+            # One int64 per (series, day); wrap-around only mixes hashes, never days
+            keys = series + days
+            seen = state['seen_keys']
+            position = np.minimum(np.searchsorted(seen, keys), max(len(seen) - 1, 0))
+            seen_before = seen[position] == keys if len(seen) else np.zeros(len(keys), bool)
+            return (pd.Series(keys).duplicated().values | seen_before) & valid
+        # Each dated row against the previous dated row of its own series
+        bad = np.zeros(len(days), dtype=bool)
+        bad[valid] = days[valid] < _previous_in_series(
+            series[valid], days[valid], state['last_day'], np.iinfo(np.int64).min)
+        return bad
+
+    if kind == 'day_name':
+        # Compare weekday codes rather than strings
+        codes = pd.Categorical(chunk[rule['column']], categories=DAY_NAMES).codes
+        return valid & (codes != dates.dt.dayofweek.fillna(-1).values)
+
+    values = _numeric(chunk, rule['column'])
+    if kind == 'range':
+        with np.errstate(invalid='ignore'):
+            return (values < rule['min']) | (values > rule['max'])
+    if kind == 'jump':
+        series = _series_keys(chunk, rule.get('by'), cache)
+        carried = state['last_values'].get(rule['column'], {})
+        previous = _previous_in_series(series, values, carried, np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.abs(values - previous) / np.abs(previous) > rule['max_change']
+    raise ValueError(f"Unknown validation rule '{kind}'")
+
+def new_state():
+    """
+    Carry-over between chunks: seen (series, date) keys sorted, and per series
+    key the last date and the last value of each jump column
+    """
+    return {'seen_keys': np.empty(0, dtype=np.int64), 'last_day': {}, 'last_values': {},
+            'offset': 0}
+
+def validate(chunk, rules=RULES, state=None):
+    """
+    Run every rule over one frame (or one streamed chunk) of raw data
+    state: new_state() carried across chunks so duplicates, ordering and jumps
+           are checked across chunk boundaries
+
+    Returns (violations frame, boolean mask of rows to quarantine)
+    """
+    streaming = state is not None
+    state = state if streaming else new_state()
+    dates = pd.to_datetime(chunk['Date'], errors='coerce', format='%Y-%m-%d').reset_index(drop=True)
+    chunk = chunk.reset_index(drop=True)
+    cache = {}
+
+    violations = []
+    quarantine = np.zeros(len(chunk), dtype=bool)
+    for rule in rules:
+        if rule['column'] not in chunk.columns:
+            continue
+        bad = _check(rule, chunk, dates, state, cache)
+        if not bad.any():
+            continue
+        rows = np.flatnonzero(bad)
+        violations.append(pd.DataFrame({
+            'row': rows + state['offset'],
+            'date': dates.values[rows],
+            'rule': rule['rule'],
+            'column': rule['column'],
+            'severity': rule['severity'],
+            'value': chunk[rule['column']].values[rows].astype(str),
+        }))
+        if rule['severity'] == 'error':
+            quarantine |= bad
+
+    if streaming:
+        _advance(state, chunk, dates, rules, cache)
+
+    violations = (pd.concat(violations, ignore_index=True) if violations
+                  else pd.DataFrame(columns=VIOLATION_COLUMNS))
+    return violations, quarantine
+
+def _advance(state, chunk, dates, rules, cache):
+    """Move the carry-over state to the end of a validated chunk"""
+    valid = dates.notna().values
+    days = dates.values.astype('datetime64[D]').astype(np.int64)
+    date_rule = next((r for r in rules if r['rule'] in ('duplicate', 'increasing')), {})
+    series = _series_keys(chunk, date_rule.get('by'), cache)
+    # Both parts are sorted runs, which the stable sort merges in linear time
+    new_keys = np.sort((series + days)[valid])
+    state['seen_keys'] = np.sort(np.concatenate([state['seen_keys'], new_keys]), kind='stable')
+    for rule in rules:
+        if rule['column'] not in chunk.columns:
+            continue
+        series = _series_keys(chunk, rule.get('by'), cache)
+        if rule['rule'] == 'increasing':
+            state['last_day'].update(_last_per_series(series[valid], days[valid]))
+        elif rule['rule'] == 'jump':
+            state['last_values'].setdefault(rule['column'], {}).update(
+                _last_per_series(series, _numeric(chunk, rule['column'])))
+    state['offset'] += len(chunk)
+
+def summarize(violations, n_rows, n_quarantined, rules=RULES):
+    """Compact report: count and first few examples per rule and column"""
+    summary = []
+    for rule in rules:
+        hits = violations[(violations['rule'] == rule['rule'])
+                          & (violations['column'] == rule['column'])]
+        if len(hits) == 0:
+            continue
+        summary.append({
+            'rule': rule['rule'],
+            'column': rule['column'],
+            'severity': rule['severity'],
+            'count': int(len(hits)),
+            'examples': [{'row': int(r.row), 'date': str(pd.Timestamp(r.date).date())
+                          if pd.notna(r.date) else None, 'value': r.value}
+                         for r in hits.head(3).itertuples()],
+            **({'hint': rule['hint']} if 'hint' in rule else {}),
+        })
+    return {'rows': int(n_rows), 'quarantined': int(n_quarantined), 'violations': summary}
+
+def write_outputs(report, quarantined, report_path=REPORT_PATH, quarantine_path=QUARANTINE_PATH):
+    """Write the JSON report and the quarantined raw rows"""
+    for path in (report_path, quarantine_path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    quarantined.to_csv(quarantine_path, index=False)
+
+def validate_frame(df, rules=RULES, report_path=REPORT_PATH, quarantine_path=QUARANTINE_PATH):
+    """
+    Validate a raw frame in one pass, write report and quarantine files
+    Returns (clean rows, report)
+    """
+    violations, quarantine = validate(df, rules)
+    report = summarize(violations, len(df), quarantine.sum(), rules)
+    write_outputs(report, df[quarantine], report_path, quarantine_path)
+    return df[~quarantine], report
+
+def validate_csv(path, chunksize=100000, rules=RULES, report_path=REPORT_PATH,
+                 quarantine_path=QUARANTINE_PATH):
+    """
+    Validate a raw CSV chunk by chunk without loading it whole
+    Returns the report; clean rows are not kept
+    """
+    state = new_state()
+    found, quarantined, n_rows = [], [], 0
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        violations, quarantine = validate(chunk, rules, state)
+        found.append(violations)
+        quarantined.append(chunk[quarantine])
+        n_rows += len(chunk)
+
+    found = [f for f in found if len(f)]
+    violations = (pd.concat(found, ignore_index=True) if found
+                  else pd.DataFrame(columns=VIOLATION_COLUMNS))
+    quarantined = pd.concat(quarantined, ignore_index=True)
+    report = summarize(violations, n_rows, len(quarantined), rules)
+    write_outputs(report, quarantined, report_path, quarantine_path)
+    return report
+
+def print_report(report):
+    """One line per violated rule"""
+    print(f"[OK] Validated {report['rows']:,} rows, quarantined {report['quarantined']:,}")
+    for item in report['violations']:
+        level = 'ERROR' if item['severity'] == 'error' else 'WARNING'
+        print(f"  [{level}] {item['rule']} on {item['column']}: {item['count']:,} rows")
+
+def _synthetic_raw(n_rows, fault_share=0.001, seed=0):
+    """Raw-schema rows (finalAPData.csv columns) with injected faults"""
+    from synthetic_data import make_synthetic_demand
+
+    rng = np.random.default_rng(seed)
+    # Stack regions of synthetic history so row counts can exceed the date range
+    n_regions = max(1, n_rows // 50000)
+    days = int(np.ceil(n_rows / n_regions))
+    df = pd.concat([make_synthetic_demand(days, seed=seed + i).assign(region=f"R{i:03d}")
+                    for i in range(n_regions)])
+    df = df.reset_index().rename(columns={'demand': 'Energy Required (MU)'}).iloc[:n_rows]
+    df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
+
+    faults = rng.random(len(df)) < fault_share
+    df.loc[faults, 'temp'] = df.loc[faults, 'temp'] * 9 / 5 + 32
+    df.loc[rng.random(len(df)) < fault_share, 'Energy Required (MU)'] *= 1000
+    return df
+
+def benchmark_validation(sizes=(100000, 1000000, 5000000), chunksize=1000000):
+    """Validation cost per million rows, whole-frame and chunked"""
+    print(f"\n{'rows':>10} {'one pass (s)':>13} {'s / M rows':>11} {'chunked (s)':>12} "
+          f"{'violations':>11}")
+    for n_rows in sizes:
+        df = _synthetic_raw(n_rows)
+
+        start = time.perf_counter()
+        violations, _ = validate(df)
+        one_pass = time.perf_counter() - start
+
+        start = time.perf_counter()
+        state = new_state()
+        for begin in range(0, len(df), chunksize):
+            validate(df.iloc[begin:begin + chunksize], state=state)
+        chunked = time.perf_counter() - start
+
+        print(f"{len(df):>10,} {one_pass:>13.3f} {one_pass / len(df) * 1e6:>11.3f} "
+              f"{chunked:>12.3f} {len(violations):>11,}")
+
+if __name__ == "__main__":
+    print("="*60)
+    print("AP ELECTRICITY DEMAND - DATA VALIDATION")
+    print("="*60)
+
+    report = validate_csv("data/finalAPData.csv")
+    print_report(report)
+    benchmark_validation()
@@ -0,0 +1,295 @@
+"""
+Weather Feature Store
+Cooling/heating degree days, multi-day heat accumulation, hot-day streaks and
+rolling rain totals, computed for every series in one vectorized pass over a
+(series, days) grid and cached per data version, so Prophet and XGBoost train
+on the same weather features without rebuilding them
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import pandas as pd
+import numpy as np
+
+from features import align_daily
+
+WEATHER_CACHE = "data/weather_features.npz"
+
+# Base temperatures (deg C) for cooling and heating degree days
+CDD_BASES = (24.0,)
+HDD_BASES = (22.0,)
+# Trailing days of cooling degree days summed into heat accumulation
+HEAT_WINDOWS = (3, 7)
+# Days at or above this temperature extend a hot-day streak (about the 95th percentile)
+HOT_DAY_TEMP = 38.0
+# Trailing days of rainfall summed
+RAIN_WINDOWS = (3, 7, 30)
+
+def feature_names(cdd_bases=CDD_BASES, hdd_bases=HDD_BASES, heat_windows=HEAT_WINDOWS,
+                  rain_windows=RAIN_WINDOWS):
+    """Weather feature columns for a configuration, in the order they are built"""
+    names = [f"cdd_{base:g}" for base in cdd_bases] + [f"hdd_{base:g}" for base in hdd_bases]
+    if cdd_bases:
+        names += [f"heat_{window}d" for window in heat_windows] + ['hot_streak']
+    return names + [f"rain_{window}d" for window in rain_windows]
+
+# Columns of the default configuration, used by both models
+WEATHER_FEATURES = feature_names()
+
+def _trailing_sum(values, window):
+    """
+    Sum over the trailing window (ending on the current day) along the last
+    axis, via cumulative sums; NaN until the window holds `window` known days
+    """
+    known = ~np.isnan(values)
+    pad = np.zeros(values.shape[:-1] + (1,))
+    total = np.concatenate([pad, np.cumsum(np.where(known, values, 0.0), axis=-1)], axis=-1)
+    count = np.concatenate([pad, np.cumsum(known, axis=-1)], axis=-1)
+
+    result = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        sums = total[..., window:] - total[..., :-window]
+        full = (count[..., window:] - count[..., :-window]) == window
+        result[..., window - 1:] = np.where(full, sums, np.nan)
+    return result
+
+def _streak(flags):
+    """Consecutive True days up to and including each day, along the last axis"""
+    position = np.broadcast_to(np.arange(flags.shape[-1]), flags.shape)
+    last_break = np.maximum.accumulate(np.where(flags, -1, position), axis=-1)
+    return np.where(flags, position - last_break, 0)
+
+def compute(temp=None, rain=None, cdd_bases=CDD_BASES, hdd_bases=HDD_BASES,
+            heat_windows=HEAT_WINDOWS, hot_day_temp=HOT_DAY_TEMP, rain_windows=RAIN_WINDOWS):
+    """
+    Weather features from daily arrays laid out as (n_series, n_days) (or one
+    series as (n_days,)), days consecutive along the last axis
+    Returns {feature: array of the same shape}; features whose input is
+    missing are left out
+    """
+    features = {}
+    if temp is not None:
+        temp = np.asarray(temp, dtype=float)
+        for base in cdd_bases:
+            features[f"cdd_{base:g}"] = np.maximum(temp - base, 0.0)
+        for base in hdd_bases:
+            features[f"hdd_{base:g}"] = np.maximum(base - temp, 0.0)
+        if cdd_bases:
+            cooling = features[f"cdd_{cdd_bases[0]:g}"]
+            for window in heat_windows:
+                features[f"heat_{window}d"] = _trailing_sum(cooling, window)
+            streak = _streak(temp >= hot_day_temp).astype(float)
+            features['hot_streak'] = np.where(np.isnan(temp), np.nan, streak)
+    if rain is not None:
+        rain = np.asarray(rain, dtype=float)
+        for window in rain_windows:
+            features[f"rain_{window}d"] = _trailing_sum(rain, window)
+    return features
+
+def weather_features(df, group=None, **config):
+    """
+    Weather features for every row of df, computed in one pass for all series
+    Gaps inside a series are interpolated first (features.align_daily), so
+    windows always span calendar days; duplicate dates share one value
+    group: column identifying separate series (e.g. 'region')
+    config: overrides of the compute() defaults
+    """
+    from baselines import to_panel
+
+    names, dates, panel = to_panel(df, group, columns=('temp', 'rain'))
+    computed = compute(panel.get('temp'), panel.get('rain'), **config)
+
+    # Each row's cell on the flattened (series, days) grid
+    rows = (pd.Index(names).get_indexer(df[group]) if group else np.zeros(len(df), dtype=np.int64))
+    days = (df.index.values.astype('datetime64[D]')
+            - np.datetime64(dates[0].date(), 'D')).astype(np.int64)
+    cells = rows * len(dates) + days
+    values = np.empty((len(computed), len(df)))
+    for i, feature in enumerate(computed.values()):
+        np.take(feature, cells, out=values[i])
+    return pd.DataFrame(values.T, index=df.index, columns=list(computed), copy=False)
+
+def future_weather(df, dates, temps=None, **config):
+    """
+    Weather features for dates after df ends, with trailing windows reaching
+    back into the observed history
+    temps: (n_scenarios, n_days) temperatures for dates; the day-of-year
+           climatology by default. Rain always follows its climatology
+    Returns {feature: (n_scenarios, n_days) array}
+    """
+    from scenarios import build_climatology, climatology_for_dates
+
+    columns = [c for c in ('temp', 'rain') if c in df.columns]
+    reach = max(config.get('heat_windows', HEAT_WINDOWS) + config.get('rain_windows', RAIN_WINDOWS))
+    history = align_daily(df, columns).iloc[-reach:]
+    climatology = build_climatology(df, columns)
+
+    # Days between the end of history and the last requested date
+    dates = pd.DatetimeIndex(dates)
+    grid = pd.date_range(history.index[-1] + pd.Timedelta(days=1), dates.max(), freq='D')
+    positions = grid.get_indexer(dates)
+    if (positions < 0).any():
+        raise ValueError("Future weather dates must fall after the observed history")
+
+    n_scenarios = 1 if temps is None else np.asarray(temps).shape[0]
+    arrays = {}
+    for col in columns:
+        future = np.tile(climatology_for_dates(climatology, grid, col), (n_scenarios, 1))
+        if col == 'temp' and temps is not None:
+            future[:, positions] = np.asarray(temps, dtype=float)
+        past = np.tile(history[col].values, (n_scenarios, 1))
+        arrays[col] = np.concatenate([past, future], axis=1)
+
+    computed = compute(arrays.get('temp'), arrays.get('rain'), **config)
+    return {name: values[:, len(history) + positions] for name, values in computed.items()}
+
+def data_version(df, group=None):
+    """Hash of the weather inputs (dates, temperature, rain and series)"""
+    columns = [c for c in ('temp', 'rain', group) if c and c in df.columns]
+    return hashlib.sha256(pd.util.hash_pandas_object(df[columns]).values.tobytes()).hexdigest()[:16]
+
+# Latest built feature frame in this process: (key, frame), plus the latest
+# row-aligned result per caller-supplied version
+_memory = {}
+_by_version = {}
+
+def _read_cache(path, key):
+    """Cached feature values and columns when the file was built for key"""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as cached:
+        if str(cached['key']) != key:
+            return None
+        return cached['values'], [str(c) for c in cached['columns']]
+
+def _write_cache(path, key, frame):
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, key=key, values=frame.values, columns=np.asarray(frame.columns, dtype=str))
+        os.replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+def load_or_build(df, group=None, cache_path=WEATHER_CACHE, version=None, save=True,
+                  output_path=None, **config):
+    """
+    Weather features for the rows of df, rebuilt only when the weather data
+    or the configuration changes
+    Both models call this with the same prepared data, so whichever runs
+    second (in this process or a later one) reads the cached frame
+    version: the caller's fingerprint of df (e.g. the dashboard's data
+             version); repeat calls with it skip hashing the frame
+    save: write a rebuilt frame to cache_path; request handlers and the
+          model stages pass False
+    output_path: also write the frame here (a stage's work folder); always written
+    """
+    config_key = {name: list(value) if isinstance(value, tuple) else value
+                  for name, value in config.items()}
+    if version is not None:
+        version_key = json.dumps({'version': version, 'rows': len(df), 'group': group,
+                                  'cache_path': cache_path, 'config': config_key}, sort_keys=True)
+        if _by_version.get('key') == version_key:
+            return _by_version['frame']
+
+    # One row per (series, date), in (series, date) order, so duplicates and
+    # row order do not change the version
+    days = df.index.values.astype('datetime64[D]').astype(np.int64)
+    codes = pd.factorize(df[group], sort=True)[0] if group else np.zeros(len(df), dtype=np.int64)
+    cells = codes * (days.max() - days.min() + 1) + (days - days.min())
+    unique_cells, first = np.unique(cells, return_index=True)
+    unique = df.iloc[first]
+    key = json.dumps({'data_version': data_version(unique, group), 'group': group,
+                      'config': config_key}, sort_keys=True)
+
+    frame = _memory.get('frame') if _memory.get('key') == key else None
+    if frame is None:
+        cached = _read_cache(cache_path, key)
+        if cached is not None:
+            values, columns = cached
+            frame = pd.DataFrame(values, index=unique.index, columns=columns)
+    if frame is None:
+        frame = weather_features(unique, group, **config)
+        if save:
+            _write_cache(cache_path, key, frame)
+    if output_path:
+        _write_cache(output_path, key, frame)
+    _memory.update(key=key, frame=frame)
+
+    position = np.searchsorted(unique_cells, cells)
+    result = pd.DataFrame(frame.values[position], index=df.index, columns=frame.columns)
+    if version is not None:
+        _by_version.update(key=version_key, frame=result)
+    return result
+
+def benchmark_weather(shapes=((10, 1), (300, 1), (10, 100), (40, 100)), drop_share=0.02,
+                      root="data/weather_benchmark"):
+    """
+    Vectorized feature build vs per-series pandas rolling windows on synthetic
+    data, and the cost of a cache hit in a fresh process (read from disk)
+    """
+    from synthetic_data import make_synthetic_demand
+
+    cache_path = os.path.join(root, "features.npz")
+    rng = np.random.default_rng(0)
+    print(f"\n{'years':>6} {'regions':>8} {'rows':>10} {'vectorized (s)':>15} "
+          f"{'pandas (s)':>11} {'speedup':>8} {'cache hit (s)':>14}")
+    try:
+        for years, regions in shapes:
+            df = make_synthetic_demand(int(years * 365.25), n_regions=regions)
+            df = df[rng.random(len(df)) >= drop_share]
+            group = 'region' if regions > 1 else None
+
+            start = time.perf_counter()
+            weather_features(df, group)
+            build_time = time.perf_counter() - start
+
+            built = load_or_build(df, group, cache_path)
+            _memory.clear()
+            _by_version.clear()
+            start = time.perf_counter()
+            cached = load_or_build(df, group, cache_path)
+            hit_time = time.perf_counter() - start
+            assert np.allclose(built.values, cached.values, equal_nan=True)
+
+            # Reference: per-series reindex and pandas rolling sums
+            start = time.perf_counter()
+            for _, series in (df.groupby('region') if group else [(None, df)]):
+                daily = series[['temp', 'rain']].asfreq('D').interpolate(limit_area='inside')
+                cooling = (daily['temp'] - CDD_BASES[0]).clip(lower=0)
+                (HDD_BASES[0] - daily['temp']).clip(lower=0)
+                for window in HEAT_WINDOWS:
+                    cooling.rolling(window).sum()
+                hot = daily['temp'] >= HOT_DAY_TEMP
+                hot.groupby((~hot).cumsum()).cumsum()
+                for window in RAIN_WINDOWS:
+                    daily['rain'].rolling(window).sum()
+            pandas_time = time.perf_counter() - start
+
+            print(f"{years:>6} {regions:>8} {len(df):>10,} {build_time:>15.3f} "
+                  f"{pandas_time:>11.3f} {pandas_time / build_time:>7.1f}x {hit_time:>14.3f}")
+    finally:
+        _memory.clear()
+        _by_version.clear()
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    print("="*60)
+    print("AP ELECTRICITY DEMAND - WEATHER FEATURE STORE")
+    print("="*60)
+
+    df = pd.read_csv("data/prepared_data.csv", index_col=0, parse_dates=True)
+    weather = load_or_build(df)
+    print(f"\n[OK] {len(WEATHER_FEATURES)} weather features for {len(weather)} rows")
+    print(weather.describe().T[['mean', 'std', 'min', 'max']].round(2).to_string())
+    print("\nCorrelation with demand:")
+    print(weather.corrwith(df['demand']).round(3).to_string())
+    benchmark_weather()
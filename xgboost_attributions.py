@@ -0,0 +1,236 @@
+"""
+XGBoost Forecast Attributions
+Explains each day of the recursive XGBoost forecast with per-feature
+contributions from the booster's native TreeSHAP (pred_contribs), computed for
+the whole horizon in one call by the XGBoost stage and cached per model,
+data and calendar version
+"""
+
+import hashlib
+import json
+import os
+import time
+import pandas as pd
+import numpy as np
+
+try:
+    import xgboost as xgb
+    XGBOOST_AVAILABLE = True
+except ImportError:
+    XGBOOST_AVAILABLE = False
+    print("[WARNING] XGBoost not installed. Install with: pip install xgboost scikit-learn")
+
+from features import create_lag_features, recursive_forecast
+from scenarios import build_climatology, climatology_for_dates
+from calendar_index import load_calendar, proximity_features, CALENDAR_FEATURES
+from weather_features import WEATHER_FEATURES
+from xgboost_incremental import load_model, MODEL_PATH, META_PATH
+
+ATTRIBUTION_PATH = "models/xgboost_attributions.json"
+
+# Contributions of the model's intercept, not of any feature
+BIAS = 'bias'
+
+def model_version(model_path=MODEL_PATH):
+    """Content hash of the saved booster, or None when there is no model"""
+    if not os.path.exists(model_path):
+        return None
+    with open(model_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+def data_fingerprint(df):
+    """Hash of the prepared columns the forecast starts from"""
+    inputs = df[[c for c in ('demand', 'temp', 'rain') if c in df.columns]]
+    return hashlib.sha256(pd.util.hash_pandas_object(inputs).values.tobytes()).hexdigest()[:16]
+
+def contributions(model, X):
+    """
+    TreeSHAP contributions for every row of X in one batched call
+    Returns a frame with one column per feature plus 'bias'; each row sums to
+    the model's prediction for that row
+    """
+    booster = model.get_booster()
+    matrix = xgb.DMatrix(X, feature_names=list(X.columns))
+    values = booster.predict(matrix, pred_contribs=True)
+    return pd.DataFrame(values, index=X.index, columns=list(X.columns) + [BIAS])
+
+def explain_forecast(model, df, forecast_days=30, calendar=None, weather_options=None):
+    """
+    Recursive forecast from the end of df, with the contributions behind each day
+    Lag features carry the model's own earlier predictions, so a large lag_7
+    contribution on day 10 means the forecast of day 3 is driving it
+    weather_options: passed to weather_features.load_or_build for models with weather features
+
+    Returns a frame of ds, yhat, bias and one contribution column per feature
+    """
+    needed = model.get_booster().feature_names or []
+    uses_calendar = bool(set(CALENDAR_FEATURES) & set(needed))
+    if uses_calendar and calendar is None:
+        raise ValueError("Model uses holiday features; pass the holiday calendar")
+    uses_weather = bool(set(WEATHER_FEATURES) & set(needed))
+    df_ml, features = create_lag_features(df, calendar if uses_calendar else None,
+                                          weather=uses_weather and (weather_options or True))
+
+    dates = pd.date_range(df_ml.index[-1] + pd.Timedelta(days=1), periods=forecast_days, freq='D')
+    temps = None
+    if 'temp' in features:
+        temps = climatology_for_dates(build_climatology(df), dates)[None, :]
+    exog = proximity_features(calendar, dates) if uses_calendar else None
+    forecast, rows = recursive_forecast(model, df_ml, features, dates, temps, exog,
+                                        return_features=True)
+
+    explained = contributions(model, rows[features])
+    explained.insert(0, 'yhat', forecast[0])
+    explained.insert(0, 'ds', dates)
+    return explained.reset_index(drop=True)
+
+def attribution_calendar(df):
+    """Holiday calendar attributions are computed with, by the stage and the dashboard alike"""
+    return load_calendar(end=df.index.max() + pd.Timedelta(days=365))
+
+def cache_key(model, df, calendar=None, forecast_days=30, model_path=MODEL_PATH):
+    """
+    Everything the attributions depend on: the saved booster and its feature
+    names, the prepared data, the holiday features (when the model uses them)
+    and the horizon
+    """
+    features = list(model.get_booster().feature_names or [])
+    calendar_version = None
+    if calendar is not None and set(CALENDAR_FEATURES) & set(features):
+        dates = df.index.unique().union(pd.date_range(df.index.max() + pd.Timedelta(days=1),
+                                                      periods=forecast_days, freq='D'))
+        holidays = proximity_features(calendar, dates)
+        calendar_version = hashlib.sha256(
+            pd.util.hash_pandas_object(holidays).values.tobytes()).hexdigest()[:16]
+    return {'model_version': model_version(model_path), 'feature_names': features,
+            'data_version': data_fingerprint(df), 'calendar_version': calendar_version,
+            'forecast_days': int(forecast_days)}
+
+def _read_cache(cache_path, key):
+    if not os.path.exists(cache_path):
+        return None
+    with open(cache_path) as f:
+        cached = json.load(f)
+    if cached.get('key') != key:
+        return None
+    frame = pd.DataFrame(cached['rows'])
+    frame['ds'] = pd.to_datetime(frame['ds'])
+    return frame
+
+def load_attributions(df, calendar=None, forecast_days=30, model_path=MODEL_PATH,
+                      meta_path=META_PATH, cache_path=ATTRIBUTION_PATH):
+    """
+    Attributions saved by the XGBoost stage, when they match the saved model,
+    the data and the calendar; never computes or writes them
+    Returns (attributions frame, model version), or (None, None)
+    """
+    if not XGBOOST_AVAILABLE:
+        return None, None
+    model, _ = load_model(model_path, meta_path)
+    if model is None:
+        return None, None
+    key = cache_key(model, df, calendar, forecast_days, model_path)
+    frame = _read_cache(cache_path, key)
+    return (frame, key['model_version']) if frame is not None else (None, None)
+
+def load_or_explain(df, calendar=None, forecast_days=30, model_path=MODEL_PATH,
+                    meta_path=META_PATH, cache_path=ATTRIBUTION_PATH, weather_options=None,
+                    output_path=None):
+    """
+    Forecast attributions for the saved model, recomputed only when the model,
+    the data or the calendar changes
+    output_path: write here instead of cache_path (a stage's work folder); always written
+    Returns (attributions frame, model version), or (None, None) without a model
+    """
+    if not XGBOOST_AVAILABLE:
+        return None, None
+    model, _ = load_model(model_path, meta_path)
+    if model is None:
+        return None, None
+
+    key = cache_key(model, df, calendar, forecast_days, model_path)
+    frame = _read_cache(cache_path, key)
+    if frame is None:
+        frame = explain_forecast(model, df, forecast_days, calendar, weather_options)
+    elif output_path is None:
+        return frame, key['model_version']
+
+    output_path = output_path or cache_path
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    rows = frame.assign(ds=frame['ds'].dt.strftime('%Y-%m-%d'))
+    with open(output_path, 'w') as f:
+        json.dump({'key': key, 'rows': rows.to_dict('records')}, f)
+    return frame, key['model_version']
+
+def summarize_attributions(frame, top=5):
+    """
+    Largest drivers of the first forecast day and of the whole horizon
+    Horizon drivers are ranked by mean absolute contribution
+    """
+    features = [c for c in frame.columns if c not in ('ds', 'yhat', BIAS)]
+    first = frame.iloc[0]
+    ranked = first[features].astype(float).abs().sort_values(ascending=False).index[:top]
+    horizon = frame[features].abs().mean().sort_values(ascending=False).head(top)
+    return {
+        'date': str(first['ds'].date()),
+        'yhat': float(first['yhat']),
+        'bias': float(first[BIAS]),
+        'next_day': [{'feature': name, 'contribution': float(first[name])} for name in ranked],
+        'horizon': [{'feature': name, 'mean_abs': float(value)}
+                    for name, value in horizon.items()],
+    }
+
+def benchmark_attributions(df, forecast_days=30):
+    """
+    Cost of explaining a full horizon relative to forecasting it, batched
+    TreeSHAP vs one call per day, and a check that contributions add up
+    """
+    model, _ = load_model()
+    if model is None:
+        print("[WARNING] No saved XGBoost model; run 03_ml_forecasting.py first")
+        return
+
+    needed = model.get_booster().feature_names or []
+    df_ml, features = create_lag_features(df, weather=bool(set(WEATHER_FEATURES) & set(needed)))
+    dates = pd.date_range(df_ml.index[-1] + pd.Timedelta(days=1), periods=forecast_days, freq='D')
+    temps = climatology_for_dates(build_climatology(df), dates)[None, :]
+
+    start = time.perf_counter()
+    forecast, rows = recursive_forecast(model, df_ml, features, dates, temps,
+                                        return_features=True)
+    forecast_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    explained = contributions(model, rows[features])
+    batched_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(len(rows)):
+        contributions(model, rows[features].iloc[i:i + 1])
+    looped_time = time.perf_counter() - start
+
+    gap = np.abs(explained.sum(axis=1).values - forecast[0]).max()
+    print(f"\n{forecast_days}-day recursive forecast: {forecast_time:.3f}s")
+    print(f"Attributions: batched {batched_time:.3f}s "
+          f"({batched_time / forecast_time:.2f}x the forecast), "
+          f"one call per day {looped_time:.3f}s")
+    print(f"Max |sum of contributions - forecast|: {gap:.2e} MU")
+
+    explained.insert(0, 'yhat', forecast[0])
+    explained.insert(0, 'ds', dates)
+    summary = summarize_attributions(explained.reset_index(drop=True))
+    print(f"\nDrivers of {summary['date']} ({summary['yhat']:.1f} MU, "
+          f"bias {summary['bias']:.1f} MU):")
+    for item in summary['next_day']:
+        print(f"  {item['feature']:<18} {item['contribution']:+8.2f} MU")
+
+if __name__ == "__main__":
+    print("="*60)
+    print("XGBOOST FORECAST ATTRIBUTIONS")
+    print("="*60)
+
+    if XGBOOST_AVAILABLE:
+        df = pd.read_csv("data/prepared_data.csv", index_col=0, parse_dates=True)
+        benchmark_attributions(df)
+    else:
+        print("\n[WARNING] Install XGBoost to use: pip install xgboost scikit-learn")